@@ -2,26 +2,201 @@
 A2A Protocol Client Implementation
 """
 import requests
+import itertools
 import json
+import random
+import threading
+import time
 import uuid
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, Iterator, Optional, List, Set, Tuple
 import asyncio
 import aiohttp
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from http2_transport import Http2Session, AsyncHttp2Session
+
+# JSON-RPC methods that only read state, so resending them is always safe
+READ_ONLY_METHODS = {
+    "agent/capabilities",
+    "agent/skills",
+    "task/artifacts",
+    "task/push_notification/get",
+    "agent/remote/list",
+    "mgx/team_info",
+    "mgx/project_status",
+}
+
+# Transient statuses worth retrying: overload, upstream failure, rate limits
+RETRY_STATUSES = (429, 502, 503, 504)
+
+class JitteredRetry(Retry):
+    """urllib3 Retry with full jitter, so many workers retrying at once spread out"""
+    
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
+@dataclass
+class CachedMetadata:
+    value: Any
+    etag: Optional[str]
+    checked_at: float
+
+class MetadataCache:
+    """
+    Process-wide cache of agent cards, capabilities and skills
+    
+    These change only on deploy, so clients share one copy per agent URL.
+    Within the TTL a cached value is used as-is; after it, the client
+    revalidates with If-None-Match and the server answers 304 if nothing
+    changed, so the data is not sent again.
+    """
+    
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.entries: Dict[Tuple[str, str], CachedMetadata] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "fetched": 0}
+    
+    def get(self, key: Tuple[str, str]) -> Optional[CachedMetadata]:
+        with self._lock:
+            return self.entries.get(key)
+    
+    def is_fresh(self, entry: CachedMetadata) -> bool:
+        return time.monotonic() - entry.checked_at < self.ttl
+    
+    def put(self, key: Tuple[str, str], value: Any, etag: Optional[str]):
+        with self._lock:
+            self.entries[key] = CachedMetadata(value, etag, time.monotonic())
+    
+    def invalidate(self, base_url: Optional[str] = None):
+        """Forget everything cached for base_url (or for every agent)"""
+        with self._lock:
+            for key in [k for k in self.entries if base_url is None or k[0] == base_url.rstrip('/')]:
+                del self.entries[key]
+
+_metadata_cache = MetadataCache()
+
+def get_metadata_cache() -> MetadataCache:
+    """The cache shared by every client in this process"""
+    return _metadata_cache
+
+def jsonrpc_result(body: Dict[str, Any]) -> Dict[str, Any]:
+    if body.get("error"):
+        raise Exception(f"A2A Error: {body['error']}")
+    return body.get("result", {})
+
+def jsonrpc_payload(method: str, params: Optional[Dict[str, Any]] = None,
+                    idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+    """JSON-RPC 2.0 request body with a fresh id"""
+    payload = {
+        "jsonrpc": "2.0",
+        "method": method,
+        "id": str(uuid.uuid4())
+    }
+    
+    if idempotency_key:
+        params = dict(params or {}, idempotency_key=idempotency_key)
+    
+    if params:
+        payload["params"] = params
+    return payload
+
+@dataclass
+class SSEEvent:
+    """One Server-Sent Event; data holds the JSON-RPC response the server sent with it"""
+    event: str = "message"
+    data: str = ""
+    id: Optional[str] = None
+    
+    def json(self) -> Any:
+        return json.loads(self.data)
+    
+    @property
+    def result(self) -> Any:
+        return self.json().get("result")
+
+class SSEParser:
+    """
+    Incremental text/event-stream parser
+    
+    feed() takes chunks exactly as they come off the socket, split anywhere
+    (even inside a UTF-8 character), and returns the events completed by
+    that chunk.
+    """
+    
+    def __init__(self):
+        self._buffer = b""
+        self._event = "message"
+        self._data: List[str] = []
+        self._id: Optional[str] = None
+    
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        events = []
+        for raw in lines:
+            line = raw.rstrip(b"\r").decode("utf-8")
+            if not line:
+                # A blank line ends the event
+                if self._data:
+                    events.append(SSEEvent(self._event, "\n".join(self._data), self._id))
+                self._event, self._data, self._id = "message", [], None
+                continue
+            if line.startswith(":"):
+                # Comment, e.g. the server's keepalives
+                continue
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                self._event = value
+            elif field == "data":
+                self._data.append(value)
+            elif field == "id":
+                self._id = value
+        return events
+
+def is_event_stream(content_type: Optional[str]) -> bool:
+    return (content_type or "").split(";")[0].strip() == "text/event-stream"
+
+def stream_error(event: SSEEvent) -> Exception:
+    try:
+        error = event.json().get("error")
+    except ValueError:
+        error = event.data
+    return Exception(f"A2A Error: {error}")
 
 class A2AClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 30,
+                 pool_connections: int = 10, pool_maxsize: int = 10, max_retries: int = 3,
+                 backoff_factor: float = 0.5, metadata_cache: Optional[MetadataCache] = None,
+                 http2: bool = False):
         """
         Initialize A2A Client
         
         Args:
             base_url: Base URL of the A2A agent (e.g., "http://localhost:8000")
             api_key: Optional API key for authentication
+            timeout: Per-request timeout in seconds
+            pool_connections: Number of hosts to keep connection pools for
+            pool_maxsize: Keep-alive connections kept per host; size this to
+                the number of threads sharing the client
+            max_retries: Retries for connection errors and transient HTTP
+                statuses on calls that are safe to resend
+            backoff_factor: Base of the jittered exponential backoff between
+                retries, in seconds
+            metadata_cache: Cache for the agent card, capabilities and
+                skills; defaults to the one shared process-wide
+            http2: Multiplex calls over HTTP/2 (needs httpx[http2]); only
+                failed connection attempts are retried then
         """
         self.base_url = base_url.rstrip('/')
         self.a2a_endpoint = f"{self.base_url}/a2a"
         self.agent_card_url = f"{self.base_url}/agent-card"
         self.api_key = api_key
+        self.timeout = timeout
+        self.metadata_cache = metadata_cache or get_metadata_cache()
         
         self.headers = {
             "Content-Type": "application/json"
@@ -29,41 +204,121 @@ class A2AClient:
         
         if api_key:
             self.headers["Authorization"] = f"Bearer {api_key}"
+        
+        if http2:
+            # One multiplexed session serves every call
+            self.session = self._no_retry_session = Http2Session(
+                self.base_url, self.headers, max_connections=pool_maxsize, retries=max_retries
+            )
+            return
+        
+        # One pooled keep-alive session for every call, instead of a new
+        # connection (and TLS handshake) per request
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.session = self._pooled_session(JitteredRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            # POST is retried too: send_jsonrpc_request only uses this session
+            # for JSON-RPC calls that are read-only or carry an idempotency key
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        ))
+        # Other calls are only retried when the connection itself failed,
+        # i.e. before the server could have seen the request
+        self._no_retry_session = self._pooled_session(JitteredRetry(
+            total=max_retries, read=0, status=0, other=0, backoff_factor=backoff_factor
+        ))
+    
+    def _pooled_session(self, retry: Retry) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+        self._no_retry_session.close()
+    
+    def __enter__(self) -> "A2AClient":
+        return self
     
-    def get_agent_card(self) -> Dict[str, Any]:
-        """Get the agent card from the remote agent"""
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _cached(self, name: str, fetch: Callable[[Dict[str, str]], requests.Response],
+                extract: Callable[[Dict[str, Any]], Any], refresh: bool) -> Any:
+        """Serve name from the metadata cache, revalidating with the server once it is stale"""
+        key = (self.base_url, name)
+        entry = self.metadata_cache.get(key)
+        if entry and not refresh and self.metadata_cache.is_fresh(entry):
+            self.metadata_cache.stats["hits"] += 1
+            return entry.value
+        
+        response = fetch({"If-None-Match": entry.etag} if entry and entry.etag else {})
+        if response.status_code == 304 and entry:
+            self.metadata_cache.put(key, entry.value, entry.etag)
+            self.metadata_cache.stats["revalidated"] += 1
+            return entry.value
+        response.raise_for_status()
+        value = extract(response.json())
+        self.metadata_cache.put(key, value, response.headers.get("ETag"))
+        self.metadata_cache.stats["fetched"] += 1
+        return value
+    
+    def _cached_jsonrpc(self, method: str, refresh: bool) -> Dict[str, Any]:
         try:
-            response = requests.get(self.agent_card_url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._cached(
+                method,
+                lambda headers: self.session.post(self.a2a_endpoint, json=jsonrpc_payload(method),
+                                                  headers=headers, timeout=self.timeout),
+                jsonrpc_result, refresh
+            )
+        except requests.RequestException as e:
+            raise Exception(f"Failed to send A2A request: {str(e)}")
+    
+    def get_agent_card(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get the agent card from the remote agent (cached; refresh revalidates now)"""
+        try:
+            return self._cached(
+                "agent-card",
+                lambda headers: self.session.get(self.agent_card_url, headers=headers, timeout=self.timeout),
+                lambda card: card, refresh
+            )
         except requests.RequestException as e:
             raise Exception(f"Failed to get agent card: {str(e)}")
     
-    def send_jsonrpc_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Send a JSON-RPC 2.0 request to the A2A endpoint"""
-        request_id = str(uuid.uuid4())
-        
-        payload = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "id": request_id
-        }
+    def send_jsonrpc_request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                             idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC 2.0 request to the A2A endpoint
         
-        if params:
-            payload["params"] = params
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+            idempotency_key: Optional key for mutating methods; resending the
+                same key returns the server's stored result instead of
+                repeating the work
+        """
+        payload = jsonrpc_payload(method, params, idempotency_key)
         
         try:
-            response = requests.post(
+            response = self._session_for(method, idempotency_key).post(
                 self.a2a_endpoint, 
                 json=payload, 
-                headers=self.headers,
-                timeout=30
+                timeout=self.timeout
             )
             response.raise_for_status()
             
             result = response.json()
             
-            if "error" in result:
+            if result.get("error"):
                 raise Exception(f"A2A Error: {result['error']}")
             
             return result.get("result", {})
@@ -71,7 +326,108 @@ class A2AClient:
         except requests.RequestException as e:
             raise Exception(f"Failed to send A2A request: {str(e)}")
     
-    def create_task(self, user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
+    def _session_for(self, method: str, idempotency_key: Optional[str]) -> requests.Session:
+        # A resent read or a resent call with the same idempotency key cannot
+        # repeat work on the server, so only those get the retrying session
+        retry_safe = method in READ_ONLY_METHODS or bool(idempotency_key)
+        return self.session if retry_safe else self._no_retry_session
+    
+    def stream_jsonrpc(self, method: str, params: Optional[Dict[str, Any]] = None,
+                       idempotency_key: Optional[str] = None, read_timeout: float = 300) -> Iterator[SSEEvent]:
+        """
+        Call a streaming method and yield its Server-Sent Events as they arrive
+        
+        Yields "delta" events with partial output, then the final "result"
+        event; an "error" event raises. A server that answers with plain JSON
+        yields a single "result" event. The call is not resent if the
+        connection drops mid-stream, since that would repeat the work; use
+        subscribe() to keep following the task.
+        """
+        payload = jsonrpc_payload(method, dict(params or {}, stream=True), idempotency_key)
+        try:
+            response = self._session_for(method, idempotency_key).post(
+                self.a2a_endpoint, json=payload, stream=True, timeout=(self.timeout, read_timeout)
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise Exception(f"Failed to send A2A request: {str(e)}")
+        
+        with response:
+            if not is_event_stream(response.headers.get("Content-Type")):
+                event = SSEEvent("result", response.text)
+                if event.json().get("error"):
+                    raise stream_error(event)
+                yield event
+                return
+            
+            parser = SSEParser()
+            try:
+                for chunk in response.iter_content(chunk_size=None):
+                    for event in parser.feed(chunk):
+                        if event.event == "error":
+                            raise stream_error(event)
+                        yield event
+            except requests.RequestException as e:
+                raise Exception(f"A2A stream interrupted: {str(e)}")
+    
+    def stream_message(self, task_id: str, message: str, idempotency_key: Optional[str] = None) -> Iterator[SSEEvent]:
+        """Send a message to a task and stream the reply"""
+        params = {
+            "task_id": task_id,
+            "message": {"role": "user", "parts": [{"type": "text", "content": message}]}
+        }
+        return self.stream_jsonrpc("task/message", params, idempotency_key=idempotency_key or str(uuid.uuid4()))
+    
+    def stream_task(self, message: str, user_id: Optional[str] = None,
+                    context_id: Optional[str] = None) -> Iterator[SSEEvent]:
+        """Streaming task/send: create a task (or continue context_id) and stream the reply"""
+        params = {"message": {"role": "user", "parts": [{"type": "text", "content": message}]}}
+        if user_id:
+            params["user_id"] = user_id
+        if context_id:
+            params["context_id"] = context_id
+        return self.stream_jsonrpc("task/send", params, idempotency_key=str(uuid.uuid4()))
+    
+    def subscribe(self, task_id: Optional[str] = None, project_id: Optional[str] = None,
+                  last_event_id: Optional[str] = None, max_reconnects: int = 5,
+                  read_timeout: float = 60) -> Iterator[SSEEvent]:
+        """
+        Follow a task's or project's events (GET /events) until the caller stops
+        
+        Dropped connections, and the server closing a subscriber that fell
+        behind, are handled by reconnecting with Last-Event-ID so no event is
+        missed or repeated. Gives up after max_reconnects failed attempts in
+        a row.
+        """
+        params = {k: v for k, v in (("task_id", task_id), ("project_id", project_id)) if v}
+        failures = 0
+        while True:
+            headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+            parser = SSEParser()
+            try:
+                with self.session.get(f"{self.base_url}/events", params=params, headers=headers,
+                                      stream=True, timeout=(self.timeout, read_timeout)) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=None):
+                        for event in parser.feed(chunk):
+                            failures = 0
+                            if event.id:
+                                last_event_id = event.id
+                            if event.event != "closed":
+                                yield event
+            except requests.HTTPError as e:
+                if e.response is not None and 400 <= e.response.status_code < 500:
+                    raise Exception(f"Failed to subscribe: {str(e)}")
+            except requests.RequestException:
+                pass
+            
+            failures += 1
+            if failures > max_reconnects:
+                raise Exception(f"Event stream lost after {max_reconnects} reconnect attempts")
+            time.sleep(random.uniform(0, min(30, 0.5 * 2 ** failures)))
+    
+    def create_task(self, user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None,
+                    idempotency_key: Optional[str] = None) -> str:
         """Create a new task and return task ID"""
         params = {}
         if user_id:
@@ -79,10 +435,12 @@ class A2AClient:
         if metadata:
             params["metadata"] = metadata
         
-        result = self.send_jsonrpc_request("task/create", params)
+        result = self.send_jsonrpc_request(
+            "task/create", params, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
         return result["task_id"]
     
-    def send_message(self, task_id: str, message: str) -> Dict[str, Any]:
+    def send_message(self, task_id: str, message: str, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Send a message to a task"""
         message_data = {
             "role": "user",
@@ -99,25 +457,56 @@ class A2AClient:
             "message": message_data
         }
         
-        return self.send_jsonrpc_request("task/message", params)
+        return self.send_jsonrpc_request(
+            "task/message", params, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
     
-    def get_capabilities(self) -> Dict[str, Any]:
-        """Get agent capabilities"""
-        return self.send_jsonrpc_request("agent/capabilities")
+    def send_task(self, message: str, user_id: Optional[str] = None, context_id: Optional[str] = None,
+                  metadata: Optional[Dict[str, Any]] = None,
+                  idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create a task (or continue the one for context_id) and send a message in one round trip"""
+        params = {
+            "message": {
+                "role": "user",
+                "parts": [
+                    {
+                        "type": "text",
+                        "content": message
+                    }
+                ]
+            }
+        }
+        if user_id:
+            params["user_id"] = user_id
+        if context_id:
+            params["context_id"] = context_id
+        if metadata:
+            params["metadata"] = metadata
+        
+        return self.send_jsonrpc_request(
+            "task/send", params, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
     
-    def get_skills(self) -> List[Dict[str, Any]]:
-        """Get available skills"""
-        result = self.send_jsonrpc_request("agent/skills")
+    def get_capabilities(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get agent capabilities (cached)"""
+        return self._cached_jsonrpc("agent/capabilities", refresh)
+    
+    def get_skills(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Get available skills (cached)"""
+        result = self._cached_jsonrpc("agent/skills", refresh)
         return result.get("skills", [])
     
-    def execute_skill(self, skill_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    def execute_skill(self, skill_name: str, parameters: Dict[str, Any],
+                      idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Execute a specific skill"""
         params = {
             "skill_name": skill_name,
             "parameters": parameters
         }
         
-        return self.send_jsonrpc_request("skill/execute", params)
+        return self.send_jsonrpc_request(
+            "skill/execute", params, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
     
     def get_artifacts(self, task_id: str) -> List[Dict[str, Any]]:
         """Get artifacts for a task"""
@@ -130,14 +519,11 @@ class A2AClient:
         params = {"task_id": task_id}
         return self.send_jsonrpc_request("task/cancel", params)
     
-    def chat_with_agent(self, message: str, user_id: Optional[str] = None) -> str:
+    def chat_with_agent(self, message: str, user_id: Optional[str] = None, context_id: Optional[str] = None) -> str:
         """Simple chat interface - creates task, sends message, returns response"""
         try:
-            # Create task
-            task_id = self.create_task(user_id=user_id)
-            
-            # Send message
-            response = self.send_message(task_id, message)
+            # Create task and send message in a single task/send call
+            response = self.send_task(message, user_id=user_id, context_id=context_id)
             
             # Extract text response
             agent_response = response.get("response", {})
@@ -157,7 +543,8 @@ class A2AClient:
     def test_connection(self) -> bool:
         """Test if the agent is reachable and responding"""
         try:
-            agent_card = self.get_agent_card()
+            # Always ask the server; a still-current card costs only a 304
+            agent_card = self.get_agent_card(refresh=True)
             return bool(agent_card.get("identity", {}).get("name"))
         except:
             return False
@@ -186,13 +573,57 @@ class A2AClient:
         except Exception as e:
             print(f"Error getting agent info: {str(e)}")
 
+@dataclass
+class BulkResult:
+    """Outcome of one call in AsyncA2AClient.bulk(); index is its position in the input"""
+    index: int
+    call: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 # Async version for advanced use cases
 class AsyncA2AClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 30,
+                 limit: int = 100, limit_per_host: int = 0, ttl_dns_cache: int = 300,
+                 keepalive_timeout: float = 30, metadata_cache: Optional[MetadataCache] = None,
+                 http2: bool = False):
+        """
+        Initialize async A2A Client
+        
+        The client owns one aiohttp session (connection pool, DNS cache and
+        keep-alive connections) for its lifetime. Use it as an async context
+        manager, or call close() when done.
+        
+        Args:
+            base_url: Base URL of the A2A agent (e.g., "http://localhost:8000")
+            api_key: Optional API key for authentication
+            timeout: Per-request timeout in seconds
+            limit: Maximum simultaneous connections (0 = unlimited)
+            limit_per_host: Maximum simultaneous connections per host (0 = unlimited)
+            ttl_dns_cache: Seconds to cache DNS lookups
+            keepalive_timeout: Seconds an idle connection is kept for reuse
+            metadata_cache: Cache for the agent card, capabilities and
+                skills; defaults to the one shared process-wide
+            http2: Multiplex concurrent calls as HTTP/2 streams over a few
+                connections (needs httpx[http2]); limit_per_host (or limit)
+                then caps connections, not concurrent calls
+        """
         self.base_url = base_url.rstrip('/')
         self.a2a_endpoint = f"{self.base_url}/a2a"
         self.agent_card_url = f"{self.base_url}/agent-card"
         self.api_key = api_key
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.metadata_cache = metadata_cache or get_metadata_cache()
+        self.http2 = http2
+        self._session: Optional[aiohttp.ClientSession] = None
         
         self.headers = {
             "Content-Type": "application/json"
@@ -201,57 +632,336 @@ class AsyncA2AClient:
         if api_key:
             self.headers["Authorization"] = f"Bearer {api_key}"
     
-    async def send_jsonrpc_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created on first use inside the running event loop"""
+        if self.http2 and (self._session is None or self._session.closed):
+            self._session = AsyncHttp2Session(
+                self.base_url, self.headers, timeout=self.timeout,
+                max_connections=self.limit_per_host or self.limit,
+                keepalive_expiry=self.keepalive_timeout
+            )
+        elif self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                    keepalive_timeout=self.keepalive_timeout
+                ),
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def __aenter__(self) -> "AsyncA2AClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def _cached(self, name: str, http_method: str, url: str, payload: Optional[Dict[str, Any]],
+                      extract: Callable[[Dict[str, Any]], Any], refresh: bool) -> Any:
+        """Async A2AClient._cached(): cached metadata, revalidated with If-None-Match once stale"""
+        key = (self.base_url, name)
+        entry = self.metadata_cache.get(key)
+        if entry and not refresh and self.metadata_cache.is_fresh(entry):
+            self.metadata_cache.stats["hits"] += 1
+            return entry.value
+        
+        headers = {"If-None-Match": entry.etag} if entry and entry.etag else {}
+        async with self.session.request(http_method, url, json=payload, headers=headers) as response:
+            if response.status == 304 and entry:
+                self.metadata_cache.put(key, entry.value, entry.etag)
+                self.metadata_cache.stats["revalidated"] += 1
+                return entry.value
+            response.raise_for_status()
+            value = extract(await response.json())
+            self.metadata_cache.put(key, value, response.headers.get("ETag"))
+            self.metadata_cache.stats["fetched"] += 1
+            return value
+    
+    async def get_agent_card(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get the agent card from the remote agent (cached; refresh revalidates now)"""
+        try:
+            return await self._cached("agent-card", "GET", self.agent_card_url, None, lambda card: card, refresh)
+        except aiohttp.ClientError as e:
+            raise Exception(f"Failed to get agent card: {str(e)}")
+    
+    async def get_capabilities(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get agent capabilities (cached)"""
+        return await self._cached_jsonrpc("agent/capabilities", refresh)
+    
+    async def get_skills(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Get available skills (cached)"""
+        result = await self._cached_jsonrpc("agent/skills", refresh)
+        return result.get("skills", [])
+    
+    async def _cached_jsonrpc(self, method: str, refresh: bool) -> Dict[str, Any]:
+        try:
+            return await self._cached(method, "POST", self.a2a_endpoint, jsonrpc_payload(method),
+                                      jsonrpc_result, refresh)
+        except aiohttp.ClientError as e:
+            raise Exception(f"Failed to send A2A request: {str(e)}")
+    
+    async def send_jsonrpc_request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                                   idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Send async JSON-RPC request"""
-        request_id = str(uuid.uuid4())
+        payload = jsonrpc_payload(method, params, idempotency_key)
         
-        payload = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "id": request_id
+        try:
+            async with self.session.post(self.a2a_endpoint, json=payload) as response:
+                response.raise_for_status()
+                result = await response.json()
+                
+                if result.get("error"):
+                    raise Exception(f"A2A Error: {result['error']}")
+                
+                return result.get("result", {})
+                
+        except aiohttp.ClientError as e:
+            raise Exception(f"Failed to send A2A request: {str(e)}")
+    
+    async def stream_jsonrpc(self, method: str, params: Optional[Dict[str, Any]] = None,
+                             idempotency_key: Optional[str] = None,
+                             read_timeout: float = 300) -> AsyncIterator[SSEEvent]:
+        """Async A2AClient.stream_jsonrpc(): yield "delta" events, then the "result" event"""
+        payload = jsonrpc_payload(method, dict(params or {}, stream=True), idempotency_key)
+        # A stream may run far longer than a plain call; only a stall between chunks times out
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=read_timeout)
+        try:
+            async with self.session.post(self.a2a_endpoint, json=payload, timeout=timeout) as response:
+                response.raise_for_status()
+                if not is_event_stream(response.headers.get("Content-Type")):
+                    event = SSEEvent("result", await response.text())
+                    if event.json().get("error"):
+                        raise stream_error(event)
+                    yield event
+                    return
+                
+                parser = SSEParser()
+                async for chunk in response.content.iter_any():
+                    for event in parser.feed(chunk):
+                        if event.event == "error":
+                            raise stream_error(event)
+                        yield event
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"A2A stream failed: {str(e)}")
+    
+    async def stream_message(self, task_id: str, message: str,
+                             idempotency_key: Optional[str] = None) -> AsyncIterator[SSEEvent]:
+        """Send a message to a task and stream the reply"""
+        params = {
+            "task_id": task_id,
+            "message": {"role": "user", "parts": [{"type": "text", "content": message}]}
         }
+        async for event in self.stream_jsonrpc("task/message", params,
+                                               idempotency_key=idempotency_key or str(uuid.uuid4())):
+            yield event
+    
+    async def stream_task(self, message: str, user_id: Optional[str] = None,
+                          context_id: Optional[str] = None) -> AsyncIterator[SSEEvent]:
+        """Streaming task/send: create a task (or continue context_id) and stream the reply"""
+        params = {"message": {"role": "user", "parts": [{"type": "text", "content": message}]}}
+        if user_id:
+            params["user_id"] = user_id
+        if context_id:
+            params["context_id"] = context_id
+        async for event in self.stream_jsonrpc("task/send", params, idempotency_key=str(uuid.uuid4())):
+            yield event
+    
+    async def subscribe(self, task_id: Optional[str] = None, project_id: Optional[str] = None,
+                        last_event_id: Optional[str] = None, max_reconnects: int = 5,
+                        read_timeout: float = 60) -> AsyncIterator[SSEEvent]:
+        """Async A2AClient.subscribe(): follow events, reconnecting with Last-Event-ID"""
+        params = {k: v for k, v in (("task_id", task_id), ("project_id", project_id)) if v}
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=read_timeout)
+        failures = 0
+        while True:
+            headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+            parser = SSEParser()
+            try:
+                async with self.session.get(f"{self.base_url}/events", params=params, headers=headers,
+                                            timeout=timeout) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_any():
+                        for event in parser.feed(chunk):
+                            failures = 0
+                            if event.id:
+                                last_event_id = event.id
+                            if event.event != "closed":
+                                yield event
+            except aiohttp.ClientResponseError as e:
+                if 400 <= e.status < 500:
+                    raise Exception(f"Failed to subscribe: {str(e)}")
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            
+            failures += 1
+            if failures > max_reconnects:
+                raise Exception(f"Event stream lost after {max_reconnects} reconnect attempts")
+            await asyncio.sleep(random.uniform(0, min(30, 0.5 * 2 ** failures)))
+    
+    async def send_jsonrpc_batch(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send several JSON-RPC calls in one HTTP request (a JSON-RPC batch)
         
-        if params:
-            payload["params"] = params
+        calls are dicts with "method" and optional "params" and
+        "idempotency_key". Returns the JSON-RPC response for each call, in
+        the same order; check each one's "error".
+        """
+        payloads = [jsonrpc_payload(c["method"], c.get("params"), c.get("idempotency_key")) for c in calls]
         
-        async with aiohttp.ClientSession() as session:
+        try:
+            async with self.session.post(self.a2a_endpoint, json=payloads) as response:
+                response.raise_for_status()
+                responses = await response.json()
+        except aiohttp.ClientError as e:
+            raise Exception(f"Failed to send A2A batch: {str(e)}")
+        
+        if isinstance(responses, dict):
+            # The batch as a whole was rejected
+            raise Exception(f"A2A Error: {responses.get('error')}")
+        by_id = {r.get("id"): r for r in responses}
+        return [
+            by_id.get(p["id"], {"error": {"code": -32603, "message": "No response for call"}})
+            for p in payloads
+        ]
+    
+    async def bulk(self, calls: Iterable[Dict[str, Any]], concurrency: int = 10, ordered: bool = False,
+                   batch_size: int = 1) -> AsyncIterator[BulkResult]:
+        """
+        Run many JSON-RPC calls with at most `concurrency` requests in flight
+        
+        calls is consumed lazily, so it can be a generator of any length;
+        each item is a dict with "method" and optional "params" and
+        "idempotency_key". Results are yielded as calls complete, or in input
+        order with ordered=True. A failed call yields a BulkResult with error
+        set rather than raising. With batch_size > 1, calls are packed into
+        JSON-RPC batches of that size, so each request in flight carries up
+        to batch_size calls.
+        """
+        units = self._bulk_units(calls, batch_size)
+        unit_size = max(1, batch_size)
+        pending: Set[asyncio.Task] = set()
+        buffered: Dict[int, BulkResult] = {}
+        next_index = 0
+        launched = 0
+        
+        def fill():
+            nonlocal launched
+            room = concurrency - len(pending)
+            if ordered:
+                # Stay within `concurrency` units of the next result to yield, so a
+                # slow call holds up new work instead of letting `buffered` grow
+                room = concurrency - (launched - next_index // unit_size)
+            for unit in itertools.islice(units, max(0, room)):
+                pending.add(asyncio.ensure_future(self._run_bulk_unit(unit)))
+                launched += 1
+        
+        try:
+            fill()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                # Keep the window full while the caller handles these results
+                fill()
+                for task in done:
+                    for result in task.result():
+                        if ordered:
+                            buffered[result.index] = result
+                        else:
+                            yield result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+                if ordered:
+                    fill()
+        finally:
+            # The caller stopped early (or failed): drop calls still in flight
+            for task in pending:
+                task.cancel()
+    
+    async def bulk_chat(self, messages: Iterable[str], concurrency: int = 10, ordered: bool = False,
+                        batch_size: int = 1, user_id: Optional[str] = None) -> AsyncIterator[BulkResult]:
+        """bulk() over task/send, one new task per message; each result is the task/send result"""
+        calls = (
+            {
+                "method": "task/send",
+                "params": {
+                    "message": {"role": "user", "parts": [{"type": "text", "content": message}]},
+                    **({"user_id": user_id} if user_id else {})
+                },
+                "idempotency_key": str(uuid.uuid4())
+            }
+            for message in messages
+        )
+        async for result in self.bulk(calls, concurrency=concurrency, ordered=ordered, batch_size=batch_size):
+            yield result
+    
+    @staticmethod
+    def _bulk_units(calls: Iterable[Dict[str, Any]],
+                    batch_size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        indexed = enumerate(calls)
+        while True:
+            unit = list(itertools.islice(indexed, max(1, batch_size)))
+            if not unit:
+                return
+            yield unit
+    
+    async def _run_bulk_unit(self, unit: List[Tuple[int, Dict[str, Any]]]) -> List[BulkResult]:
+        if len(unit) == 1:
+            index, call = unit[0]
             try:
-                async with session.post(
-                    self.a2a_endpoint,
-                    json=payload,
-                    headers=self.headers,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    
-                    if "error" in result:
-                        raise Exception(f"A2A Error: {result['error']}")
-                    
-                    return result.get("result", {})
-                    
-            except aiohttp.ClientError as e:
-                raise Exception(f"Failed to send A2A request: {str(e)}")
-    
-    async def chat_with_agent(self, message: str, user_id: Optional[str] = None) -> str:
-        """Async chat interface"""
+                result = await self.send_jsonrpc_request(call["method"], call.get("params"),
+                                                         call.get("idempotency_key"))
+                return [BulkResult(index, call, result=result)]
+            except Exception as e:
+                return [BulkResult(index, call, error=str(e))]
+        
         try:
-            # Create task
-            task_result = await self.send_jsonrpc_request("task/create", {
-                "user_id": user_id
-            })
-            task_id = task_result["task_id"]
-            
-            # Send message
-            message_data = {
+            responses = await self.send_jsonrpc_batch([call for _, call in unit])
+        except Exception as e:
+            return [BulkResult(index, call, error=str(e)) for index, call in unit]
+        return [
+            BulkResult(index, call, result=response.get("result"),
+                       error=f"A2A Error: {response['error']}" if response.get("error") else None)
+            for (index, call), response in zip(unit, responses)
+        ]
+    
+    async def send_task(self, message: str, user_id: Optional[str] = None, context_id: Optional[str] = None,
+                        metadata: Optional[Dict[str, Any]] = None,
+                        idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create a task (or continue the one for context_id) and send a message in one round trip"""
+        params = {
+            "message": {
                 "role": "user",
                 "parts": [{"type": "text", "content": message}]
             }
-            
-            response = await self.send_jsonrpc_request("task/message", {
-                "task_id": task_id,
-                "message": message_data
-            })
+        }
+        if user_id:
+            params["user_id"] = user_id
+        if context_id:
+            params["context_id"] = context_id
+        if metadata:
+            params["metadata"] = metadata
+        
+        return await self.send_jsonrpc_request(
+            "task/send", params, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
+    
+    async def chat_with_agent(self, message: str, user_id: Optional[str] = None,
+                              context_id: Optional[str] = None) -> str:
+        """Async chat interface"""
+        try:
+            # Create task and send message in a single task/send call
+            response = await self.send_task(message, user_id=user_id, context_id=context_id)
             
             # Extract response
             agent_response = response.get("response", {})
@@ -268,6 +978,148 @@ class AsyncA2AClient:
         except Exception as e:
             return f"Error: {str(e)}"
 
+# Completion policies for MultiAgentClient.scatter()
+FIRST_SUCCESS = "first_success"  # the first successful answer
+ALL = "all"                      # every answer that arrives within the timeout
+QUORUM = "quorum"                # the first `quorum` successful answers (default: a majority)
+
+@dataclass
+class AgentOutcome:
+    """One agent's answer (or failure) in a scatter-gather call"""
+    base_url: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class ScatterResult:
+    """
+    Outcome of MultiAgentClient.scatter()
+    
+    outcomes lists finished calls in completion order, then any that were
+    cut off: "timed out" at the deadline, or "cancelled" once the policy
+    was met (or could no longer be met).
+    satisfied tells whether the policy was met.
+    """
+    policy: str
+    outcomes: List[AgentOutcome]
+    satisfied: bool
+    
+    @property
+    def successes(self) -> List[AgentOutcome]:
+        return [outcome for outcome in self.outcomes if outcome.ok]
+    
+    @property
+    def first(self) -> Optional[AgentOutcome]:
+        """The first successful answer, if any"""
+        return next(iter(self.successes), None)
+
+class MultiAgentClient:
+    """
+    Send the same request to several A2A agents at once and gather answers
+    
+    Each agent gets its own AsyncA2AClient (and connection pool). Once the
+    completion policy is met, calls still running are cancelled so they do
+    not hold connections.
+    """
+    
+    def __init__(self, base_urls: List[str], api_key: Optional[str] = None, **client_options):
+        """
+        Args:
+            base_urls: Base URLs of the agents to query
+            api_key: Optional API key sent to every agent
+            client_options: Passed to each AsyncA2AClient (timeout, limit, ...)
+        """
+        self.clients = [AsyncA2AClient(url, api_key=api_key, **client_options) for url in base_urls]
+    
+    async def close(self):
+        await asyncio.gather(*(client.close() for client in self.clients))
+    
+    async def __aenter__(self) -> "MultiAgentClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def scatter(self, method: str, params: Optional[Dict[str, Any]] = None, policy: str = FIRST_SUCCESS,
+                      timeout: Optional[float] = None, quorum: Optional[int] = None,
+                      idempotency_key: Optional[str] = None) -> ScatterResult:
+        """
+        Run one JSON-RPC call against every agent concurrently
+        
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+            policy: FIRST_SUCCESS, ALL or QUORUM
+            timeout: Seconds to wait overall; calls still running then are cancelled
+            quorum: Successful answers needed for QUORUM (default: a majority)
+            idempotency_key: Sent to every agent, so retried scatters do not repeat work
+        """
+        if policy == FIRST_SUCCESS:
+            needed = 1
+        elif policy == QUORUM:
+            needed = quorum or len(self.clients) // 2 + 1
+        elif policy == ALL:
+            needed = len(self.clients)
+        else:
+            raise ValueError(f"Unknown scatter policy: {policy}")
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        calls = {
+            asyncio.ensure_future(self._call(client, method, params, idempotency_key)): client.base_url
+            for client in self.clients
+        }
+        pending = set(calls)
+        outcomes: List[AgentOutcome] = []
+        successes = 0
+        timed_out = False
+        
+        while pending and (policy == ALL or successes < needed):
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for call in done:
+                outcome = call.result()
+                outcomes.append(outcome)
+                successes += outcome.ok
+            if policy != ALL and successes + len(pending) < needed:
+                # Too many failures for the policy to be met
+                break
+        
+        satisfied = not pending if policy == ALL else successes >= needed
+        for call in pending:
+            call.cancel()
+            outcomes.append(AgentOutcome(calls[call], error="timed out" if timed_out else "cancelled"))
+        return ScatterResult(policy, outcomes, satisfied)
+    
+    async def chat(self, message: str, policy: str = FIRST_SUCCESS, timeout: Optional[float] = None,
+                   quorum: Optional[int] = None, user_id: Optional[str] = None) -> ScatterResult:
+        """Scatter one task/send message to every agent"""
+        params = {"message": {"role": "user", "parts": [{"type": "text", "content": message}]}}
+        if user_id:
+            params["user_id"] = user_id
+        return await self.scatter("task/send", params, policy=policy, timeout=timeout, quorum=quorum,
+                                  idempotency_key=str(uuid.uuid4()))
+    
+    @staticmethod
+    async def _call(client: AsyncA2AClient, method: str, params: Optional[Dict[str, Any]],
+                    idempotency_key: Optional[str]) -> AgentOutcome:
+        started = time.perf_counter()
+        try:
+            result = await client.send_jsonrpc_request(method, params, idempotency_key=idempotency_key)
+            outcome = AgentOutcome(client.base_url, result=result)
+        except Exception as e:
+            outcome = AgentOutcome(client.base_url, error=str(e))
+        outcome.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        return outcome
+
 # Example usage and testing
 if __name__ == "__main__":
     # Test the client
@@ -2,22 +2,36 @@
 A2A Protocol Server Implementation
 """
 import uuid
+import time
 import asyncio
-from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+import hashlib
+import hmac
 import json
 import logging
+import signal
 import uvicorn
+import aiohttp
 
 # Import A2A components
-from skills import AgentSkills
+from skills import AgentSkills, STREAMING_SKILLS
 from agent_card import AgentCardGenerator
 from config import Config
 from mgx_inspired_agent_team import MGXInspiredAgentTeam
+from idempotency import IdempotencyCache, IdempotencyKeyReused, params_fingerprint
+from state_snapshot import save_snapshot, load_snapshot
+from circuit_breaker import breaker_states
+from event_bus import get_event_bus, task_topic, project_topic, SubscriptionClosed
+from push_notifications import get_push_notifier
+from cluster import get_cluster, FORWARDED_HEADER
+from remote_agents import get_remote_agents, text_message
+from url_guard import check_outbound_url, parse_hosts
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,13 +65,75 @@ class SkillExecuteParams(BaseModel):
     parameters: Dict[str, Any]
     task_id: Optional[str] = None
 
+# Methods that change state or spend LLM tokens; these accept an
+# "idempotency_key" param so client retries replay the stored result
+IDEMPOTENT_METHODS = {
+    "task/create",
+    "task/message",
+    "task/send",
+    "skill/execute",
+    "mgx/create_project",
+    "mgx/team_discussion",
+    "mgx/generate_artifact",
+    "agent/remote/delegate",
+    "agent/remote/fan_out",
+}
+
+# Methods that can answer with a Server-Sent Events stream when called with
+# "stream": true; streamed calls are not replayed by idempotency key
+STREAMING_METHODS = {"task/message", "task/send", "skill/execute"}
+
+# Read-only methods whose results change only on deploy; their responses
+# carry an ETag so clients can revalidate a cached copy with If-None-Match
+CACHEABLE_METHODS = {"agent/capabilities", "agent/skills"}
+
+# Agent card fields regenerated on every request, left out of its ETag
+CARD_VOLATILE_METADATA = {"created_at", "last_updated"}
+
+# Task statuses after which task/send starts a new task for the context;
+# "completed" only ends a turn, so the conversation can go on
+ENDED_TASK_STATUSES = {"cancelled", "failed"}
+
+def parse_api_keys(spec: str) -> Dict[str, str]:
+    """Parse "key=tenant,key=tenant" into {key: tenant}"""
+    keys = {}
+    for item in spec.split(","):
+        key, _, tenant = item.strip().partition("=")
+        if key and tenant:
+            keys[key.strip()] = tenant.strip()
+    return keys
+
+def etag_for(data: Any) -> str:
+    """Strong ETag over the canonical JSON encoding of data"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32] + '"'
+
+def card_etag(card: Dict[str, Any]) -> str:
+    metadata = {k: v for k, v in card.get("metadata", {}).items() if k not in CARD_VOLATILE_METADATA}
+    return etag_for(dict(card, metadata=metadata))
+
+def cacheable_response(body: Any, etag: str, if_none_match: Optional[str]) -> Response:
+    """200 with an ETag, or an empty 304 when the client's copy is still current"""
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(body, headers={"ETag": etag})
+
+def format_sse(event: str, data: str, event_id: Optional[str] = None) -> str:
+    """Encode one Server-Sent Events message"""
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    id_line = f"id: {event_id}\n" if event_id else ""
+    return f"{id_line}event: {event}\n{lines}\n"
+
 # A2A Server Class
 class A2AServer:
     def __init__(self):
         self.app = FastAPI(
             title="A2A Agent Server",
             description="Agent-to-Agent protocol server with MGX-inspired team collaboration",
-            version="1.2.0"
+            version="1.2.0",
+            lifespan=self.lifespan
         )
         
         # Enable CORS for web applications
@@ -77,9 +153,124 @@ class A2AServer:
         # In-memory storage for tasks (in production, use a database)
         self.tasks: Dict[str, Dict[str, Any]] = {}
         
+        # context_id -> task_id, so task/send can continue a conversation
+        self.context_tasks: Dict[str, str] = {}
+        
+        # Task and project events for task/subscribe and webhook push notifications
+        self.event_bus = get_event_bus()
+        self.push_notifier = get_push_notifier()
+        if self.push_notifier:
+            self.push_notifier.listen(self.event_bus)
+        
+        # Cluster mode: tasks and projects live on the node their id hashes to
+        self.cluster = get_cluster()
+        self._cluster_watch: Optional[asyncio.Task] = None
+        
+        # Other A2A agents this one can delegate tasks and skills to
+        self.remote_agents = get_remote_agents()
+        
+        # Caller API key -> tenant; empty means callers are not authenticated
+        self.api_keys = parse_api_keys(Config.API_KEYS)
+        
+        # Recent idempotency key -> result mappings
+        self.idempotency_cache = IdempotencyCache(
+            max_entries=Config.IDEMPOTENCY_MAX_ENTRIES,
+            ttl_seconds=Config.IDEMPOTENCY_TTL_SECONDS
+        )
+        
+        # Graceful shutdown state: once draining, new work is refused while
+        # in-flight requests are given until the deadline to finish
+        self.draining = False
+        self.drain_started: Optional[float] = None
+        self.in_flight_requests = 0
+        self._idle: Optional[asyncio.Event] = None
+        
         # Setup routes
         self.setup_routes()
     
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        """Load the previous snapshot on startup; drain and snapshot on shutdown"""
+        self.restore_state()
+        if self.push_notifier:
+            await self.push_notifier.start()
+        await self.remote_agents.start()
+        if self.cluster:
+            await self.cluster.start()
+            self._cluster_watch = asyncio.create_task(
+                self.cluster.watch(self.rebalance, Config.CLUSTER_REFRESH_SECONDS)
+            )
+        yield
+        self.start_draining()
+        remaining = Config.SHUTDOWN_DRAIN_SECONDS - (time.monotonic() - self.drain_started)
+        await self.wait_until_idle(max(0.0, remaining))
+        self.save_state()
+        if self.push_notifier:
+            # Undelivered notifications stay queued on disk for the next start
+            await self.push_notifier.stop()
+        if self.cluster:
+            self._cluster_watch.cancel()
+            await self.cluster.stop()
+        await self.remote_agents.stop()
+    
+    def start_draining(self):
+        """Stop accepting new work"""
+        if not self.draining:
+            self.draining = True
+            self.drain_started = time.monotonic()
+            # Subscriptions are open-ended, so end them rather than wait for them
+            self.event_bus.close_all()
+            logger.info(f"Draining: waiting for {self.in_flight_requests} in-flight request(s)")
+    
+    @contextmanager
+    def track_in_flight(self):
+        """Count a request as in flight so shutdown can wait for it"""
+        if self._idle is None:
+            self._idle = asyncio.Event()
+        self.in_flight_requests += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight_requests -= 1
+            if self.in_flight_requests == 0:
+                self._idle.set()
+    
+    async def wait_until_idle(self, timeout: float):
+        """Wait up to timeout seconds for in-flight requests to finish"""
+        if self.in_flight_requests == 0:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Drain deadline reached with {self.in_flight_requests} request(s) still in flight")
+    
+    def save_state(self):
+        """Write tasks and MGX projects to the snapshot file"""
+        if not Config.STATE_SNAPSHOT_PATH:
+            return
+        try:
+            save_snapshot(Config.STATE_SNAPSHOT_PATH, {
+                "tasks": self.tasks,
+                "mgx": self.mgx_team.export_state()
+            })
+        except Exception as e:
+            logger.error(f"Error writing state snapshot: {e}")
+    
+    def restore_state(self):
+        """Load tasks and MGX projects saved by the previous process"""
+        state = load_snapshot(Config.STATE_SNAPSHOT_PATH)
+        if not state:
+            return
+        
+        self.tasks.update(state.get("tasks", {}))
+        for task_id, task in self.tasks.items():
+            if task.get("context_id") and task.get("status") not in ENDED_TASK_STATUSES:
+                self.context_tasks[task["context_id"]] = task_id
+        self.mgx_team.import_state(state.get("mgx", {}))
+        
+        logger.info(f"Restored {len(self.tasks)} task(s) and {len(self.mgx_team.active_projects)} project(s)")
+    
     def setup_routes(self):
         """Setup all API routes"""
         
@@ -89,61 +280,507 @@ class A2AServer:
             return self.agent_card_generator.get_service_info()
         
         @self.app.get("/agent-card")
-        async def get_agent_card():
+        async def get_agent_card(if_none_match: Optional[str] = Header(None)):
             """Return the Agent Card"""
-            return self.agent_card_generator.generate_agent_card()
+            card = self.agent_card_generator.generate_agent_card()
+            return cacheable_response(card, card_etag(card), if_none_match)
         
         @self.app.get("/health")
         async def health_check():
             """Health check endpoint"""
-            return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+            return {
+                "status": "draining" if self.draining else "healthy",
+                "timestamp": datetime.now().isoformat(),
+                "circuits": breaker_states()
+            }
         
         @self.app.post("/a2a")
-        async def a2a_endpoint(request_data: A2ARequest):
-            """Main A2A JSON-RPC endpoint"""
+        async def a2a_endpoint(request_data: Union[A2ARequest, List[A2ARequest]], request: Request):
+            """Main A2A JSON-RPC endpoint (a single request or a JSON-RPC batch)"""
+            if self.draining:
+                # 503 tells load balancers to send new work to another node
+                response = A2AResponse(
+                    error={"code": -32000, "message": "Server is shutting down"},
+                    id=None if isinstance(request_data, list) else request_data.id
+                )
+                return JSONResponse(response.model_dump(), status_code=503)
+            tenant = self._authenticate(request)
+            if isinstance(request_data, list):
+                return await self.handle_batch([self._as_tenant(call, tenant) for call in request_data], request)
+            
+            request_data = self._as_tenant(request_data, tenant)
+            request_data, pinned = self._pin_context_task(request_data)
+            params = request_data.params or {}
+            owner = self._remote_owner(self._routing_key(request_data.method, params), request, reroute=pinned)
+            if owner:
+                response = await self.forward_to_owner(
+                    owner, "POST", "/a2a", request_data.id,
+                    payload=request_data.model_dump(exclude_none=True)
+                )
+                if pinned:
+                    self._remember_context_task(params["context_id"], response)
+                return response
+            
+            if request_data.method == "task/subscribe":
+                try:
+                    return self.subscribe_response(params, request_data.id)
+                except HTTPException as e:
+                    return A2AResponse(
+                        error={"code": -32603, "message": "Internal error", "data": e.detail},
+                        id=request_data.id
+                    )
+            if params.get("stream") and request_data.method in STREAMING_METHODS:
+                return StreamingResponse(
+                    self.stream_a2a_request(request_data),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+                )
+            
+            response = await self.answer(request_data)
+            if request_data.method in CACHEABLE_METHODS and response.error is None:
+                return cacheable_response(response.model_dump(), etag_for(response.result),
+                                          request.headers.get("If-None-Match"))
+            return response
+        
+        @self.app.get("/events")
+        async def events_endpoint(request: Request, task_id: Optional[str] = None,
+                                  project_id: Optional[str] = None,
+                                  last_event_id: Optional[str] = Header(None)):
+            """Server-Sent Events feed for a task or project (EventSource-friendly)"""
+            if self.draining:
+                raise HTTPException(status_code=503, detail="Server is shutting down")
+            owner = self._remote_owner(task_id or project_id, request)
+            if owner:
+                query = {k: v for k, v in (("task_id", task_id), ("project_id", project_id)) if v}
+                headers = {"Last-Event-ID": last_event_id} if last_event_id else None
+                return await self.forward_to_owner(owner, "GET", "/events", params=query, headers=headers)
+            return self.subscribe_response({
+                "task_id": task_id,
+                "project_id": project_id,
+                "last_event_id": last_event_id
+            })
+        
+        @self.app.post("/cluster/handoff")
+        async def cluster_handoff(state: Dict[str, Any], request: Request):
+            """Accept tasks and projects handed over by a peer after a membership change"""
+            if not self.cluster or not self.cluster.check_token(request.headers):
+                raise HTTPException(status_code=403, detail="Not a cluster peer")
+            return self.import_handoff(state)
+        
+        @self.app.post("/skills/execute")
+        async def execute_skill_direct(params: SkillExecuteParams, request: Request):
+            """Direct skill execution endpoint (non-A2A)"""
+            tenant = self._authenticate(request)
+            if self.draining:
+                return {"success": False, "error": "Server is shutting down"}
+            
+            with self.track_in_flight():
+                try:
+                    result = await self.skills.execute_skill(params.skill_name, params.parameters, tenant=tenant)
+                    return result
+                except Exception as e:
+                    return {"success": False, "error": str(e)}
+        
+        @self.app.get("/skills")
+        async def list_skills():
+            """List available skills"""
+            return {"skills": self.skills.get_available_skills()}
+    
+    def _authenticate(self, request: Request) -> Optional[str]:
+        """
+        Tenant of the caller's API key, or None when API keys are not configured
+        
+        Calls forwarded by a cluster peer were authenticated there and already
+        carry the tenant (see _as_tenant).
+        """
+        if not self.api_keys:
+            return None
+        if self.cluster and request.headers.get(FORWARDED_HEADER) and self.cluster.check_token(request.headers):
+            return None
+        scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer":
+            for known_key, tenant in self.api_keys.items():
+                if hmac.compare_digest(key.strip().encode("utf-8"), known_key.encode("utf-8")):
+                    return tenant
+        raise HTTPException(status_code=401, detail="Invalid or missing API key",
+                            headers={"WWW-Authenticate": "Bearer"})
+    
+    @staticmethod
+    def _as_tenant(request_data: A2ARequest, tenant: Optional[str]) -> A2ARequest:
+        """The call with user_id set to the authenticated tenant, so budgets and idempotency use it"""
+        if not tenant:
+            return request_data
+        return request_data.model_copy(update={"params": dict(request_data.params or {}, user_id=tenant)})
+    
+    def _new_id(self) -> str:
+        """Id for a new task or project; in cluster mode, one this node owns"""
+        return self.cluster.new_local_id() if self.cluster else str(uuid.uuid4())
+    
+    def _routing_key(self, method: str, params: Dict[str, Any]) -> Optional[str]:
+        """Id whose owner node must handle this call, or None if any node can"""
+        if method.startswith("agent/remote/"):
+            # Every node has the remote agent registry; ids in these calls belong to the remote agent
+            return None
+        if method.startswith("mgx/") and params.get("project_id"):
+            return params["project_id"]
+        if params.get("task_id"):
+            return params["task_id"]
+        if params.get("project_id"):
+            return params["project_id"]
+        if method == "task/send" and params.get("context_id"):
+            return params["context_id"]
+        # Creates carry no id yet. Routing them by key sends every retry to the
+        # same node's idempotency cache, at the cost of a hop on most keyed creates
+        if (Config.CLUSTER_ROUTE_IDEMPOTENCY_KEYS and params.get("idempotency_key")
+                and method in IDEMPOTENT_METHODS):
+            return str(params["idempotency_key"])
+        return None
+    
+    def _remote_owner(self, key: Optional[str], request: Request, reroute: bool = False) -> Optional[str]:
+        """
+        Peer that owns key, or None when this node should handle the request itself
+        
+        A request already routed by a peer is never bounced again, unless
+        reroute is set because this node pinned it to a task (see _pin_context_task).
+        """
+        if not self.cluster or not key:
+            return None
+        if request.headers.get(FORWARDED_HEADER):
+            if not self.cluster.check_token(request.headers):
+                raise HTTPException(status_code=403, detail="Not a cluster peer")
+            if not reroute:
+                return None
+        owner = self.cluster.owner(key)
+        return None if owner == self.cluster.node_id else owner
+    
+    def _pin_context_task(self, request_data: A2ARequest) -> Tuple[A2ARequest, bool]:
+        """
+        Pin a task/send to the task its context maps to here, if that task lives on a peer
+        
+        A context's mapping is kept by the node owning the context_id, and its
+        task by the node owning the task_id; after a membership change these
+        can differ. The pinned call (task_id set) routes to the task's owner.
+        Returns the call and whether it was pinned.
+        """
+        params = request_data.params or {}
+        context_id = params.get("context_id")
+        if not self.cluster or request_data.method != "task/send" or not context_id or params.get("task_id"):
+            return request_data, False
+        task_id = self.context_tasks.get(context_id)
+        if not task_id or task_id in self.tasks:
+            return request_data, False
+        return request_data.model_copy(update={"params": dict(params, task_id=task_id)}), True
+    
+    def _remember_context_task(self, context_id: str, response: Any):
+        """After a pinned task/send, map the context to the task that answered it (a new one if the old ended)"""
+        if isinstance(response, JSONResponse):
+            body = json.loads(response.body)
+            result = body.get("result") if isinstance(body, dict) else None
+        elif isinstance(response, A2AResponse):
+            result = response.result
+        else:
+            # Streamed; the mapping is corrected on the next call
+            return
+        if isinstance(result, dict) and result.get("task_id"):
+            self.context_tasks[context_id] = result["task_id"]
+    
+    async def forward_to_owner(self, owner: str, method: str, path: str, request_id: Optional[str] = None,
+                               payload: Any = None, params: Optional[Dict[str, str]] = None,
+                               headers: Optional[Dict[str, str]] = None):
+        """Relay a request to the owning node, streaming its response back if it streams"""
+        try:
+            response = await self.cluster.forward(owner, method, path, payload=payload, params=params,
+                                                  headers=headers)
+        except Exception as e:
+            logger.error(f"Error forwarding to cluster node {owner}: {e}")
+            return A2AResponse(
+                error={"code": -32000, "message": "Owner node unavailable", "data": owner},
+                id=request_id
+            )
+        
+        if response.content_type == "text/event-stream":
+            async def relay():
+                try:
+                    async for chunk in response.content.iter_any():
+                        yield chunk
+                finally:
+                    response.release()
+            return StreamingResponse(relay(), status_code=response.status, media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        
+        try:
+            return JSONResponse(await response.json(content_type=None), status_code=response.status)
+        except (ValueError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Unreadable reply from cluster node {owner}: {e}")
+            return A2AResponse(
+                error={"code": -32000, "message": "Owner node unavailable", "data": owner},
+                id=request_id
+            )
+        finally:
+            response.release()
+    
+    async def rebalance(self):
+        """Hand tasks, projects and context mappings this node no longer owns to their new owners"""
+        moves: Dict[str, Dict[str, Any]] = {}
+        
+        def move(owner: str) -> Dict[str, Any]:
+            return moves.setdefault(owner, {"tasks": [], "projects": [], "contexts": {}})
+        
+        for task_id in list(self.tasks):
+            owner = self.cluster.owner(task_id)
+            if owner != self.cluster.node_id:
+                move(owner)["tasks"].append(task_id)
+        for project_id in list(self.mgx_team.active_projects):
+            owner = self.cluster.owner(project_id)
+            if owner != self.cluster.node_id:
+                move(owner)["projects"].append(project_id)
+        # task/send routes by context_id, so a mapping follows its context, not its task
+        for context_id, task_id in list(self.context_tasks.items()):
+            owner = self.cluster.owner(context_id)
+            if owner != self.cluster.node_id:
+                move(owner)["contexts"][context_id] = task_id
+        
+        for owner, ids in moves.items():
+            topics = [task_topic(t) for t in ids["tasks"]] + [project_topic(p) for p in ids["projects"]]
+            await self.cluster.forward_json(owner, "/cluster/handoff", {
+                "tasks": {task_id: self.tasks[task_id] for task_id in ids["tasks"]},
+                "mgx": self.mgx_team.export_state(ids["projects"]),
+                "contexts": ids["contexts"],
+                "push_registrations": [
+                    registration for topic in topics
+                    for registration in (self.push_notifier.registrations.get(topic, []) if self.push_notifier else [])
+                ]
+            })
+            
+            # The new owner has them now
+            for task_id in ids["tasks"]:
+                del self.tasks[task_id]
+            for context_id in ids["contexts"]:
+                del self.context_tasks[context_id]
+            for project_id in ids["projects"]:
+                self.mgx_team.remove_project(project_id)
+            if self.push_notifier:
+                for topic in topics:
+                    self.push_notifier.unregister(topic)
+            logger.info(f"Handed {len(ids['tasks'])} task(s), {len(ids['projects'])} project(s) "
+                        f"and {len(ids['contexts'])} context(s) to {owner}")
+    
+    def import_handoff(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Adopt tasks, projects, context mappings and webhooks sent by rebalance() on a peer"""
+        tasks = state.get("tasks", {})
+        self.tasks.update(tasks)
+        self.context_tasks.update(state.get("contexts", {}))
+        self.mgx_team.import_state(state.get("mgx", {}))
+        if self.push_notifier:
+            for registration in state.get("push_registrations", []):
+                self.push_notifier.register(registration["topic"], registration["url"],
+                                            registration.get("token"), registration.get("events"))
+        
+        projects = len(state.get("mgx", {}).get("projects", {}))
+        logger.info(f"Received {len(tasks)} task(s) and {projects} project(s) from a peer")
+        return {"tasks": len(tasks), "projects": projects}
+    
+    async def answer(self, request_data: A2ARequest) -> A2AResponse:
+        """Run one JSON-RPC call here and wrap its result or error in a response"""
+        with self.track_in_flight():
             try:
                 result = await self.handle_a2a_request(request_data)
                 return A2AResponse(result=result, id=request_data.id)
+            except IdempotencyKeyReused as e:
+                return A2AResponse(
+                    error={"code": -32602, "message": "Invalid params", "data": str(e)},
+                    id=request_data.id
+                )
             except Exception as e:
                 logger.error(f"Error handling A2A request: {str(e)}")
                 return A2AResponse(
                     error={"code": -32603, "message": "Internal error", "data": str(e)},
                     id=request_data.id
                 )
+    
+    async def handle_batch(self, batch: List[A2ARequest], request: Request):
+        """Answer a JSON-RPC batch; its calls run concurrently and answer in order"""
+        if not batch or len(batch) > Config.MAX_BATCH_SIZE:
+            return A2AResponse(error={
+                "code": -32600, "message": "Invalid Request",
+                "data": f"A batch must hold between 1 and {Config.MAX_BATCH_SIZE} calls"
+            })
+        return await asyncio.gather(*(self._answer_batch_call(call, request) for call in batch))
+    
+    async def _answer_batch_call(self, request_data: A2ARequest, request: Request) -> A2AResponse:
+        params = request_data.params or {}
+        if self.draining:
+            return A2AResponse(error={"code": -32000, "message": "Server is shutting down"}, id=request_data.id)
+        if request_data.method == "task/subscribe" or params.get("stream"):
+            return A2AResponse(
+                error={"code": -32600, "message": "Invalid Request", "data": "Streaming calls cannot be batched"},
+                id=request_data.id
+            )
         
-        @self.app.post("/skills/execute")
-        async def execute_skill_direct(params: SkillExecuteParams):
-            """Direct skill execution endpoint (non-A2A)"""
-            try:
-                result = await self.skills.execute_skill(params.skill_name, params.parameters)
-                return result
-            except Exception as e:
-                return {"success": False, "error": str(e)}
-        
-        @self.app.get("/skills")
-        async def list_skills():
-            """List available skills"""
-            return {"skills": self.skills.get_available_skills()}
+        # One bad call must not fail the whole batch, so HTTP errors become per-call errors
+        request_data, pinned = self._pin_context_task(request_data)
+        params = request_data.params or {}
+        try:
+            owner = self._remote_owner(self._routing_key(request_data.method, params), request, reroute=pinned)
+        except HTTPException as e:
+            return A2AResponse(error={"code": -32603, "message": "Internal error", "data": e.detail},
+                               id=request_data.id)
+        if owner:
+            response = await self.forward_to_owner(owner, "POST", "/a2a", request_data.id,
+                                                   payload=request_data.model_dump(exclude_none=True))
+            if pinned:
+                self._remember_context_task(params["context_id"], response)
+            if isinstance(response, A2AResponse):
+                return response
+            body = json.loads(response.body) if isinstance(response, JSONResponse) else None
+            if isinstance(body, dict) and ("result" in body or "error" in body):
+                return A2AResponse(**body)
+            # The peer answered with something other than a JSON-RPC response, e.g. {"detail": ...}
+            detail = body.get("detail", body) if isinstance(body, dict) else "Unexpected reply from owner node"
+            return A2AResponse(error={"code": -32603, "message": "Internal error", "data": detail},
+                               id=request_data.id)
+        return await self.answer(request_data)
     
     async def handle_a2a_request(self, request: A2ARequest) -> Dict[str, Any]:
         """Handle A2A JSON-RPC requests"""
         method = request.method
         params = request.params or {}
         
+        idempotency_key = params.get("idempotency_key")
+        if idempotency_key and method in IDEMPOTENT_METHODS:
+            return await self.idempotency_cache.run(
+                method, str(idempotency_key), lambda: self.dispatch_method(method, params),
+                fingerprint=params_fingerprint(params), scope=self._skill_tenant(params)
+            )
+        
+        return await self.dispatch_method(method, params)
+    
+    async def stream_a2a_request(self, request: A2ARequest) -> AsyncIterator[str]:
+        """
+        Serve a streaming JSON-RPC call as Server-Sent Events
+        
+        Each "delta" event carries a chunk of output as it is generated; the
+        final "result" (or "error") event carries the same JSON-RPC response a
+        non-streamed call would have returned.
+        """
+        with self.track_in_flight():
+            try:
+                async for event, data in self.stream_method(request.method, request.params or {}):
+                    response = A2AResponse(result=data, id=request.id)
+                    yield format_sse(event, response.model_dump_json(exclude_none=True))
+            except Exception as e:
+                logger.error(f"Error streaming A2A request: {str(e)}")
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                response = A2AResponse(error={"code": -32603, "message": "Internal error", "data": detail},
+                                       id=request.id)
+                yield format_sse("error", response.model_dump_json(exclude_none=True))
+    
+    def subscribe_response(self, params: Dict[str, Any], request_id: Optional[str] = None):
+        """
+        Open a task/subscribe event stream
+        
+        params name a task_id and/or project_id; last_event_id resumes after
+        the last event the client received.
+        """
+        topics = []
+        if params.get("task_id"):
+            if params["task_id"] not in self.tasks:
+                raise HTTPException(status_code=404, detail="Task not found")
+            topics.append(task_topic(params["task_id"]))
+        if params.get("project_id"):
+            if params["project_id"] not in self.mgx_team.active_projects:
+                raise HTTPException(status_code=404, detail="Project not found")
+            topics.append(project_topic(params["project_id"]))
+        if not topics:
+            raise HTTPException(status_code=400, detail="task_id or project_id is required")
+        
+        subscription = self.event_bus.subscribe(topics, params.get("last_event_id"))
+        return StreamingResponse(
+            self.stream_events(subscription, request_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    async def stream_events(self, subscription, request_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Relay a subscription as Server-Sent Events, with keepalive comments while idle"""
+        try:
+            if subscription.history_gap:
+                response = A2AResponse(result={"type": "history_gap"}, id=request_id)
+                yield format_sse("history_gap", response.model_dump_json(exclude_none=True))
+            while True:
+                try:
+                    event = await subscription.get(timeout=Config.EVENT_HEARTBEAT_SECONDS)
+                except SubscriptionClosed as closed:
+                    # "lagged": the client fell too far behind and should reconnect
+                    # with Last-Event-ID; "shutdown": the server is draining
+                    response = A2AResponse(result={"type": "closed", "reason": closed.reason}, id=request_id)
+                    yield format_sse("closed", response.model_dump_json(exclude_none=True))
+                    return
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                response = A2AResponse(result=event.to_dict(), id=request_id)
+                yield format_sse(event.type, response.model_dump_json(exclude_none=True), event.id)
+        finally:
+            self.event_bus.unsubscribe(subscription)
+    
+    async def stream_method(self, method: str, params: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (event, data) pairs for a streaming method: "delta" chunks, then one "result" event"""
+        if method == "skill/execute":
+            stream = self.skills.stream_skill(params.get("skill_name"), params.get("parameters", {}),
+                                              tenant=self._skill_tenant(params))
+            async for delta in stream:
+                yield "delta", {"delta": delta}
+            yield "result", stream.result
+            return
+        
+        if method == "task/send":
+            task = self._task_for_send(params)
+        else:
+            task = self.tasks.get(params.get("task_id"))
+            if task is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+        
+        async for event, data in self._stream_message(task, params.get("message", {})):
+            if event == "result" and method == "task/send":
+                data["context_id"] = task["context_id"]
+                data["created_at"] = task["created_at"]
+            yield event, data
+    
+    async def dispatch_method(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a JSON-RPC method to its handler"""
         if method == "task/create":
             return await self.create_task(params)
         elif method == "task/message":
             return await self.send_message(params)
+        elif method == "task/send":
+            return await self.send_task(params)
         elif method == "task/artifacts":
             return await self.get_artifacts(params)
         elif method == "task/cancel":
             return await self.cancel_task(params)
+        elif method == "task/push_notification/set":
+            return await self.set_push_notification(params)
+        elif method == "task/push_notification/get":
+            return await self.get_push_notifications(params)
+        elif method == "task/push_notification/delete":
+            return await self.delete_push_notification(params)
         elif method == "agent/capabilities":
             return await self.get_capabilities()
         elif method == "agent/skills":
             return await self.get_skills()
         elif method == "skill/execute":
             return await self.execute_skill(params)
+        elif method == "agent/remote/register":
+            return await self.register_remote_agent(params)
+        elif method == "agent/remote/unregister":
+            return await self.unregister_remote_agent(params)
+        elif method == "agent/remote/list":
+            return {"agents": self.remote_agents.list_agents()}
+        elif method == "agent/remote/delegate":
+            return await self.delegate_to_remote(params)
+        elif method == "agent/remote/fan_out":
+            return await self.fan_out_to_remote(params)
         elif method == "mgx/create_project":
             return await self.mgx_create_project(params)
         elif method == "mgx/team_discussion":
@@ -159,7 +796,17 @@ class A2AServer:
     
     async def create_task(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new task"""
-        task_id = str(uuid.uuid4())
+        task = self._new_task(params)
+        
+        return {
+            "task_id": task["id"],
+            "status": "created",
+            "created_at": task["created_at"]
+        }
+    
+    def _new_task(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create and register a task record"""
+        task_id = self._new_id()
         task = {
             "id": task_id,
             "status": "created",
@@ -172,13 +819,18 @@ class A2AServer:
         }
         
         self.tasks[task_id] = task
+        if task["context_id"]:
+            self.context_tasks[task["context_id"]] = task_id
         logger.info(f"Created task {task_id}")
         
-        return {
+        self.event_bus.publish(task_topic(task_id), "task.created", {
             "task_id": task_id,
-            "status": "created",
-            "created_at": task["created_at"]
-        }
+            "status": task["status"],
+            "user_id": task["user_id"],
+            "context_id": task["context_id"]
+        })
+        
+        return task
     
     async def send_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Send a message to a task"""
@@ -188,33 +840,131 @@ class A2AServer:
         if task_id not in self.tasks:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        task = self.tasks[task_id]
-        task["messages"].append({
-            "timestamp": datetime.now().isoformat(),
-            "role": "user",
-            "content": message
-        })
+        return await self._handle_message(self.tasks[task_id], message)
+    
+    async def send_task(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a task (or reuse the one for context_id) and process a message in one call"""
+        task = self._task_for_send(params)
+        
+        result = await self._handle_message(task, params.get("message", {}))
+        result["context_id"] = task["context_id"]
+        result["created_at"] = task["created_at"]
+        return result
+    
+    def _task_for_send(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The task continuing params["context_id"], or a new one
+        
+        params["task_id"] is set when the peer holding the context's mapping
+        pinned the call here; if that task has ended or is gone, a new one starts.
+        """
+        context_id = params.get("context_id")
+        task_id = params.get("task_id") or (self.context_tasks.get(context_id) if context_id else None)
+        task = self.tasks.get(task_id) if task_id else None
+        if task and task["status"] not in ENDED_TASK_STATUSES:
+            return task
+        if task_id and context_id and self.context_tasks.get(context_id) == task_id:
+            # The task is gone (e.g. handed to a peer); forget the stale mapping
+            del self.context_tasks[context_id]
+        return self._new_task(params)
+    
+    async def _handle_message(self, task: Dict[str, Any], message: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a user message to a task, process it and record the agent reply"""
+        self._append_user_message(task, message)
         
         # Process the message and generate response
         response = await self.process_message(task, message)
         
-        task["messages"].append({
+        return self._complete_message(task, response)
+    
+    async def _stream_message(self, task: Dict[str, Any],
+                              message: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Like _handle_message, but yield LLM output as "delta" events before the final "result" event"""
+        self._append_user_message(task, message)
+        
+        route = self._route_message(self._message_text(message))
+        if route and route[0] in STREAMING_SKILLS:
+            skill_name, skill_params = route
+            stream = self.skills.stream_skill(skill_name, skill_params, tenant=task.get("user_id"))
+            async for delta in stream:
+                yield "delta", {"task_id": task["id"], "delta": delta}
+            response = {
+                "role": "agent",
+                "parts": [self._skill_response_part(skill_name, skill_params, stream.result)]
+            }
+        else:
+            response = await self.process_message(task, message)
+        
+        yield "result", self._complete_message(task, response)
+    
+    def _append_user_message(self, task: Dict[str, Any], message: Dict[str, Any]):
+        self._append_message(task, "user", message)
+    
+    def _append_message(self, task: Dict[str, Any], role: str, content: Dict[str, Any]):
+        entry = {
             "timestamp": datetime.now().isoformat(),
-            "role": "agent",
-            "content": response
-        })
+            "role": role,
+            "content": content
+        }
+        task["messages"].append(entry)
+        self.event_bus.publish(task_topic(task["id"]), "task.message", dict(entry, task_id=task["id"]))
+    
+    def _set_status(self, task: Dict[str, Any], status: str):
+        """Change a task's status, announcing real transitions"""
+        if task["status"] != status:
+            task["status"] = status
+            if status in ENDED_TASK_STATUSES:
+                self._forget_context(task)
+            self.event_bus.publish(task_topic(task["id"]), "task.status", {
+                "task_id": task["id"],
+                "status": status
+            })
+    
+    def _forget_context(self, task: Dict[str, Any]):
+        """Stop task/send from continuing this task under its context_id"""
+        context_id = task.get("context_id")
+        if context_id and self.context_tasks.get(context_id) == task["id"]:
+            del self.context_tasks[context_id]
+    
+    def _complete_message(self, task: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the agent reply and mark the task completed"""
+        self._append_message(task, "agent", response)
         
-        task["status"] = "completed"
+        self._set_status(task, "completed")
         
         return {
-            "task_id": task_id,
+            "task_id": task["id"],
             "response": response,
             "status": task["status"]
         }
     
     async def process_message(self, task: Dict[str, Any], message: Dict[str, Any]) -> Dict[str, Any]:
         """Process a user message and generate response"""
-        # Extract text content from message
+        text_content = self._message_text(message)
+        
+        # Simple intent detection and skill routing
+        response_parts = []
+        
+        route = self._route_message(text_content)
+        if route:
+            skill_name, skill_params = route
+            skill_result = await self.skills.execute_skill(skill_name, skill_params, tenant=task.get("user_id"))
+            response_parts.append(self._skill_response_part(skill_name, skill_params, skill_result))
+        
+        else:
+            # Default response
+            response_parts.append({
+                "type": "text",
+                "content": f"Hello! I received your message: '{text_content}'. I can help with text generation, analysis, and web search. Try asking me to 'generate', 'analyze', or 'search' for something!"
+            })
+        
+        return {
+            "role": "agent",
+            "parts": response_parts
+        }
+    
+    def _message_text(self, message: Dict[str, Any]) -> str:
+        """Extract text content from message"""
         text_content = ""
         if "parts" in message:
             for part in message["parts"]:
@@ -222,80 +972,56 @@ class A2AServer:
                     text_content += part.get("content", "")
         else:
             text_content = message.get("content", "")
-        
-        # Simple intent detection and skill routing
-        response_parts = []
-        
+        return text_content
+    
+    def _route_message(self, text_content: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Skill name and parameters for a message, or None for the default reply"""
         if "generate" in text_content.lower() or "create" in text_content.lower():
             # Text generation request
-            skill_result = await self.skills.execute_skill("text_generation", {
+            return "text_generation", {
                 "prompt": text_content,
                 "max_tokens": 500
-            })
-            
-            if skill_result.get("success"):
-                response_parts.append({
-                    "type": "text",
-                    "content": skill_result["result"]["generated_text"]
-                })
-            else:
-                response_parts.append({
-                    "type": "text", 
-                    "content": f"Error: {skill_result.get('error', 'Unknown error')}"
-                })
+            }
         
         elif "analyze" in text_content.lower() or "summary" in text_content.lower():
             # Text analysis request
-            skill_result = await self.skills.execute_skill("text_analysis", {
+            return "text_analysis", {
                 "text": text_content,
                 "analysis_type": "summary"
-            })
-            
-            if skill_result.get("success"):
-                response_parts.append({
-                    "type": "text",
-                    "content": skill_result["result"]["analysis"]
-                })
-            else:
-                response_parts.append({
-                    "type": "text",
-                    "content": f"Error: {skill_result.get('error', 'Unknown error')}"
-                })
+            }
         
         elif "search" in text_content.lower():
             # Web search request
-            query = text_content.replace("search", "").strip()
-            skill_result = await self.skills.execute_skill("web_search", {
-                "query": query,
+            return "web_search", {
+                "query": text_content.replace("search", "").strip(),
                 "num_results": 3
-            })
-            
-            if skill_result.get("success"):
-                search_results = skill_result["result"]["results"]
-                result_text = f"Search results for '{query}':\n\n"
-                for i, result in enumerate(search_results, 1):
-                    result_text += f"{i}. {result['title']}\n   {result['snippet']}\n   {result['url']}\n\n"
-                
-                response_parts.append({
-                    "type": "text",
-                    "content": result_text
-                })
-            else:
-                response_parts.append({
-                    "type": "text",
-                    "content": f"Error: {skill_result.get('error', 'Unknown error')}"
-                })
+            }
         
-        else:
-            # Default response
-            response_parts.append({
+        return None
+    
+    def _skill_response_part(self, skill_name: str, skill_params: Dict[str, Any],
+                             skill_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a skill result as a text message part"""
+        if not skill_result.get("success"):
+            return {
                 "type": "text",
-                "content": f"Hello! I received your message: '{text_content}'. I can help with text generation, analysis, and web search. Try asking me to 'generate', 'analyze', or 'search' for something!"
-            })
+                "content": f"Error: {skill_result.get('error', 'Unknown error')}"
+            }
+        
+        if skill_name == "web_search":
+            query = skill_params["query"]
+            search_results = skill_result["result"]["results"]
+            result_text = f"Search results for '{query}':\n\n"
+            for i, result in enumerate(search_results, 1):
+                result_text += f"{i}. {result['title']}\n   {result['snippet']}\n   {result['url']}\n\n"
+            return {
+                "type": "text",
+                "content": result_text
+            }
         
         return {
-            "role": "agent",
-            "parts": response_parts
+            "type": "text",
+            "content": skill_result["result"][STREAMING_SKILLS[skill_name]]
         }
     
     async def get_artifacts(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -318,13 +1044,45 @@ class A2AServer:
         if task_id not in self.tasks:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        self.tasks[task_id]["status"] = "cancelled"
+        self._set_status(self.tasks[task_id], "cancelled")
         
         return {
             "task_id": task_id,
             "status": "cancelled"
         }
     
+    def _push_topic(self, params: Dict[str, Any]) -> str:
+        """Event topic for a push notification call on a task or MGX project"""
+        if not self.push_notifier:
+            raise ValueError("Push notifications are disabled")
+        if params.get("task_id"):
+            if params["task_id"] not in self.tasks:
+                raise HTTPException(status_code=404, detail="Task not found")
+            return task_topic(params["task_id"])
+        if params.get("project_id"):
+            if params["project_id"] not in self.mgx_team.active_projects:
+                raise HTTPException(status_code=404, detail="Project not found")
+            return project_topic(params["project_id"])
+        raise ValueError("task_id or project_id is required")
+    
+    async def set_push_notification(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Register a webhook that receives a task's or project's events in batches"""
+        topic = self._push_topic(params)
+        url = params.get("url", "")
+        await check_outbound_url(url, parse_hosts(Config.OUTBOUND_ALLOWED_HOSTS))
+        
+        registration = self.push_notifier.register(topic, url, params.get("token"), params.get("events"))
+        return {k: v for k, v in registration.items() if k != "token"}
+    
+    async def get_push_notifications(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """List webhooks registered for a task or project"""
+        return {"registrations": self.push_notifier.get_registrations(self._push_topic(params))}
+    
+    async def delete_push_notification(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Remove one webhook (registration_id) or all webhooks for a task or project"""
+        removed = self.push_notifier.unregister(self._push_topic(params), params.get("registration_id"))
+        return {"removed": removed}
+    
     async def get_capabilities(self) -> Dict[str, Any]:
         """Get agent capabilities"""
         agent_card = self.agent_card_generator.generate_agent_card()
@@ -341,9 +1099,104 @@ class A2AServer:
         skill_name = params.get("skill_name")
         skill_params = params.get("parameters", {})
         
-        result = await self.skills.execute_skill(skill_name, skill_params)
+        result = await self.skills.execute_skill(skill_name, skill_params, tenant=self._skill_tenant(params))
         return result
     
+    async def register_remote_agent(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a remote A2A agent; with verify, fetch its card now to check it is reachable"""
+        name, url = params.get("name"), params.get("url", "")
+        if not name:
+            raise ValueError("name and a http(s) url are required")
+        await check_outbound_url(url, self.remote_agents.allowed_hosts)
+        
+        info = self.remote_agents.register(name, url, params.get("api_key"))
+        await self._replicate_remote_agents("agent/remote/register", params)
+        if params.get("verify"):
+            await self.remote_agents.get_card(name, refresh=True)
+            info = self.remote_agents.agents[name].info()
+        return info
+    
+    async def unregister_remote_agent(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        removed = self.remote_agents.unregister(params.get("name", ""))
+        await self._replicate_remote_agents("agent/remote/unregister", params)
+        return {"removed": removed}
+    
+    async def _replicate_remote_agents(self, method: str, params: Dict[str, Any]):
+        """Apply a registry change on every peer too, so any node can delegate to the agent"""
+        if not self.cluster or params.get("replica"):
+            return
+        payload = {"jsonrpc": "2.0", "method": method, "id": str(uuid.uuid4()),
+                   "params": dict({k: v for k, v in params.items() if k != "verify"}, replica=True)}
+        peers = [node_id for node_id in self.cluster.members if node_id != self.cluster.node_id]
+        results = await asyncio.gather(*(self.cluster.forward_json(peer, "/a2a", payload) for peer in peers),
+                                       return_exceptions=True)
+        for peer, result in zip(peers, results):
+            if isinstance(result, Exception) or result.get("error"):
+                logger.warning(f"Could not apply {method} on cluster node {peer}: "
+                               f"{result if isinstance(result, Exception) else result['error']}")
+    
+    async def delegate_to_remote(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Hand a message (task/send) or a skill call (skill/execute) to a remote agent
+        
+        Without "agent", the first registered agent whose card lists
+        skill_name is used.
+        """
+        skill_name = params.get("skill_name")
+        agent = params.get("agent")
+        if not agent:
+            if not skill_name:
+                raise ValueError("agent or skill_name is required")
+            candidates = await self.remote_agents.find_agents(skill_name)
+            if not candidates:
+                raise ValueError(f"No remote agent offers skill: {skill_name}")
+            agent = candidates[0]
+        
+        timeout = params.get("timeout")
+        # The caller's key goes along, so a retried delegation is deduplicated remotely too
+        idempotency_key = params.get("idempotency_key")
+        if skill_name:
+            result = await self.remote_agents.delegate_skill(agent, skill_name, params.get("parameters", {}), timeout,
+                                                             idempotency_key=idempotency_key)
+        elif params.get("message"):
+            result = await self.remote_agents.delegate_task(
+                agent, params["message"], context_id=params.get("context_id"),
+                user_id=params.get("user_id"), timeout=timeout, idempotency_key=idempotency_key
+            )
+        else:
+            raise ValueError("message or skill_name is required")
+        return {"agent": agent, "result": result}
+    
+    async def fan_out_to_remote(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request to several remote agents (default: all) and gather every answer"""
+        method = params.get("method", "task/send")
+        if method.startswith("agent/remote/"):
+            # Agents fanning out to each other could recurse forever
+            raise ValueError("Remote agent methods cannot be fanned out")
+        
+        request_params = params.get("params")
+        if request_params is None and params.get("message"):
+            request_params = {"message": params["message"]}
+        if isinstance(request_params, dict) and isinstance(request_params.get("message"), str):
+            request_params = dict(request_params, message=text_message(request_params["message"]))
+        
+        agents = params.get("agents") or list(self.remote_agents.agents)
+        results = await self.remote_agents.fan_out(agents, method, request_params, params.get("timeout"))
+        return {
+            "results": results,
+            "succeeded": sum(1 for outcome in results.values() if "result" in outcome)
+        }
+    
+    def _skill_tenant(self, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Tenant a skill call is billed to: the caller's user_id, else the task owner
+        
+        With API keys configured, user_id is always the authenticated tenant
+        (see _as_tenant); without them it is whatever the caller sent.
+        """
+        task = self.tasks.get(params.get("task_id"), {})
+        return params.get("user_id") or task.get("user_id")
+    
     async def mgx_create_project(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """MGX-style project creation with team collaboration"""
         user_request = params.get("description", "")
@@ -353,11 +1206,11 @@ class A2AServer:
             raise ValueError("Project description is required")
         
         try:
-            project_id = await self.mgx_team.create_project(user_request, user_id)
+            project_id = await self.mgx_team.create_project(user_request, user_id, project_id=self._new_id())
         except Exception as e:
             logger.error(f"Error creating project: {e}")
             # Fallback to simple project creation
-            project_id = str(uuid.uuid4())
+            project_id = self._new_id()
         
         return {
             "project_id": project_id,
@@ -526,7 +1379,60 @@ export default {component_type.replace(' ', '')}Component;
         # Generate and save agent card
         self.agent_card_generator.save_agent_card("agent_card.json")
         
-        uvicorn.run(self.app, host=host, port=port, log_level="info")
+        if Config.HTTP2:
+            asyncio.run(self.serve_http2(host, port))
+            return
+        
+        config = uvicorn.Config(
+            self.app,
+            host=host,
+            port=port,
+            log_level="info",
+            timeout_graceful_shutdown=int(Config.SHUTDOWN_DRAIN_SECONDS)
+        )
+        DrainingServer(config, self).run()
+
+    async def serve_http2(self, host: str, port: int):
+        """Serve with hypercorn, which speaks HTTP/2 alongside HTTP/1.1 (uvicorn has no HTTP/2)"""
+        try:
+            from hypercorn.asyncio import serve
+            from hypercorn.config import Config as HypercornConfig
+        except ImportError:
+            raise RuntimeError("A2A_HTTP2=true needs hypercorn: pip install hypercorn")
+        
+        config = HypercornConfig()
+        config.bind = [f"{host}:{port}"]
+        config.graceful_timeout = Config.SHUTDOWN_DRAIN_SECONDS
+        if Config.TLS_CERTFILE:
+            # h2 is negotiated via ALPN; without TLS, clients use h2c
+            config.certfile = Config.TLS_CERTFILE
+            config.keyfile = Config.TLS_KEYFILE
+        
+        # Same shutdown as DrainingServer: refuse new work as soon as the signal arrives
+        shutdown = asyncio.Event()
+        def handle_exit():
+            self.start_draining()
+            shutdown.set()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, handle_exit)
+            except NotImplementedError:
+                # Windows: Ctrl+C still stops the server, just without draining first
+                pass
+        
+        await serve(self.app, config, shutdown_trigger=shutdown.wait)
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that puts the A2A server into draining mode as soon as a shutdown signal arrives"""
+    
+    def __init__(self, config: uvicorn.Config, a2a_server: A2AServer):
+        super().__init__(config)
+        self.a2a_server = a2a_server
+    
+    def handle_exit(self, sig, frame):
+        self.a2a_server.start_draining()
+        super().handle_exit(sig, frame)
 
 # Create server instance
 server = A2AServer()
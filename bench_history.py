@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Benchmark history store and regression comparison
+
+benchmark_overhead.py and load_generator.py can save each run (with --save)
+as a JSON file keyed by suite, machine fingerprint and git revision:
+
+    bench_history/<suite>/<fingerprint>/<revision>-<timestamp>.json
+
+Each file keeps the raw latency samples per benchmark. Runs of the same
+working tree (revision, plus a hash of uncommitted changes) form a group, and
+the compare command compares two groups: it bootstraps a confidence interval
+for the relative change of a statistic (median by default) by resampling
+runs and then samples within each run, so run-to-run drift (warmup, thermal
+state, background load) widens the interval instead of showing up as a
+regression. A verdict needs at least --min-runs runs per side (repeat with
+benchmark_overhead.py --repeat); a regression is flagged only when the
+whole interval lies above the threshold. The defaults (5 runs, 10%) gave
+about one false verdict in 60 when comparing identical trees of the
+overhead suite, whose run-to-run spread is around 20%. Runs from different machines are
+not comparable and are refused unless asked for.
+
+Examples:
+    python benchmark_overhead.py --repeat 5 --save
+    python bench_history.py list
+    python bench_history.py compare                      # latest two trees of "overhead" on this machine
+    python bench_history.py compare 1a2b3c4 HEAD --suite load --threshold 0.1
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_HISTORY_DIR = os.getenv("A2A_BENCH_HISTORY_DIR", str(Path(__file__).parent / "bench_history"))
+
+# Raw samples kept per benchmark; more adds file size, not precision
+MAX_STORED_SAMPLES = 5000
+
+# Samples per run used when bootstrapping, to keep compare fast
+MAX_BOOTSTRAP_SAMPLES = 500
+
+STATISTICS: Dict[str, Callable[[List[float]], float]] = {
+    "median": statistics.median,
+    "mean": statistics.fmean,
+    "p90": lambda samples: sorted(samples)[min(len(samples) - 1, int(0.9 * len(samples)))],
+}
+
+# Machine properties that decide whether runs are comparable. Host name and
+# kernel release are recorded but left out: they change with every ephemeral
+# CI host or kernel update without changing the numbers
+FINGERPRINT_KEYS = ("system", "machine", "processor", "cpu_count", "python")
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "node": platform.node(),
+    }
+
+
+def machine_fingerprint(info: Optional[Dict[str, Any]] = None) -> str:
+    """Short stable id for the hardware, OS and Python a run was measured on"""
+    info = info or machine_info()
+    canonical = json.dumps({key: info.get(key) for key in FINGERPRINT_KEYS}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], cwd=Path(__file__).parent, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def git_revision() -> Tuple[str, bool]:
+    """(commit hash, whether the working tree has uncommitted changes)"""
+    revision = _git("rev-parse", "HEAD") or "unknown"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    return revision, dirty
+
+
+def tree_label(revision: str, dirty: bool) -> str:
+    """Id of the working tree: the revision, plus a hash of the uncommitted changes"""
+    if not dirty:
+        return revision[:12]
+    diff = _git("diff", "HEAD") or ""
+    return f"{revision[:12]}+{hashlib.sha256(diff.encode('utf-8')).hexdigest()[:8]}"
+
+
+def save_run(suite: str, samples: Dict[str, List[float]], params: Optional[Dict[str, Any]] = None,
+             history_dir: str = DEFAULT_HISTORY_DIR) -> Path:
+    """Store one run's latency samples (ms) per benchmark; returns the file written"""
+    revision, dirty = git_revision()
+    info = machine_info()
+    fingerprint = machine_fingerprint(info)
+    rng = random.Random(0)
+    run = {
+        "suite": suite,
+        "revision": revision,
+        "dirty": dirty,
+        "tree": tree_label(revision, dirty),
+        "fingerprint": fingerprint,
+        "machine": info,
+        "timestamp": time.time(),
+        "params": params or {},
+        "benchmarks": {
+            name: [round(s, 4) for s in (rng.sample(values, MAX_STORED_SAMPLES)
+                                         if len(values) > MAX_STORED_SAMPLES else values)]
+            for name, values in samples.items() if values
+        },
+    }
+    directory = Path(history_dir) / suite / fingerprint
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{revision[:12]}{'-dirty' if dirty else ''}-{int(run['timestamp'] * 1000)}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f)
+    return path
+
+
+def load_runs(suite: str, history_dir: str = DEFAULT_HISTORY_DIR,
+              fingerprint: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Stored runs of a suite, oldest first (only this fingerprint's, if given)"""
+    runs = []
+    for path in (Path(history_dir) / suite).glob(f"{fingerprint or '*'}/*.json"):
+        with open(path, "r", encoding="utf-8") as f:
+            run = json.load(f)
+        run["path"] = str(path)
+        runs.append(run)
+    return sorted(runs, key=lambda run: run["timestamp"])
+
+
+def group_runs(runs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Runs by working tree, ordered by each tree's latest run"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for run in runs:
+        groups.setdefault(run.get("tree") or run["revision"][:12], []).append(run)
+    return dict(sorted(groups.items(), key=lambda item: item[1][-1]["timestamp"]))
+
+
+def find_group(runs: List[Dict[str, Any]], ref: str) -> List[Dict[str, Any]]:
+    """
+    Runs of the tree ref names: a commit-ish or hash prefix (its most recently
+    measured tree, if it was also measured with uncommitted changes), or the
+    path of a stored run (all runs of that run's tree)
+    """
+    groups = group_runs(runs)
+    if ref.endswith(".json") and Path(ref).exists():
+        with open(ref, "r", encoding="utf-8") as f:
+            run = json.load(f)
+        return groups.get(run.get("tree") or run["revision"][:12]) or [dict(run, path=ref)]
+    revision = _git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}") or ref
+    matches = [group for group in groups.values() if group[0]["revision"].startswith(revision)]
+    if not matches:
+        raise ValueError(f"No stored run for revision {ref}")
+    return matches[-1]
+
+
+def _thinned(samples: List[float], rng: random.Random) -> List[float]:
+    return rng.sample(samples, MAX_BOOTSTRAP_SAMPLES) if len(samples) > MAX_BOOTSTRAP_SAMPLES else samples
+
+
+def bootstrap_delta(baseline: List[List[float]], candidate: List[List[float]], statistic: str = "median",
+                    iterations: int = 2000, confidence: float = 0.95,
+                    seed: int = 0) -> Tuple[float, float, float]:
+    """
+    Relative change of a statistic from baseline to candidate runs, with a bootstrap CI
+
+    Each side is a list of runs, each run a list of samples. The statistic of
+    a side is the mean of its per-run statistics. Every bootstrap iteration
+    resamples the runs of each side, then the samples within each picked run
+    (a hierarchical bootstrap), so the interval covers both the noise within
+    a run and the spread between runs. Returns (delta, low, high) as
+    fractions (0.05 = 5% slower); the interval is the percentile interval of
+    the resampled deltas.
+    """
+    stat = STATISTICS[statistic]
+    rng = random.Random(seed)
+
+    def side_value(runs: List[List[float]]) -> float:
+        return statistics.fmean(stat(run) for run in runs)
+
+    def resampled(runs: List[List[float]]) -> float:
+        return statistics.fmean(stat(rng.choices(run, k=len(run))) for run in rng.choices(runs, k=len(runs)))
+
+    base_value = side_value(baseline)
+    delta = side_value(candidate) / base_value - 1 if base_value else 0.0
+    baseline = [_thinned(run, rng) for run in baseline]
+    candidate = [_thinned(run, rng) for run in candidate]
+    deltas = []
+    for _ in range(iterations):
+        base = resampled(baseline)
+        if base:
+            deltas.append(resampled(candidate) / base - 1)
+    deltas.sort()
+    tail = (1 - confidence) / 2
+    low = deltas[int(tail * (len(deltas) - 1))]
+    high = deltas[int((1 - tail) * (len(deltas) - 1))]
+    return delta, low, high
+
+
+def compare_runs(baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]], statistic: str = "median",
+                 threshold: float = 0.10, confidence: float = 0.95, iterations: int = 2000,
+                 min_runs: int = 5) -> List[Dict[str, Any]]:
+    """
+    Per-benchmark comparison of two groups of runs
+
+    A benchmark is a "regression" when the whole confidence interval is
+    above +threshold, an "improvement" when it is below -threshold, and
+    "unchanged" otherwise (a real change smaller than the threshold, or too
+    much noise to tell). With fewer than min_runs runs on either side the
+    spread between runs is unknown, so the verdict is "too few runs".
+    """
+    rows = []
+    stat = STATISTICS[statistic]
+    names = set.intersection(*(set(run["benchmarks"]) for run in baseline + candidate))
+    for name in sorted(names):
+        base = [run["benchmarks"][name] for run in baseline]
+        cand = [run["benchmarks"][name] for run in candidate]
+        delta, low, high = bootstrap_delta(base, cand, statistic, iterations, confidence)
+        if min(len(base), len(cand)) < min_runs:
+            verdict = "too few runs"
+        elif low > threshold:
+            verdict = "regression"
+        elif high < -threshold:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        rows.append({
+            "benchmark": name,
+            "baseline_ms": statistics.fmean(stat(run) for run in base),
+            "candidate_ms": statistics.fmean(stat(run) for run in cand),
+            "delta": delta,
+            "ci_low": low,
+            "ci_high": high,
+            "verdict": verdict,
+        })
+    return rows
+
+
+def describe(runs: List[Dict[str, Any]]) -> str:
+    """One line for a tree's runs: label, run count and when the latest was taken"""
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(runs[-1]["timestamp"]))
+    label = runs[-1].get("tree") or runs[-1]["revision"][:12]
+    return f"{label}{' (uncommitted changes)' if runs[-1]['dirty'] else ''}: {len(runs)} run(s), latest {when}"
+
+
+def print_comparison(rows: List[Dict[str, Any]], statistic: str, confidence: float):
+    print(f"{'benchmark':<28}{'base ' + statistic:>14}{'new ' + statistic:>14}{'delta':>9}"
+          f"{f'{confidence:.0%} CI':>20}  verdict")
+    for row in rows:
+        ci = f"[{row['ci_low']:+.1%}, {row['ci_high']:+.1%}]"
+        print(f"{row['benchmark']:<28}{row['baseline_ms']:>12.3f}ms{row['candidate_ms']:>12.3f}ms"
+              f"{row['delta']:>+9.1%}{ci:>20}  {row['verdict']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history and regression comparison")
+    parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR, help="Where runs are stored")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List stored runs")
+    list_parser.add_argument("--suite", help="Only this suite (e.g. overhead, load)")
+
+    compare_parser = commands.add_parser("compare", help="Compare the runs of two trees")
+    compare_parser.add_argument("baseline", nargs="?", help="Revision or run file (default: second-latest tree)")
+    compare_parser.add_argument("candidate", nargs="?", help="Revision or run file (default: latest tree)")
+    compare_parser.add_argument("--suite", default="overhead", help="Benchmark suite")
+    compare_parser.add_argument("--statistic", choices=sorted(STATISTICS), default="median")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative slowdown that counts as a regression (0.10 = 10%%)")
+    compare_parser.add_argument("--min-runs", type=int, default=5,
+                                help="Runs needed on each side for a verdict")
+    compare_parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the interval")
+    compare_parser.add_argument("--iterations", type=int, default=2000, help="Bootstrap resamples")
+    compare_parser.add_argument("--any-machine", action="store_true",
+                                help="Allow comparing runs from different machines")
+    compare_parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        suites = [args.suite] if args.suite else sorted(p.name for p in Path(args.history_dir).glob("*") if p.is_dir())
+        for suite in suites:
+            print(f"=== {suite} ===")
+            for runs in group_runs(load_runs(suite, args.history_dir)).values():
+                machines = ", ".join(sorted({run["fingerprint"] for run in runs}))
+                print(f"{describe(runs)}  machine {machines}")
+        return
+
+    # Default to runs from this machine; explicit refs may name any machine's runs
+    fingerprint = None if args.any_machine else machine_fingerprint()
+    runs = load_runs(args.suite, args.history_dir, fingerprint)
+    groups = list(group_runs(runs).values())
+    try:
+        if args.baseline:
+            baseline = find_group(runs, args.baseline)
+            candidate = find_group(runs, args.candidate) if args.candidate else groups[-1]
+        elif len(groups) >= 2:
+            baseline, candidate = groups[-2], groups[-1]
+        else:
+            raise ValueError(f"Need runs of two trees of {args.suite} on this machine, found {len(groups)}")
+    except (ValueError, IndexError) as e:
+        sys.exit(f"Error: {e or 'no stored runs'}")
+
+    if {run["path"] for run in baseline} == {run["path"] for run in candidate}:
+        sys.exit("Error: baseline and candidate are the same tree")
+    if len({run["fingerprint"] for run in baseline + candidate}) > 1 and not args.any_machine:
+        sys.exit("Error: runs are from different machines; use --any-machine to compare anyway")
+    params = {json.dumps(run.get("params"), sort_keys=True) for run in baseline + candidate}
+    if len(params) > 1:
+        print(f"Warning: runs used different parameters: {', '.join(sorted(params))}", file=sys.stderr)
+
+    rows = compare_runs(baseline, candidate, args.statistic, args.threshold, args.confidence, args.iterations,
+                        args.min_runs)
+    if not rows:
+        sys.exit("Error: the runs have no benchmarks with successful samples in common")
+    if args.json:
+        print(json.dumps({"baseline": [run["path"] for run in baseline],
+                          "candidate": [run["path"] for run in candidate], "rows": rows}, indent=2))
+    else:
+        print(f"baseline:  {describe(baseline)}\ncandidate: {describe(candidate)}\n")
+        print_comparison(rows, args.statistic, args.confidence)
+        if any(row["verdict"] == "too few runs" for row in rows):
+            print(f"\nA verdict needs at least {args.min_runs} runs of each tree "
+                  f"(e.g. benchmark_overhead.py --repeat {args.min_runs} --save)")
+
+    # Non-zero exit lets CI fail on a regression
+    if any(row["verdict"] == "regression" for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
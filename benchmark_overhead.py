@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of skill-layer and MGX team overhead
+
+Runs AgentSkills and MGXInspiredAgentTeam against the deterministic fake LLM
+provider, so the numbers measure our own code rather than provider latency.
+Provider latency defaults to zero; set FAKE_LLM_TTFT_MS etc. to model it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Force the fake provider before config is imported
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ.setdefault("FAKE_LLM_TTFT_MS", "0")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "0")
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import bench_history
+from skills import AgentSkills
+from mgx_inspired_agent_team import MGXInspiredAgentTeam
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Summary statistics for a list of latencies in milliseconds"""
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1],
+    }
+
+
+async def measure(iterations: int, op: Callable[[int], Awaitable[Any]]) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await op(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def collect_samples(iterations: int) -> Dict[str, List[float]]:
+    """Raw latencies in milliseconds per benchmark"""
+    skills = AgentSkills()
+    team = MGXInspiredAgentTeam()
+    project_id = await team.create_project("Benchmark project: a to-do app with authentication", "bench")
+
+    benchmarks: Dict[str, Callable[[int], Awaitable[Any]]] = {
+        "skill.text_generation": lambda i: skills.execute_skill(
+            "text_generation", {"prompt": f"Generate a short poem about AI #{i}", "max_tokens": 100}),
+        "skill.text_analysis": lambda i: skills.execute_skill(
+            "text_analysis", {"text": f"AI is transforming the world rapidly #{i}", "analysis_type": "summary"}),
+        "skill.web_search": lambda i: skills.execute_skill(
+            "web_search", {"query": f"machine learning {i}", "num_results": 3}),
+        "mgx.create_project": lambda i: team.create_project(f"Build a dashboard #{i}", "bench"),
+        "mgx.team_discussion": lambda i: team.team_discussion(project_id, f"Architecture question #{i}"),
+        "mgx.generate_artifact": lambda i: team.generate_code_artifact(project_id, f"React component {i}"),
+    }
+
+    samples = {}
+    for name, op in benchmarks.items():
+        samples[name] = await measure(iterations, op)
+    return samples
+
+
+async def run_benchmarks(iterations: int) -> Dict[str, Dict[str, float]]:
+    return {name: summarize(values) for name, values in (await collect_samples(iterations)).items()}
+
+
+def collect_in_subprocess(iterations: int) -> Dict[str, List[float]]:
+    """
+    Raw samples from one run in a fresh interpreter
+
+    Repeats in one process share its warmed-up state, so they understate how
+    much results vary between runs; separate processes show the real spread.
+    """
+    output = subprocess.run([sys.executable, __file__, "--iterations", str(iterations), "--raw-samples"],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skill and MGX overhead against the fake LLM provider")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per benchmark")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Run the suite this many times, each in a fresh process "
+                             "(bench_history.py compare needs several runs)")
+    parser.add_argument("--save", action="store_true", help="Store each run in the benchmark history")
+    parser.add_argument("--history-dir", default=bench_history.DEFAULT_HISTORY_DIR, help="Benchmark history directory")
+    parser.add_argument("--raw-samples", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.raw_samples:
+        print(json.dumps(asyncio.run(collect_samples(args.iterations))))
+        return
+
+    samples: Dict[str, List[float]] = {}
+    for _ in range(args.repeat):
+        if args.repeat > 1:
+            run_samples = collect_in_subprocess(args.iterations)
+        else:
+            run_samples = asyncio.run(collect_samples(args.iterations))
+        if args.save:
+            path = bench_history.save_run("overhead", run_samples, {"iterations": args.iterations}, args.history_dir)
+            print(f"Saved run to {path}", file=sys.stderr)
+        for name, values in run_samples.items():
+            samples.setdefault(name, []).extend(values)
+    results = {name: summarize(values) for name, values in samples.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'benchmark':<26}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, stats in results.items():
+        print(f"{name:<26}{stats['mean_ms']:>10.3f}{stats['p50_ms']:>10.3f}"
+              f"{stats['p90_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
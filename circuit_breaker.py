@@ -0,0 +1,183 @@
+"""
+Circuit breakers for LLM providers
+
+A breaker is closed while its backend is healthy. Once the failure rate over
+recent calls crosses a threshold it opens and calls fail immediately with
+CircuitOpenError, so callers go straight to their fallbacks instead of
+waiting out timeouts. After a cool-down it goes half-open and lets a limited
+number of trial calls through; enough successes close it again, and any
+failure reopens it.
+
+A streamed call (stream=True) is only judged once its stream ends: an error
+raised while the chunks are read counts against the backend just like one
+raised when the stream is opened.
+"""
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from config import Config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit for {name} is open; backend temporarily unavailable")
+        self.name = name
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """True for errors that indicate an unhealthy backend: timeouts, connection errors, 429 and 5xx"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # SDK timeout/connection errors carry no status code
+    return any(name in type(error).__name__ for name in ("Timeout", "Connection"))
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 10, window: int = 20,
+                 open_seconds: float = 30.0, half_open_calls: int = 2):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.outcomes: deque = deque(maxlen=window)  # True = success
+        self.opened_at = 0.0
+        self.trials_started = 0
+        self.trial_successes = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; in half-open state this claims a trial slot"""
+        with self._lock:
+            # opened_at doubles as the start of the half-open period, so trial
+            # slots lost to calls that never reported back are freed eventually
+            if self.state != CLOSED and time.monotonic() - self.opened_at >= self.open_seconds:
+                if self.state == OPEN or self.trials_started >= self.half_open_calls:
+                    self.state = HALF_OPEN
+                    self.opened_at = time.monotonic()
+                    self.trials_started = 0
+                    self.trial_successes = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.trials_started < self.half_open_calls:
+                self.trials_started += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.trial_successes += 1
+                if self.trial_successes >= self.half_open_calls:
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                return
+            self.outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self.outcomes.append(False)
+            failures = sum(1 for ok in self.outcomes if not ok)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+
+    def _record_error(self, error: Exception):
+        if is_backend_failure(error):
+            self.record_failure()
+        else:
+            # The backend answered; the request itself was bad
+            self.record_success()
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call func through the breaker, raising CircuitOpenError while it is open"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        if kwargs.get("stream"):
+            return self._watch_stream(result)
+        self.record_success()
+        return result
+
+    def _watch_stream(self, stream: Iterable[Any]) -> Iterator[Any]:
+        """Pass a stream through, recording the call's outcome when it ends"""
+        try:
+            yield from stream
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except GeneratorExit:
+            # The caller stopped reading; the backend was delivering fine
+            self.record_success()
+            raise
+        self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self.outcomes),
+                "recent_failures": sum(1 for ok in self.outcomes if not ok),
+            }
+
+
+class CircuitBreakerClient:
+    """Wraps an OpenAI-compatible client so its calls go through a circuit breaker"""
+
+    def __init__(self, client: Any, breaker: CircuitBreaker):
+        self._client = client
+        self.breaker = breaker
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **request) -> Any:
+        return self.breaker.call(self._client.chat.completions.create, **request)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a backend, created on first use from Config"""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_rate=Config.CIRCUIT_FAILURE_RATE,
+                min_calls=Config.CIRCUIT_MIN_CALLS,
+                window=Config.CIRCUIT_WINDOW,
+                open_seconds=Config.CIRCUIT_OPEN_SECONDS,
+                half_open_calls=Config.CIRCUIT_HALF_OPEN_CALLS
+            )
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every breaker, for health reporting"""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
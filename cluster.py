@@ -0,0 +1,216 @@
+"""
+Cluster mode: consistent-hash ownership of tasks and projects across nodes
+
+Every node knows the same membership list (static, or a file re-read when it
+changes). Task and project ids hash onto a ring of virtual nodes; the node
+owning an id keeps its state, and any other node that receives a request for
+it forwards the request there over a pooled HTTP session. New ids are minted
+so that they hash to the node creating them. When membership changes, only
+ids whose owner changed move, and each node hands those over to their new
+owner.
+
+Creates that carry an idempotency key are the one exception to handling a
+new id locally: they are routed to the node the key hashes to, so a retry
+arriving at any node reaches the same idempotency cache. That costs a hop on
+about (N-1)/N keyed creates; with a sticky load balancer, set
+A2A_CLUSTER_ROUTE_IDEMPOTENCY_KEYS=false to create them locally instead.
+
+Peers authenticate to each other with a shared secret
+(A2A_CLUSTER_SECRET), which cluster mode requires.
+"""
+import asyncio
+import bisect
+import hashlib
+import hmac
+import json
+import logging
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Header marking a request already routed by a peer, so it is never forwarded twice
+FORWARDED_HEADER = "X-A2A-Forwarded-By"
+CLUSTER_TOKEN_HEADER = "X-A2A-Cluster-Token"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes for an even spread"""
+
+    def __init__(self, nodes: List[str], vnodes: int = 128):
+        self.nodes = sorted(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+def parse_members(spec: str) -> Dict[str, str]:
+    """Parse "node_id=url,node_id=url" into {node_id: url}"""
+    members = {}
+    for item in spec.split(","):
+        node_id, _, url = item.strip().partition("=")
+        if node_id and url:
+            members[node_id.strip()] = url.strip().rstrip("/")
+    return members
+
+
+def load_members_file(path: str) -> Dict[str, str]:
+    """Read {"nodes": {node_id: url}} (or a bare {node_id: url}) from a JSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    nodes = data.get("nodes", data)
+    return {node_id: url.rstrip("/") for node_id, url in nodes.items()}
+
+
+class Cluster:
+    """This node's view of the cluster: membership, ring, and forwarding"""
+
+    def __init__(self, node_id: str, members: Dict[str, str], members_file: Optional[str] = None,
+                 vnodes: int = 128, secret: str = "", timeout: float = 120.0, max_connections: int = 100):
+        if not secret:
+            raise ValueError("Cluster mode requires a shared secret (A2A_CLUSTER_SECRET)")
+        self.node_id = node_id
+        self.members_file = members_file
+        self.vnodes = vnodes
+        self.secret = secret
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._members_mtime: Optional[float] = None
+        self.members: Dict[str, str] = {}
+        self.ring: Optional[HashRing] = None
+        # A membership file, when configured, takes precedence over the static list
+        self.set_members(self._read_members_file() or members or {node_id: ""})
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def set_members(self, members: Dict[str, str]) -> bool:
+        """Install a membership list; returns True if the ring changed"""
+        if self.node_id not in members:
+            logger.warning(f"Node {self.node_id} is not in the cluster membership list")
+        if members == self.members:
+            return False
+        self.members = dict(members)
+        self.ring = HashRing(list(members), self.vnodes)
+        logger.info(f"Cluster membership: {', '.join(sorted(members))}")
+        return True
+
+    def _read_members_file(self) -> Optional[Dict[str, str]]:
+        if not self.members_file:
+            return None
+        try:
+            mtime = os.path.getmtime(self.members_file)
+            if mtime == self._members_mtime:
+                return None
+            members = load_members_file(self.members_file)
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Could not read cluster membership file {self.members_file}: {e}")
+            return None
+        self._members_mtime = mtime
+        return members
+
+    def refresh_members(self) -> bool:
+        """Re-read the membership file if it changed; returns True if the ring changed"""
+        members = self._read_members_file()
+        return self.set_members(members) if members else False
+
+    def owner(self, key: str) -> str:
+        return self.ring.owner(key)
+
+    def is_local(self, key: str) -> bool:
+        return self.owner(key) == self.node_id
+
+    def new_local_id(self) -> str:
+        """A fresh uuid that this node owns (about N tries for N nodes)"""
+        while True:
+            candidate = str(uuid.uuid4())
+            if self.is_local(candidate):
+                return candidate
+
+    def check_token(self, headers: Any) -> bool:
+        """Whether a peer request carries the shared cluster secret"""
+        token = headers.get(CLUSTER_TOKEN_HEADER) or ""
+        return hmac.compare_digest(token.encode("utf-8"), self.secret.encode("utf-8"))
+
+    def _peer_headers(self) -> Dict[str, str]:
+        return {FORWARDED_HEADER: self.node_id, CLUSTER_TOKEN_HEADER: self.secret}
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def stop(self):
+        if self.session:
+            await self.session.close()
+
+    async def forward(self, node_id: str, method: str, path: str, payload: Any = None,
+                      params: Optional[Dict[str, str]] = None,
+                      headers: Optional[Dict[str, str]] = None) -> aiohttp.ClientResponse:
+        """
+        Send a request to a peer; the caller reads or streams the response, then releases it
+
+        The response may be an open-ended event stream, so instead of a total
+        timeout the peer must send something (data or a keepalive) at least
+        every timeout seconds.
+        """
+        return await self.session.request(
+            method, f"{self.members[node_id]}{path}", json=payload, params=params,
+            headers=dict(headers or {}, **self._peer_headers()),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        )
+
+    async def forward_json(self, node_id: str, path: str, payload: Any) -> Any:
+        """POST JSON to a peer and return its decoded JSON response"""
+        async with self.session.post(f"{self.members[node_id]}{path}", json=payload,
+                                     headers=self._peer_headers()) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def watch(self, rebalance: Callable[[], Awaitable[None]], interval: float):
+        """
+        Poll the membership file, calling rebalance() after every ring change
+
+        rebalance() also runs once at startup (state restored from a snapshot
+        may belong elsewhere) and is retried until it succeeds, since peers
+        may still be starting.
+        """
+        pending = True
+        while True:
+            try:
+                if self.refresh_members() or pending:
+                    pending = True
+                    await rebalance()
+                    pending = False
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cluster rebalance failed, will retry: {e}")
+            await asyncio.sleep(interval)
+
+
+def get_cluster() -> Optional[Cluster]:
+    """Cluster configured from Config, or None when running as a single node"""
+    if not Config.CLUSTER_NODE_ID or not (Config.CLUSTER_NODES or Config.CLUSTER_MEMBERS_FILE):
+        return None
+    return Cluster(
+        Config.CLUSTER_NODE_ID,
+        parse_members(Config.CLUSTER_NODES) if Config.CLUSTER_NODES else {},
+        members_file=Config.CLUSTER_MEMBERS_FILE or None,
+        vnodes=Config.CLUSTER_VNODES,
+        secret=Config.CLUSTER_SECRET,
+        timeout=Config.CLUSTER_FORWARD_TIMEOUT_SECONDS,
+        max_connections=Config.CLUSTER_MAX_CONNECTIONS
+    )
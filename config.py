@@ -23,16 +23,151 @@ class Config:
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
     NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
     
+    # Serve HTTP/2 with hypercorn instead of uvicorn: h2 over TLS when a
+    # certificate is given, otherwise cleartext h2c (and HTTP/1.1)
+    HTTP2 = os.getenv("A2A_HTTP2", "false").lower() == "true"
+    TLS_CERTFILE = os.getenv("A2A_TLS_CERTFILE", "")
+    TLS_KEYFILE = os.getenv("A2A_TLS_KEYFILE", "")
+    
+    # Caller API keys as "key=tenant,key=tenant". When set, /a2a and
+    # /skills/execute require "Authorization: Bearer <key>", and budgets and
+    # idempotency keys belong to the key's tenant rather than params.user_id
+    API_KEYS = os.getenv("A2A_API_KEYS", "")
+    
+    # Most calls accepted in one JSON-RPC batch request
+    MAX_BATCH_SIZE = int(os.getenv("A2A_MAX_BATCH_SIZE", "100"))
+    
+    # Idempotency keys for mutating A2A methods
+    IDEMPOTENCY_TTL_SECONDS = float(os.getenv("A2A_IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("A2A_IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    
+    # LLM tokens-per-minute budgets (0 = unlimited)
+    LLM_GLOBAL_TPM = int(os.getenv("LLM_GLOBAL_TPM", "0"))
+    LLM_TENANT_TPM = int(os.getenv("LLM_TENANT_TPM", "0"))
+    # Tenants whose budget state is kept; idle tenants beyond this are forgotten
+    LLM_MAX_TRACKED_TENANTS = int(os.getenv("LLM_MAX_TRACKED_TENANTS", "10000"))
+    
+    # Graceful shutdown: seconds to wait for in-flight requests, and where to
+    # write the task/project snapshot loaded on the next start (off unless set)
+    SHUTDOWN_DRAIN_SECONDS = float(os.getenv("A2A_SHUTDOWN_DRAIN_SECONDS", "30"))
+    STATE_SNAPSHOT_PATH = os.getenv("A2A_STATE_SNAPSHOT_PATH", "")
+    
+    # LLM provider: "openai" or "fake" (deterministic offline provider for benchmarking)
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+    
+    # Multi-provider routing: "auto" routes whenever a provider other than
+    # OpenAI is configured, "on" always routes, "off" uses OpenAI directly
+    LLM_ROUTER = os.getenv("LLM_ROUTER", "auto")
+    AI_SERVICE = os.getenv("AI_SERVICE", "openai")  # Preferred provider when backends are equally healthy
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    
+    # Hedged requests for slow MGX calls: duplicate a call still running at the
+    # given latency percentile, spending at most MAX_FRACTION extra calls and
+    # no more than MAX_PER_MINUTE hedges a minute
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+    LLM_HEDGE_MAX_FRACTION = float(os.getenv("LLM_HEDGE_MAX_FRACTION", "0.1"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_HEDGE_MAX_PER_MINUTE = int(os.getenv("LLM_HEDGE_MAX_PER_MINUTE", "60"))  # 0 = no cap
+    
+    # Circuit breakers for LLM providers and external skill backends
+    CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+    CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+    CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+    CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "2"))
+    
+    # Opt-in near-duplicate prompt cache for text_generation and text_analysis
+    PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "false").lower() == "true"
+    PROMPT_CACHE_THRESHOLD = float(os.getenv("PROMPT_CACHE_THRESHOLD", "0.9"))
+    PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "1000"))
+    PROMPT_CACHE_TTL_SECONDS = float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+    # Longer prompts bypass the cache; fingerprinting cost grows with prompt length
+    PROMPT_CACHE_MAX_CHARS = int(os.getenv("PROMPT_CACHE_MAX_CHARS", "8000"))
+    
+    # Cap on prompt tokens per LLM call, below the model's context window (0 = window only)
+    LLM_MAX_PROMPT_TOKENS = int(os.getenv("LLM_MAX_PROMPT_TOKENS", "0"))
+    
+    # Task event subscriptions: events kept for resume, per-subscriber queue
+    # bound (slower consumers are disconnected), and SSE keepalive interval
+    EVENT_HISTORY_SIZE = int(os.getenv("A2A_EVENT_HISTORY_SIZE", "1000"))
+    EVENT_QUEUE_SIZE = int(os.getenv("A2A_EVENT_QUEUE_SIZE", "100"))
+    EVENT_HEARTBEAT_SECONDS = float(os.getenv("A2A_EVENT_HEARTBEAT_SECONDS", "15"))
+    
+    # Webhook push notifications: durable queue file (off unless set), batching
+    # per endpoint, and retry with exponential backoff. Webhook tokens are only
+    # written to the queue encrypted with PUSH_TOKEN_KEY (a Fernet key, needs
+    # the cryptography package); without one they are kept in memory
+    PUSH_QUEUE_PATH = os.getenv("A2A_PUSH_QUEUE_PATH", "")
+    PUSH_TOKEN_KEY = os.getenv("A2A_PUSH_TOKEN_KEY", "")
+    PUSH_BATCH_SIZE = int(os.getenv("A2A_PUSH_BATCH_SIZE", "50"))
+    PUSH_BATCH_WINDOW_SECONDS = float(os.getenv("A2A_PUSH_BATCH_WINDOW_SECONDS", "0.5"))
+    PUSH_MAX_ATTEMPTS = int(os.getenv("A2A_PUSH_MAX_ATTEMPTS", "8"))
+    PUSH_BACKOFF_BASE_SECONDS = float(os.getenv("A2A_PUSH_BACKOFF_BASE_SECONDS", "1"))
+    PUSH_BACKOFF_MAX_SECONDS = float(os.getenv("A2A_PUSH_BACKOFF_MAX_SECONDS", "300"))
+    PUSH_TIMEOUT_SECONDS = float(os.getenv("A2A_PUSH_TIMEOUT_SECONDS", "10"))
+    PUSH_MAX_CONNECTIONS = int(os.getenv("A2A_PUSH_MAX_CONNECTIONS", "20"))
+    
+    # Webhook and remote agent URLs may not point at loopback, private or
+    # link-local addresses, except for these hosts ("hooks.internal,10.0.0.5")
+    OUTBOUND_ALLOWED_HOSTS = os.getenv("A2A_OUTBOUND_ALLOWED_HOSTS", "")
+    
+    # Cluster mode: this node's id plus the membership, either static
+    # ("node-a=http://10.0.0.1:8000,node-b=http://10.0.0.2:8000") or a JSON
+    # file of {"nodes": {id: url}} that is re-read when it changes
+    CLUSTER_NODE_ID = os.getenv("A2A_CLUSTER_NODE_ID", "")
+    CLUSTER_NODES = os.getenv("A2A_CLUSTER_NODES", "")
+    CLUSTER_MEMBERS_FILE = os.getenv("A2A_CLUSTER_MEMBERS_FILE", "")
+    CLUSTER_VNODES = int(os.getenv("A2A_CLUSTER_VNODES", "128"))
+    CLUSTER_REFRESH_SECONDS = float(os.getenv("A2A_CLUSTER_REFRESH_SECONDS", "5"))
+    CLUSTER_SECRET = os.getenv("A2A_CLUSTER_SECRET", "")  # required in cluster mode
+    CLUSTER_ROUTE_IDEMPOTENCY_KEYS = os.getenv("A2A_CLUSTER_ROUTE_IDEMPOTENCY_KEYS", "true").lower() == "true"
+    CLUSTER_FORWARD_TIMEOUT_SECONDS = float(os.getenv("A2A_CLUSTER_FORWARD_TIMEOUT_SECONDS", "300"))
+    CLUSTER_MAX_CONNECTIONS = int(os.getenv("A2A_CLUSTER_MAX_CONNECTIONS", "100"))
+    
+    # Remote A2A agents to delegate to ("name=http://host:8000,..."), how
+    # long their agent cards are cached, and the pooled session's limits
+    REMOTE_AGENTS = os.getenv("A2A_REMOTE_AGENTS", "")
+    REMOTE_AGENT_CARD_TTL_SECONDS = float(os.getenv("A2A_REMOTE_AGENT_CARD_TTL_SECONDS", "300"))
+    REMOTE_AGENT_TIMEOUT_SECONDS = float(os.getenv("A2A_REMOTE_AGENT_TIMEOUT_SECONDS", "60"))
+    REMOTE_AGENT_MAX_CONNECTIONS = int(os.getenv("A2A_REMOTE_AGENT_MAX_CONNECTIONS", "100"))
+    REMOTE_AGENT_MAX_CONNECTIONS_PER_HOST = int(os.getenv("A2A_REMOTE_AGENT_MAX_CONNECTIONS_PER_HOST", "20"))
+    
+    # Fake provider latency and output model (LLM_PROVIDER=fake)
+    FAKE_LLM_LATENCY_DISTRIBUTION = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal")
+    FAKE_LLM_TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", "200"))
+    FAKE_LLM_TTFT_STDDEV_MS = float(os.getenv("FAKE_LLM_TTFT_STDDEV_MS", "50"))
+    FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    FAKE_LLM_COMPLETION_TOKENS = int(os.getenv("FAKE_LLM_COMPLETION_TOKENS", "100"))
+    FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+    FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "42"))
+    
     # Agent Description
     AGENT_DESCRIPTION = "A versatile AI agent capable of text processing, web search, and multi-modal interactions"
     AGENT_VERSION = "1.0.0"
     
+    @classmethod
+    def llm_available(cls) -> bool:
+        """True if LLM-backed skills can run (real API key or the fake provider)"""
+        return bool(cls.llm_backends()) or cls.LLM_PROVIDER == "fake"
+    
+    @classmethod
+    def llm_backends(cls) -> list:
+        """LLM providers with an API key configured"""
+        backends = []
+        if cls.OPENAI_API_KEY:
+            backends.append("openai")
+        if cls.ANTHROPIC_API_KEY:
+            backends.append("anthropic")
+        return backends
+    
     @classmethod
     def validate_keys(cls):
         """Validate that required API keys are present"""
         missing_keys = []
         
-        if not cls.OPENAI_API_KEY:
+        if not cls.llm_available():
             missing_keys.append("OPENAI_API_KEY")
         
         if missing_keys:
@@ -42,6 +177,20 @@ class Config:
         return len(missing_keys) == 0
 
 def get_openai_client():
-    """Get OpenAI client instance"""
+    """Get OpenAI client instance (or the fake provider when LLM_PROVIDER=fake)"""
+    if Config.LLM_PROVIDER == "fake":
+        from fake_llm import FakeOpenAIClient
+        from circuit_breaker import CircuitBreakerClient, get_breaker
+        return CircuitBreakerClient(FakeOpenAIClient.from_config(), get_breaker("llm:fake"))
+    
+    backends = Config.llm_backends()
+    if Config.LLM_ROUTER != "off" and backends and (Config.LLM_ROUTER == "on" or backends != ["openai"]):
+        from llm_router import LLMRouter
+        return LLMRouter.from_config()
+    
     import openai
-    return openai.OpenAI(api_key=Config.OPENAI_API_KEY) 
\ No newline at end of file
+    from circuit_breaker import CircuitBreakerClient, get_breaker
+    # No SDK retries: the breaker must see each failure as it happens rather
+    # than after the SDK has spent its back-off retrying the same backend
+    client = openai.OpenAI(api_key=Config.OPENAI_API_KEY, timeout=Config.LLM_TIMEOUT_SECONDS, max_retries=0)
+    return CircuitBreakerClient(client, get_breaker("llm:openai")) 
\ No newline at end of file
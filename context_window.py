@@ -0,0 +1,204 @@
+"""
+Token-aware context window management for LLM calls
+
+count_tokens gives a fast local token count: exact via tiktoken when it is
+installed, otherwise a word/punctuation heuristic that tracks BPE tokenizers
+far more closely than a flat characters-per-token ratio. On top of it,
+prompt_budget works out how many prompt tokens a model can take, and the
+fitting helpers trim, prioritize or summarize content to stay inside it
+before a request is sent.
+"""
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # optional: the heuristic below is used instead
+    tiktoken = None
+
+# Context window sizes in tokens, matched by longest model-name prefix
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+    "claude-": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Per-message framing the chat format adds on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+# Headroom for estimation error
+SAFETY_MARGIN_TOKENS = 64
+
+OMISSION_MARKER = "\n[... {count} tokens omitted ...]\n"
+
+# Words, numbers and individual punctuation marks, roughly as BPE splits them
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]|\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding for model, or None if it cannot be loaded (cached either way)"""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails offline
+        logger.warning(f"tiktoken encoding for {model} unavailable, using heuristic token counts: {e}")
+        return None
+
+
+def _heuristic_tokens(text: str) -> int:
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece.isspace():
+            # Single spaces merge into the next word; runs of whitespace do not
+            tokens += 0 if len(piece) == 1 else len(piece) // 4 + 1
+        elif piece.isalpha():
+            # Common words are one token; long ones split about every 4 characters
+            tokens += 1 if len(piece) <= 6 else (len(piece) + 3) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Local token count for text sent to model"""
+    if not text:
+        return 0
+    if tiktoken is not None and not model.startswith("claude-"):
+        encoding = _encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    return _heuristic_tokens(text)
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: str = "gpt-3.5-turbo") -> int:
+    """Prompt tokens for a list of chat messages, including per-message framing"""
+    return sum(count_tokens(str(m.get("content", "")), model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def context_window(model: str) -> int:
+    """Context window size for a model (longest matching prefix wins)"""
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def prompt_budget(model: str, max_tokens: Optional[int] = None) -> int:
+    """Prompt tokens available once the completion and a safety margin are set aside"""
+    budget = context_window(model) - (max_tokens or 0) - SAFETY_MARGIN_TOKENS
+    if Config.LLM_MAX_PROMPT_TOKENS > 0:
+        budget = min(budget, Config.LLM_MAX_PROMPT_TOKENS)
+    return max(0, budget)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Shorten text to about max_tokens, keeping its beginning and end
+
+    The middle is replaced by an omission marker, since instructions tend to
+    sit at the start of a document and conclusions at the end.
+    """
+    total = count_tokens(text, model)
+    if total <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    marker_tokens = count_tokens(OMISSION_MARKER.format(count=total), model)
+    keep_tokens = max(0, max_tokens - marker_tokens)
+    # Cut by characters in proportion to tokens, then tighten
+    keep_chars = int(keep_tokens * len(text) / total)
+    while keep_chars > 0:
+        head = text[:keep_chars * 2 // 3]
+        tail = text[len(text) - keep_chars // 3:] if keep_chars // 3 else ""
+        omitted = total - count_tokens(head, model) - count_tokens(tail, model)
+        candidate = head + OMISSION_MARKER.format(count=omitted) + tail
+        if count_tokens(candidate, model) <= max_tokens:
+            return candidate
+        keep_chars = int(keep_chars * 0.9)
+    return ""
+
+
+def summarize_extractive(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Cheap local summary: leading sentences that fit in max_tokens
+
+    Used to compress older context instead of dropping it outright; falls back
+    to truncation when even the first sentence is too long.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    summary = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        candidate = f"{summary} {sentence}".strip()
+        if count_tokens(candidate, model) > max_tokens:
+            break
+        summary = candidate
+    return summary or truncate_to_tokens(text, max_tokens, model)
+
+
+def fit_context(items: List[str], max_tokens: int, model: str = "gpt-3.5-turbo",
+                item_max_tokens: Optional[int] = None, separator: str = "\n") -> str:
+    """
+    Join context items (oldest first) within max_tokens, prioritizing the newest
+
+    Items are taken newest first. Each is capped at item_max_tokens; an item
+    that no longer fits whole is summarized into the remaining space, and
+    anything older than that is dropped.
+    """
+    separator_tokens = count_tokens(separator, model)
+    remaining = max_tokens
+    kept: List[str] = []
+    for item in reversed(items):
+        if item_max_tokens is not None:
+            item = truncate_to_tokens(item, item_max_tokens, model)
+        cost = count_tokens(item, model) + (separator_tokens if kept else 0)
+        if cost > remaining:
+            summary = summarize_extractive(item, remaining - (separator_tokens if kept else 0), model)
+            if summary:
+                kept.append(summary)
+            break
+        kept.append(item)
+        remaining -= cost
+    return separator.join(reversed(kept))
+
+
+def fit_messages(messages: List[Dict[str, Any]], model: str,
+                 max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Guarantee a request fits the model's prompt budget
+
+    Messages are returned unchanged when they fit. Otherwise the longest
+    messages are truncated in turn until the total is within budget.
+    """
+    budget = prompt_budget(model, max_tokens)
+    counts = [count_tokens(str(m.get("content", "")), model) for m in messages]
+    excess = sum(counts) + MESSAGE_OVERHEAD_TOKENS * len(messages) - budget
+    if excess <= 0:
+        return messages
+
+    fitted = [dict(m) for m in messages]
+    for index in sorted(range(len(fitted)), key=lambda i: counts[i], reverse=True):
+        if excess <= 0:
+            break
+        target = max(0, counts[index] - excess)
+        fitted[index]["content"] = truncate_to_tokens(str(fitted[index].get("content", "")), target, model)
+        excess -= counts[index] - count_tokens(fitted[index]["content"], model)
+    return fitted
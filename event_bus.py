@@ -0,0 +1,181 @@
+"""
+In-process pub/sub for task and project events
+
+Publishers (the A2A server and the MGX team) post events to topics such as
+"task:<id>" or "project:<id>". Each subscriber gets a bounded queue: a
+consumer that falls that far behind is cut off instead of growing memory,
+and can reconnect with the last event id it saw to replay the rest from a
+bounded history.
+"""
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Reasons a subscription ends
+LAGGED = "lagged"
+SHUTDOWN = "shutdown"
+
+
+@dataclass
+class Event:
+    id: str
+    topic: str
+    type: str
+    data: Dict[str, Any]
+    timestamp: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def task_topic(task_id: str) -> str:
+    return f"task:{task_id}"
+
+
+def project_topic(project_id: str) -> str:
+    return f"project:{project_id}"
+
+
+class SubscriptionClosed(Exception):
+    """The subscription ended; reason is LAGGED or SHUTDOWN"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Subscription closed: {reason}")
+        self.reason = reason
+
+
+class Subscription:
+    def __init__(self, topics: Set[str], queue_size: int, backlog: List[Event], history_gap: bool):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Replayed history is kept apart so it does not count against the live queue
+        self.backlog: Deque[Event] = deque(backlog)
+        # True when events after the requested last id were already evicted from history
+        self.history_gap = history_gap
+        self.closed_reason: Optional[str] = None
+
+    def offer(self, event: Event) -> bool:
+        """Queue a live event; False when the queue is full"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, reason: str):
+        if self.closed_reason is None:
+            self.closed_reason = reason
+            # Wake a consumer blocked on an empty queue
+            self.offer(None)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        Next event, or None if nothing arrived within timeout
+
+        Raises SubscriptionClosed once the subscription is closed and every
+        event queued before that has been delivered.
+        """
+        if self.backlog:
+            return self.backlog.popleft()
+        if self.queue.empty() and self.closed_reason:
+            raise SubscriptionClosed(self.closed_reason)
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is None:
+            raise SubscriptionClosed(self.closed_reason)
+        return event
+
+
+class EventBus:
+    def __init__(self, history_size: int = 1000, queue_size: int = 100):
+        # Event ids are "<epoch>-<sequence>"; the epoch changes per process so
+        # ids from a previous run are never mistaken for current ones
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+        self.history: Deque[Event] = deque(maxlen=history_size)
+        self.queue_size = queue_size
+        self.subscriptions: Set[Subscription] = set()
+        # Callbacks that see every event synchronously, e.g. webhook delivery
+        self.listeners: List[Callable[[Event], None]] = []
+        self.stats = {"published": 0, "lagged_subscribers": 0}
+
+    def publish(self, topic: str, event_type: str, data: Dict[str, Any]) -> Event:
+        """Record an event and deliver it to every subscriber of its topic"""
+        event = Event(f"{self.epoch}-{next(self._sequence)}", topic, event_type, data, time.time())
+        self.history.append(event)
+        self.stats["published"] += 1
+        for subscription in list(self.subscriptions):
+            if topic in subscription.topics and not subscription.offer(event):
+                self.stats["lagged_subscribers"] += 1
+                self.unsubscribe(subscription, LAGGED)
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Event listener failed for {event.type}: {e}")
+        return event
+
+    def add_listener(self, listener: Callable[[Event], None]):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Event], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def subscribe(self, topics: Iterable[str], last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Subscribe to topics, first replaying history newer than last_event_id
+
+        Without last_event_id only new events are delivered.
+        """
+        topics = set(topics)
+        backlog: List[Event] = []
+        history_gap = False
+        if last_event_id:
+            epoch, _, sequence = last_event_id.partition("-")
+            after = int(sequence) if epoch == self.epoch and sequence.isdigit() else 0
+            backlog = [e for e in self.history if e.topic in topics and self._sequence_of(e) > after]
+            oldest = self._sequence_of(self.history[0]) if self.history else after + 1
+            history_gap = oldest > after + 1
+
+        subscription = Subscription(topics, self.queue_size, backlog, history_gap)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, reason: str = SHUTDOWN):
+        self.subscriptions.discard(subscription)
+        subscription.close(reason)
+
+    def close_all(self):
+        """End every subscription, e.g. when the server starts draining"""
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription, SHUTDOWN)
+
+    @staticmethod
+    def _sequence_of(event: Event) -> int:
+        return int(event.id.rsplit("-", 1)[1])
+
+
+_event_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """Process-wide bus shared by the A2A server and the MGX team"""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus(
+            history_size=Config.EVENT_HISTORY_SIZE,
+            queue_size=Config.EVENT_QUEUE_SIZE
+        )
+    return _event_bus
@@ -0,0 +1,176 @@
+"""
+Deterministic fake LLM provider for offline benchmarking
+
+FakeOpenAIClient mimics the parts of openai.OpenAI the agent uses
+(client.chat.completions.create, streaming included), so AgentSkills and
+MGXInspiredAgentTeam run unchanged against it. Content depends only on the
+request; latency, token rate and failures are drawn from a seeded RNG.
+Select it with LLM_PROVIDER=fake.
+"""
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import Config
+
+WORDS = [
+    "agent", "team", "design", "build", "scalable", "component", "user", "data",
+    "service", "api", "review", "deploy", "test", "module", "interface", "plan",
+    "architecture", "feature", "quality", "secure", "fast", "simple", "robust", "model",
+]
+
+
+class FakeLLMError(Exception):
+    """Injected provider failure; status_code mirrors the HTTP error it stands in for"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LatencyModel:
+    """Samples time-to-first-token from a configurable distribution"""
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, distribution: str = "lognormal", mean_ms: float = 200.0,
+                 stddev_ms: float = 50.0, seed: int = 42):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.stddev_ms = stddev_ms
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ms(self) -> float:
+        with self._lock:
+            if self.mean_ms <= 0:
+                return 0.0
+            if self.distribution == "fixed":
+                value = self.mean_ms
+            elif self.distribution == "uniform":
+                value = self.rng.uniform(self.mean_ms - self.stddev_ms, self.mean_ms + self.stddev_ms)
+            elif self.distribution == "normal":
+                value = self.rng.gauss(self.mean_ms, self.stddev_ms)
+            elif self.distribution == "exponential":
+                value = self.rng.expovariate(1.0 / self.mean_ms)
+            else:
+                # Parameterize the lognormal so its mean and stddev match the configured values
+                sigma = math.sqrt(math.log1p((self.stddev_ms / self.mean_ms) ** 2))
+                mu = math.log(self.mean_ms) - sigma ** 2 / 2
+                value = self.rng.lognormvariate(mu, sigma)
+            return max(0.0, value)
+
+    def roll(self) -> float:
+        with self._lock:
+            return self.rng.random()
+
+
+class FakeCompletions:
+    def __init__(self, client: "FakeOpenAIClient"):
+        self._client = client
+
+    def create(self, model: str, messages: List[Dict[str, Any]], max_tokens: Optional[int] = None,
+               stream: bool = False, stream_options: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        include_usage = bool(stream_options and stream_options.get("include_usage"))
+        return self._client._create(model, messages, max_tokens, stream, include_usage)
+
+
+class FakeOpenAIClient:
+    """Drop-in stand-in for openai.OpenAI with deterministic output"""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, tokens_per_second: float = 50.0,
+                 completion_tokens: int = 100, failure_rate: float = 0.0):
+        self.latency = latency or LatencyModel(mean_ms=0.0)
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.chat = SimpleNamespace(completions=FakeCompletions(self))
+
+    @classmethod
+    def from_config(cls) -> "FakeOpenAIClient":
+        return cls(
+            latency=LatencyModel(
+                distribution=Config.FAKE_LLM_LATENCY_DISTRIBUTION,
+                mean_ms=Config.FAKE_LLM_TTFT_MS,
+                stddev_ms=Config.FAKE_LLM_TTFT_STDDEV_MS,
+                seed=Config.FAKE_LLM_SEED
+            ),
+            tokens_per_second=Config.FAKE_LLM_TOKENS_PER_SECOND,
+            completion_tokens=Config.FAKE_LLM_COMPLETION_TOKENS,
+            failure_rate=Config.FAKE_LLM_FAILURE_RATE
+        )
+
+    def _create(self, model: str, messages: List[Dict[str, Any]], max_tokens: Optional[int], stream: bool,
+                include_usage: bool = False) -> Any:
+        ttft = self.latency.sample_ms() / 1000
+        if self.failure_rate and self.latency.roll() < self.failure_rate:
+            time.sleep(ttft)
+            raise FakeLLMError("Injected fake provider failure", status_code=503)
+
+        content = self._content(model, messages, max_tokens)
+        tokens = content.split(" ")
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 + 1 for m in messages)
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(tokens),
+            total_tokens=prompt_tokens + len(tokens)
+        )
+
+        if stream:
+            return self._stream(model, tokens, ttft, usage if include_usage else None)
+
+        time.sleep(ttft + self._generation_seconds(len(tokens)))
+        return SimpleNamespace(
+            id=f"fake-{uuid.uuid4()}",
+            model=model,
+            choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=content),
+                                     finish_reason="stop")],
+            usage=usage
+        )
+
+    def _stream(self, model: str, tokens: List[str], ttft: float, usage: Optional[Any] = None) -> Iterator[Any]:
+        time.sleep(ttft)
+        per_token = self._generation_seconds(1)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(per_token)
+            delta = token if i == 0 else " " + token
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=delta),
+                                         finish_reason="stop" if i == len(tokens) - 1 else None)],
+                usage=None
+            )
+        if usage is not None:
+            # Like OpenAI's include_usage: a final chunk with no choices
+            yield SimpleNamespace(model=model, choices=[], usage=usage)
+
+    def _generation_seconds(self, num_tokens: int) -> float:
+        return num_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _content(self, model: str, messages: List[Dict[str, Any]], max_tokens: Optional[int]) -> str:
+        """Deterministic completion text derived from the request"""
+        request_key = json.dumps([model, messages], sort_keys=True, default=str)
+        seed = int.from_bytes(hashlib.sha256(request_key.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        num_tokens = min(self.completion_tokens, max_tokens or self.completion_tokens)
+
+        system_prompt = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        if "JSON" in system_prompt:
+            # MGX request analysis expects a JSON object
+            return json.dumps({
+                "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+                "requirements": [" ".join(rng.choice(WORDS) for _ in range(4)) for _ in range(3)],
+                "assigned_agents": ["team_leader", "engineer", "product_manager"],
+                "scope": "Fake provider scope"
+            })
+
+        return " ".join(rng.choice(WORDS) for _ in range(max(1, num_tokens)))
@@ -0,0 +1,138 @@
+"""
+Hedged requests for tail-latency reduction
+
+If a call has not returned by a configurable percentile of recent latency,
+HedgePolicy fires a duplicate and takes whichever finishes first. Hedges draw
+on a budget that refills by a fixed fraction of each call, and at most
+max_per_minute fire in any minute, which caps the extra cost.
+
+The latency history only ever holds the primary call's own latency, recorded
+when it completes even if the hedge already won; recording the winner instead
+would drag the percentile down and make hedges ever more frequent. A losing
+primary is therefore left to finish (a call running in a worker thread via
+asyncio.to_thread cannot be interrupted anyway), while a losing hedge is
+cancelled, which only discards its result.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import Config
+
+
+class HedgePolicy:
+    def __init__(self, percentile: float = 95.0, min_delay: float = 0.5, max_fraction: float = 0.1,
+                 min_samples: int = 20, window: int = 200, max_credits: float = 10.0, max_per_minute: int = 60):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_fraction = max_fraction
+        self.min_samples = min_samples
+        self.window = window
+        self.max_credits = max_credits
+        self.credits = 0.0
+        self.max_per_minute = max_per_minute
+        self._hedge_times: deque = deque()
+        self.latencies: Dict[str, deque] = {}
+        self.stats = {"calls": 0, "hedges": 0, "hedge_wins": 0}
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little latency history"""
+        samples = self.latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(self.percentile / 100 * len(ordered)))]
+        return max(self.min_delay, value)
+
+    def record(self, key: str, latency: float):
+        self.latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def _take_credit(self) -> bool:
+        now = time.monotonic()
+        while self._hedge_times and now - self._hedge_times[0] >= 60.0:
+            self._hedge_times.popleft()
+        if self.max_per_minute and len(self._hedge_times) >= self.max_per_minute:
+            return False
+        if self.credits >= 1.0:
+            self.credits -= 1.0
+            self._hedge_times.append(now)
+            return True
+        return False
+
+    def _record_when_done(self, key: str, task: asyncio.Future, started: float):
+        """Record task's latency once it succeeds, whether or not its result is used"""
+        def done(task: asyncio.Future):
+            if not task.cancelled() and task.exception() is None:
+                self.record(key, time.monotonic() - started)
+        task.add_done_callback(done)
+
+    async def run(self, key: str, primary: Callable[[], Awaitable[Any]],
+                  hedge: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """
+        Run primary, hedging with hedge (default: primary again) if it is slow
+
+        Args:
+            key: Latency-history bucket, e.g. the model name
+            primary: Factory for the original call
+            hedge: Factory for the duplicate call, e.g. one aimed at another provider
+        """
+        self.stats["calls"] += 1
+        self.credits = min(self.max_credits, self.credits + self.max_fraction)
+        started = time.monotonic()
+        delay = self.hedge_delay(key)
+
+        first = asyncio.ensure_future(primary())
+        self._record_when_done(key, first, started)
+        try:
+            if delay is None:
+                return await first
+
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done or not self._take_credit():
+                return await first
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+
+        self.stats["hedges"] += 1
+        second = asyncio.ensure_future((hedge or primary)())
+        pending = {first, second}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is None and pending:
+                    # One copy failed; keep waiting for the other
+                    continue
+                if winner is None:
+                    # Both failed: surface the error
+                    return next(iter(done)).result()
+                if winner is second:
+                    self.stats["hedge_wins"] += 1
+                return winner.result()
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        finally:
+            # A losing primary runs on so its latency is recorded
+            second.cancel()
+
+
+_hedge_policy: Optional[HedgePolicy] = None
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """Process-wide hedge policy, or None when hedging is disabled"""
+    global _hedge_policy
+    if not Config.LLM_HEDGE_ENABLED:
+        return None
+    if _hedge_policy is None:
+        _hedge_policy = HedgePolicy(
+            percentile=Config.LLM_HEDGE_PERCENTILE,
+            min_delay=Config.LLM_HEDGE_MIN_DELAY_SECONDS,
+            max_fraction=Config.LLM_HEDGE_MAX_FRACTION,
+            min_samples=Config.LLM_HEDGE_MIN_SAMPLES,
+            max_per_minute=Config.LLM_HEDGE_MAX_PER_MINUTE
+        )
+    return _hedge_policy
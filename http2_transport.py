@@ -0,0 +1,226 @@
+"""
+Optional HTTP/2 transport for the A2A clients
+
+With HTTP/1.1 every concurrent call needs its own connection, and a long
+LLM call holds that connection for its whole duration. Over HTTP/2 many
+calls are multiplexed as streams on a few connections.
+
+The sessions here wrap httpx (pip install "httpx[http2]") behind the same
+interface the clients already use: Http2Session behaves like the
+requests.Session of A2AClient, and AsyncHttp2Session like the
+aiohttp.ClientSession of AsyncA2AClient, raising those libraries'
+exceptions. The client code is therefore the same for both transports.
+
+https:// URLs negotiate HTTP/2 via ALPN. Plain http:// URLs speak HTTP/2
+directly (h2c with prior knowledge), which the server must support.
+Hypercorn does (see A2A_HTTP2); uvicorn does not.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple, Union
+
+import aiohttp
+import requests
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+try:
+    import httpx
+except ImportError:  # optional: only needed when a client is created with http2=True
+    httpx = None
+
+
+def _require_httpx():
+    if httpx is None:
+        raise ImportError('HTTP/2 transport needs httpx: pip install "httpx[http2]"')
+
+
+def _limits(max_connections: int, keepalive_expiry: Optional[float] = None) -> "httpx.Limits":
+    # Each connection carries many concurrent streams, so a handful is plenty
+    return httpx.Limits(max_connections=max_connections or None,
+                        max_keepalive_connections=max_connections or None,
+                        keepalive_expiry=keepalive_expiry)
+
+
+def _prior_knowledge(base_url: str) -> bool:
+    return base_url.startswith("http://")
+
+
+class Http2Response:
+    """The parts of requests.Response that A2AClient uses"""
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    def json(self) -> Any:
+        return self._response.json()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self) -> "Http2Response":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class Http2Session:
+    """
+    requests.Session look-alike that multiplexes calls over HTTP/2
+
+    Thread-safe, like the httpx.Client under it. Only failed connection
+    attempts are retried (retries); there is no retry on HTTP status.
+    """
+
+    def __init__(self, base_url: str, headers: Dict[str, str], max_connections: int = 10, retries: int = 0):
+        _require_httpx()
+        transport = httpx.HTTPTransport(http1=not _prior_knowledge(base_url), http2=True,
+                                        limits=_limits(max_connections), retries=retries)
+        self.client = httpx.Client(transport=transport, headers=headers)
+
+    @staticmethod
+    def _timeout(timeout: Union[None, float, Tuple[float, float]]) -> "httpx.Timeout":
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def request(self, method: str, url: str, json: Any = None, params: Optional[Dict[str, str]] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: Union[None, float, Tuple[float, float]] = None,
+                stream: bool = False) -> Http2Response:
+        request = self.client.build_request(method, url, json=json, params=params, headers=headers,
+                                            timeout=self._timeout(timeout))
+        try:
+            return Http2Response(self.client.send(request, stream=stream))
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+
+    def get(self, url: str, **kwargs) -> Http2Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> Http2Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.client.close()
+
+
+class _AsyncContent:
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+
+    async def iter_any(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._response.aiter_bytes():
+                yield chunk
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e))
+        except httpx.HTTPError as e:
+            raise aiohttp.ClientPayloadError(str(e))
+
+
+class AsyncHttp2Response:
+    """The parts of aiohttp.ClientResponse that AsyncA2AClient uses"""
+
+    def __init__(self, method: str, response: "httpx.Response"):
+        self._method = method
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.content = _AsyncContent(response)
+        self.http_version = response.http_version
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            url = URL(str(self._response.url))
+            request_info = aiohttp.RequestInfo(url, self._method, CIMultiDictProxy(CIMultiDict()), url)
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status,
+                                              message=self._response.reason_phrase)
+
+    async def json(self, content_type: Optional[str] = None) -> Any:
+        await self._response.aread()
+        return self._response.json()
+
+    async def text(self) -> str:
+        await self._response.aread()
+        return self._response.text
+
+
+class _AsyncRequest:
+    """Async context manager around one streamed request, like aiohttp's"""
+
+    def __init__(self, session: "AsyncHttp2Session", request: "httpx.Request"):
+        self._session = session
+        self._request = request
+        self._response: Optional[httpx.Response] = None
+
+    async def __aenter__(self) -> AsyncHttp2Response:
+        try:
+            self._response = await self._session.client.send(self._request, stream=True)
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e))
+        except httpx.HTTPError as e:
+            raise aiohttp.ClientConnectionError(str(e))
+        return AsyncHttp2Response(self._request.method, self._response)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._response is not None:
+            await self._response.aclose()
+
+
+class AsyncHttp2Session:
+    """aiohttp.ClientSession look-alike that multiplexes calls over HTTP/2"""
+
+    def __init__(self, base_url: str, headers: Dict[str, str], timeout: float = 30, max_connections: int = 10,
+                 keepalive_expiry: Optional[float] = None):
+        _require_httpx()
+        transport = httpx.AsyncHTTPTransport(http1=not _prior_knowledge(base_url), http2=True,
+                                             limits=_limits(max_connections, keepalive_expiry))
+        self.client = httpx.AsyncClient(transport=transport, headers=headers, timeout=httpx.Timeout(timeout))
+
+    @property
+    def closed(self) -> bool:
+        return self.client.is_closed
+
+    @staticmethod
+    def _timeout(timeout: Optional[aiohttp.ClientTimeout]) -> Any:
+        if timeout is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(timeout.total, connect=timeout.sock_connect or timeout.total,
+                             read=timeout.sock_read or timeout.total)
+
+    def request(self, method: str, url: str, json: Any = None, params: Optional[Dict[str, str]] = None,
+                headers: Optional[Dict[str, str]] = None,
+                timeout: Optional[aiohttp.ClientTimeout] = None) -> _AsyncRequest:
+        return _AsyncRequest(self, self.client.build_request(method, url, json=json, params=params,
+                                                             headers=headers, timeout=self._timeout(timeout)))
+
+    def get(self, url: str, **kwargs) -> _AsyncRequest:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _AsyncRequest:
+        return self.request("POST", url, **kwargs)
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,85 @@
+"""
+Idempotency key tracking for mutating A2A methods
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class IdempotencyKeyReused(ValueError):
+    """An idempotency key was sent again with different params"""
+
+
+def params_fingerprint(params: Dict[str, Any]) -> str:
+    """Stable hash of a call's params, ignoring the idempotency key itself"""
+    canonical = json.dumps({k: v for k, v in params.items() if k != "idempotency_key"},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Bounded TTL table mapping (scope, method, idempotency key) to a result
+
+    The scope (the caller's tenant) keeps one caller's keys from replaying
+    another's results. Each entry also remembers a fingerprint of the params
+    it ran with; reusing a key with different params raises
+    IdempotencyKeyReused instead of silently returning the first result.
+
+    Entries are kept in insertion order, so the oldest entry is both the next
+    one to expire and the first one evicted when the table is full. A retry
+    that arrives while the original call is still running awaits the same
+    future instead of starting a second execution.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, asyncio.Future, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def run(self, method: str, key: str, func: Callable[[], Awaitable[Dict[str, Any]]],
+                  fingerprint: str = "", scope: Optional[str] = None) -> Dict[str, Any]:
+        """Return the stored result for this key, or run func and store its result"""
+        self._evict_expired()
+        entry_key = (scope or "", method, key)
+
+        entry = self._entries.get(entry_key)
+        if entry is not None:
+            if entry[2] != fingerprint:
+                raise IdempotencyKeyReused(f"idempotency_key {key} was already used with different params")
+            return await asyncio.shield(entry[1])
+
+        future = asyncio.get_running_loop().create_future()
+        self._entries[entry_key] = (time.monotonic() + self.ttl_seconds, future, fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        try:
+            result = await func()
+        except BaseException as e:
+            # Failures are not cached so the client can retry them for real
+            self._entries.pop(entry_key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark as retrieved when nobody else is waiting
+            raise
+
+        future.set_result(result)
+        return result
+
+    def _evict_expired(self):
+        """Drop entries whose TTL has passed"""
+        now = time.monotonic()
+        while self._entries:
+            expires_at = next(iter(self._entries.values()))[0]
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
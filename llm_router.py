@@ -0,0 +1,339 @@
+"""
+Multi-provider LLM router with latency-based selection and failover
+
+LLMRouter exposes the same client.chat.completions.create interface as
+openai.OpenAI, so skills and the MGX team use it unchanged. Each backend
+(provider client plus model mapping) keeps rolling latency and error-rate
+statistics; every call goes to the healthiest eligible backend and fails
+over to the next one on timeouts, connection errors, 429s and 5xx responses.
+Backends whose circuit breaker is open are skipped without being called.
+
+Streamed calls fail over too, as long as the failing backend has not yielded
+a chunk yet; after that, switching would repeat text the caller has already
+seen, so the error is recorded against the backend and raised.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import Config
+from circuit_breaker import CircuitOpenError, get_breaker, is_backend_failure
+
+logger = logging.getLogger(__name__)
+
+# Requested model -> provider model. Callers ask for OpenAI model names, so
+# other providers map them to their closest tier.
+DEFAULT_MODEL_MAPS = {
+    "openai": {},
+    "anthropic": {
+        "gpt-4": "claude-sonnet-4-5",
+        "gpt-4o": "claude-sonnet-4-5",
+        "gpt-3.5-turbo": "claude-haiku-4-5",
+        "gpt-4o-mini": "claude-haiku-4-5",
+    },
+}
+
+# Models a provider accepts as-is when they are not in its model map
+DEFAULT_MODEL_PREFIXES = {
+    "openai": ("gpt-", "o1", "o3", "o4"),
+    "anthropic": ("claude-",),
+}
+
+
+class NoBackendAvailableError(Exception):
+    """No configured backend can serve the requested model"""
+
+
+class BackendStats:
+    """Rolling latency and error-rate window for one backend"""
+
+    def __init__(self, window: int = 100, alpha: float = 0.2):
+        self.samples: deque = deque(maxlen=window)  # (latency seconds, ok)
+        self.alpha = alpha
+        self.ewma_latency: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.samples.append((latency, ok))
+            if ok:
+                if self.ewma_latency is None:
+                    self.ewma_latency = latency
+                else:
+                    self.ewma_latency += self.alpha * (latency - self.ewma_latency)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def latency_percentile(self, p: float) -> Optional[float]:
+        """Latency percentile over recent successful calls (None if there are none)"""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p99 = self.latency_percentile(99)
+        return {
+            "samples": len(self.samples),
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "p99_latency_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+        }
+
+
+class Backend:
+    """One provider client plus the models it can serve"""
+
+    def __init__(self, name: str, client: Any, model_map: Optional[Dict[str, str]] = None,
+                 model_prefixes: Sequence[str] = ()):
+        self.name = name
+        self.client = client
+        self.model_map = model_map or {}
+        self.model_prefixes = tuple(model_prefixes)
+        self.stats = BackendStats()
+        self.breaker = get_breaker(f"llm:{name}")
+
+    def resolve_model(self, model: str) -> Optional[str]:
+        """Provider model to use for a requested model, or None if ineligible"""
+        if model in self.model_map:
+            return self.model_map[model]
+        if not self.model_prefixes or model.startswith(self.model_prefixes):
+            return model
+        return None
+
+
+class AnthropicChatClient:
+    """Adapts the Anthropic Messages API to the OpenAI chat.completions interface"""
+
+    def __init__(self, client: Any):
+        self._client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: List[Dict[str, Any]], max_tokens: Optional[int] = None,
+                temperature: Optional[float] = None, stream: bool = False, **kwargs) -> Any:
+        system = "\n\n".join(m["content"] for m in messages if m.get("role") == "system")
+        request = {
+            "model": model,
+            "max_tokens": max_tokens or 1024,
+            "messages": [m for m in messages if m.get("role") != "system"],
+        }
+        if system:
+            request["system"] = system
+        if temperature is not None:
+            request["temperature"] = min(temperature, 1.0)
+
+        if stream:
+            return self._stream(self._client.messages.create(stream=True, **request))
+
+        response = self._client.messages.create(**request)
+        content = "".join(getattr(block, "text", "") for block in response.content)
+        usage = SimpleNamespace(
+            prompt_tokens=response.usage.input_tokens,
+            completion_tokens=response.usage.output_tokens,
+            total_tokens=response.usage.input_tokens + response.usage.output_tokens
+        )
+        return SimpleNamespace(
+            id=response.id,
+            model=response.model,
+            choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=content),
+                                     finish_reason=response.stop_reason)],
+            usage=usage
+        )
+
+    @staticmethod
+    def _stream(events: Iterator[Any]) -> Iterator[Any]:
+        """Translate Messages API stream events into OpenAI-style chunks, usage last"""
+        input_tokens = output_tokens = 0
+        for event in events:
+            if event.type == "message_start":
+                input_tokens = event.message.usage.input_tokens
+            elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=event.delta.text),
+                                                               finish_reason=None)], usage=None)
+            elif event.type == "message_delta":
+                output_tokens = event.usage.output_tokens
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(
+            prompt_tokens=input_tokens,
+            completion_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens
+        ))
+
+
+class _RouterCompletions:
+    def __init__(self, router: "LLMRouter"):
+        self._router = router
+
+    def create(self, **request) -> Any:
+        return self._router.complete(**request)
+
+
+class LLMRouter:
+    """Send each chat completion to the healthiest eligible backend, failing over on provider errors"""
+
+    def __init__(self, backends: List[Backend], preferred: Optional[str] = None,
+                 max_error_rate: float = 0.5, min_samples: int = 5, explore_rate: float = 0.05):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.preferred = preferred
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        # Fraction of calls sent to a non-best backend so its statistics stay fresh
+        self.explore_rate = explore_rate
+        self.rng = random.Random()
+        self.chat = SimpleNamespace(completions=_RouterCompletions(self))
+
+    def _score(self, backend: Backend) -> Tuple[int, float]:
+        """Sort key: unhealthy backends last, then by error-weighted latency"""
+        stats = backend.stats
+        error_rate = stats.error_rate
+        unhealthy = int(backend.breaker.state != "closed"
+                        or (len(stats.samples) >= self.min_samples and error_rate > self.max_error_rate))
+        # Untried backends score 0 so they get measured; ones that have only failed go last
+        if stats.ewma_latency is not None:
+            latency = stats.ewma_latency
+        else:
+            latency = float("inf") if stats.samples else 0.0
+        score = latency * (1 + 4 * error_rate)
+        if backend.name == self.preferred:
+            score *= 0.9
+        return unhealthy, score
+
+    def ranked_backends(self, model: str) -> List[Tuple[Backend, str]]:
+        """Eligible backends for a model, best first, paired with the provider model name"""
+        eligible = []
+        for backend in self.backends:
+            provider_model = backend.resolve_model(model)
+            if provider_model is not None:
+                eligible.append((backend, provider_model))
+        ranked = sorted(eligible, key=lambda item: self._score(item[0]))
+
+        if len(ranked) > 1 and self.rng.random() < self.explore_rate:
+            ranked.insert(0, ranked.pop(self.rng.randrange(1, len(ranked))))
+        return ranked
+
+    def call_backend(self, backend: Backend, provider_model: str, request: Dict[str, Any]) -> Any:
+        """Call one backend through its circuit breaker and record its latency and outcome"""
+        started = time.monotonic()
+        try:
+            response = backend.breaker.call(backend.client.chat.completions.create,
+                                            **dict(request, model=provider_model))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            backend.stats.record(time.monotonic() - started, ok=not is_backend_failure(e))
+            raise
+        backend.stats.record(time.monotonic() - started, ok=True)
+        return response
+
+    def complete(self, **request) -> Any:
+        model = request.get("model", "gpt-3.5-turbo")
+        if request.get("stream"):
+            return self._stream_over(self.ranked_backends(model), request)
+        return self._complete_over(self.ranked_backends(model), request)
+
+    def hedge_complete(self, **request) -> Any:
+        """Like complete(), but start from the second-best backend so a hedge lands on another provider"""
+        model = request.get("model", "gpt-3.5-turbo")
+        candidates = self.ranked_backends(model)
+        if len(candidates) > 1:
+            candidates.append(candidates.pop(0))
+        if request.get("stream"):
+            return self._stream_over(candidates, request)
+        return self._complete_over(candidates, request)
+
+    def _complete_over(self, candidates: List[Tuple[Backend, str]], request: Dict[str, Any]) -> Any:
+        if not candidates:
+            raise NoBackendAvailableError(f"No LLM backend can serve model '{request.get('model')}'")
+
+        last_error: Optional[Exception] = None
+        for backend, provider_model in candidates:
+            try:
+                return self.call_backend(backend, provider_model, request)
+            except CircuitOpenError as e:
+                last_error = last_error or e
+                continue
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                logger.warning(f"LLM backend {backend.name} failed ({type(e).__name__}), failing over")
+                last_error = e
+        raise last_error
+
+    def _stream_over(self, candidates: List[Tuple[Backend, str]], request: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Stream from the first backend that produces a chunk
+
+        A backend's latency sample is its time to first chunk; its outcome is
+        recorded when the stream ends, so mid-stream errors count as failures.
+        """
+        if not candidates:
+            raise NoBackendAvailableError(f"No LLM backend can serve model '{request.get('model')}'")
+
+        last_error: Optional[Exception] = None
+        for backend, provider_model in candidates:
+            started = time.monotonic()
+            try:
+                # The breaker judges the stream when it ends, so it sees mid-stream errors too
+                chunks = iter(backend.breaker.call(backend.client.chat.completions.create,
+                                                   **dict(request, model=provider_model)))
+                first = next(chunks, None)
+            except CircuitOpenError as e:
+                last_error = last_error or e
+                continue
+            except Exception as e:
+                backend.stats.record(time.monotonic() - started, ok=not is_backend_failure(e))
+                if not is_backend_failure(e):
+                    raise
+                logger.warning(f"LLM backend {backend.name} failed ({type(e).__name__}), failing over")
+                last_error = e
+                continue
+
+            first_chunk_latency = time.monotonic() - started
+            try:
+                if first is not None:
+                    yield first
+                yield from chunks
+            except Exception as e:
+                backend.stats.record(first_chunk_latency, ok=not is_backend_failure(e))
+                raise
+            except GeneratorExit:
+                backend.stats.record(first_chunk_latency, ok=True)
+                raise
+            backend.stats.record(first_chunk_latency, ok=True)
+            return
+        raise last_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            backend.name: dict(backend.stats.snapshot(), circuit=backend.breaker.state)
+            for backend in self.backends
+        }
+
+    @classmethod
+    def from_config(cls) -> "LLMRouter":
+        """Build backends for every provider with an API key configured"""
+        backends = []
+        if Config.OPENAI_API_KEY:
+            import openai
+            client = openai.OpenAI(api_key=Config.OPENAI_API_KEY, timeout=Config.LLM_TIMEOUT_SECONDS,
+                                   max_retries=0)
+            backends.append(Backend("openai", client, DEFAULT_MODEL_MAPS["openai"],
+                                    DEFAULT_MODEL_PREFIXES["openai"]))
+        if Config.ANTHROPIC_API_KEY:
+            import anthropic
+            client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY, timeout=Config.LLM_TIMEOUT_SECONDS,
+                                         max_retries=0)
+            backends.append(Backend("anthropic", AnthropicChatClient(client), DEFAULT_MODEL_MAPS["anthropic"],
+                                    DEFAULT_MODEL_PREFIXES["anthropic"]))
+        return cls(backends, preferred=Config.AI_SERVICE)
@@ -0,0 +1,89 @@
+"""
+Streamed chat completions for async callers
+
+Provider SDK streams are blocking iterators. CompletionStream drives one in a
+worker thread and hands its chunks to the event loop as they arrive, so skills
+can yield text deltas without blocking the server or waiting for the whole
+completion.
+"""
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional
+
+_DONE = object()
+
+
+async def iterate_in_thread(make_iterable: Callable[[], Iterable[Any]]) -> AsyncIterator[Any]:
+    """
+    Iterate a blocking iterable in a worker thread, yielding its items on the event loop
+
+    The buffer needs no bound because LLM streams are already bounded by
+    max_tokens. If the consumer stops early the worker stops at the next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        iterator = None
+        error: Optional[BaseException] = None
+        try:
+            iterator = iter(make_iterable())
+            for item in iterator:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except BaseException as e:
+            error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(queue.put_nowait, (_DONE, error))
+
+    loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if isinstance(item, tuple) and len(item) == 2 and item[0] is _DONE:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class CompletionStream:
+    """
+    Async iterator of text deltas from one streamed chat completion
+
+    After iteration, text holds the full completion and total_tokens the
+    provider-reported usage (None if the provider did not report it).
+    """
+
+    def __init__(self, client: Any, **request):
+        self.client = client
+        self.request = dict(request, stream=True, stream_options={"include_usage": True})
+        self.parts: List[str] = []
+        self.total_tokens: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._deltas()
+
+    async def _deltas(self) -> AsyncIterator[str]:
+        chunks = iterate_in_thread(lambda: self.client.chat.completions.create(**self.request))
+        async for chunk in chunks:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None:
+                self.total_tokens = getattr(usage, "total_tokens", None)
+            for choice in getattr(chunk, "choices", None) or []:
+                delta = getattr(getattr(choice, "delta", None), "content", None)
+                if delta:
+                    self.parts.append(delta)
+                    yield delta
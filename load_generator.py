@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+HTTP load generator for the A2A server
+
+Drives a weighted mix of JSON-RPC methods against a running /a2a endpoint,
+either open-loop at a target request rate or closed-loop at a fixed
+concurrency, and reports throughput, error rates and latency percentiles.
+
+Coordinated omission: in rate mode each request's latency is measured from
+the time it was *scheduled* to be sent, so a stalled server is charged for
+the requests it delayed. In concurrency mode the corrected histogram adds the
+samples a constant-rate client would have seen while a slow request blocked
+its worker (the HdrHistogram "expected interval" correction).
+
+Examples:
+    python load_generator.py --rate 50 --duration 30
+    python load_generator.py --concurrency 16 --mix "task/send=4,skill/execute=1,mgx/team_info=1"
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+import bench_history
+
+DEFAULT_MIX = "task/create=1,task/message=3,skill/execute=2,mgx/team_info=1,mgx/project_status=1"
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    """Parse "method=weight,method=weight" into a list of (method, weight)"""
+    entries = []
+    for item in mix.split(","):
+        method, _, weight = item.strip().partition("=")
+        entries.append((method.strip(), float(weight or 1)))
+    return entries
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(p / 100 * len(ordered)))
+    return ordered[index]
+
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    summary = {f"p{p:g}_ms": percentile(ordered, p) for p in PERCENTILES}
+    summary["mean_ms"] = sum(ordered) / len(ordered) if ordered else 0.0
+    summary["max_ms"] = ordered[-1] if ordered else 0.0
+    return summary
+
+
+def corrected_samples(samples_ms: List[float], expected_interval_ms: float) -> List[float]:
+    """Back-fill the samples a constant-rate client would have recorded during long stalls"""
+    if expected_interval_ms <= 0:
+        return list(samples_ms)
+    corrected = []
+    for latency in samples_ms:
+        corrected.append(latency)
+        missing = latency - expected_interval_ms
+        while missing > 0:
+            corrected.append(missing)
+            missing -= expected_interval_ms
+    return corrected
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, mix: List[Tuple[str, float]], seed: int = 1,
+                 prepared_tasks: int = 20, prepared_projects: int = 2, max_connections: int = 100):
+        self.endpoint = f"{base_url.rstrip('/')}/a2a"
+        self.methods = [method for method, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.rng = random.Random(seed)
+        self.prepared_tasks = prepared_tasks
+        self.prepared_projects = prepared_projects
+        self.max_connections = max_connections
+        self.task_ids: List[str] = []
+        self.project_ids: List[str] = []
+        # method -> list of (latency from scheduled start ms, latency from actual send ms, ok)
+        self.results: Dict[str, List[Tuple[float, float, bool]]] = {}
+        self.error_samples: Dict[str, str] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=120)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.session.close()
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        payload = {"jsonrpc": "2.0", "method": method, "id": str(uuid.uuid4())}
+        if params:
+            payload["params"] = params
+        try:
+            async with self.session.post(self.endpoint, json=payload) as response:
+                body = await response.json(content_type=None)
+                if response.status != 200 or not isinstance(body, dict) or body.get("error"):
+                    return False, body.get("error") if isinstance(body, dict) else response.status
+                return True, body.get("result", {})
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return False, str(e)
+
+    async def prepare(self):
+        """Create the tasks and projects that task/message and mgx/* requests target"""
+        for _ in range(self.prepared_tasks):
+            ok, result = await self.call("task/create", {"user_id": "loadgen"})
+            if ok:
+                self.task_ids.append(result["task_id"])
+        needs_projects = any(m in self.methods for m in
+                             ("mgx/team_discussion", "mgx/generate_artifact", "mgx/project_status"))
+        for i in range(self.prepared_projects if needs_projects else 0):
+            ok, result = await self.call("mgx/create_project", {"description": f"Load test project {i}"})
+            if ok:
+                self.project_ids.append(result["project_id"])
+
+    def build_params(self, method: str) -> Dict[str, Any]:
+        message = {"role": "user", "parts": [{"type": "text", "content": "Hello from the load generator"}]}
+        if method == "task/create":
+            return {"user_id": "loadgen"}
+        if method == "task/message":
+            return {"task_id": self.rng.choice(self.task_ids) if self.task_ids else "missing", "message": message}
+        if method == "task/send":
+            return {"user_id": "loadgen", "message": message}
+        if method == "skill/execute":
+            return {"skill_name": "web_search", "parameters": {"query": "load test", "num_results": 3}}
+        if method == "mgx/create_project":
+            return {"description": "Load test project"}
+        if method in ("mgx/team_discussion", "mgx/generate_artifact", "mgx/project_status"):
+            project_id = self.rng.choice(self.project_ids) if self.project_ids else "missing"
+            return {"project_id": project_id, "topic": "Load test topic", "component_type": "web component"}
+        return {}
+
+    async def one_request(self, scheduled: float):
+        method = self.rng.choices(self.methods, self.weights)[0]
+        params = self.build_params(method)
+        sent = time.perf_counter()
+        ok, detail = await self.call(method, params)
+        done = time.perf_counter()
+        self.results.setdefault(method, []).append(((done - scheduled) * 1000, (done - sent) * 1000, ok))
+        if not ok:
+            self.error_samples.setdefault(method, str(detail)[:200])
+
+    async def run_rate(self, rate: float, duration: float, max_in_flight: int) -> float:
+        """Open loop: send at a fixed schedule regardless of how fast responses come back"""
+        in_flight = asyncio.Semaphore(max_in_flight)
+        pending = set()
+        start = time.perf_counter()
+        total = int(rate * duration)
+
+        async def guarded(scheduled: float):
+            async with in_flight:
+                await self.one_request(scheduled)
+
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(guarded(scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.wait(pending)
+        return time.perf_counter() - start
+
+    async def run_concurrency(self, concurrency: int, duration: float) -> float:
+        """Closed loop: each worker sends its next request as soon as the previous one finishes"""
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.one_request(time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float, mode: str, expected_interval_ms: float) -> Dict[str, Any]:
+        def section(rows: List[Tuple[float, float, bool]]) -> Dict[str, Any]:
+            scheduled = [r[0] for r in rows]
+            service = [r[1] for r in rows]
+            errors = sum(1 for r in rows if not r[2])
+            if mode == "rate":
+                corrected = scheduled
+            else:
+                interval = expected_interval_ms or percentile(sorted(service), 50)
+                corrected = corrected_samples(service, interval)
+            return {
+                "requests": len(rows),
+                "errors": errors,
+                "error_rate": errors / len(rows) if rows else 0.0,
+                "throughput_rps": len(rows) / elapsed if elapsed else 0.0,
+                "latency_uncorrected": latency_summary(service),
+                "latency_corrected": latency_summary(corrected),
+            }
+
+        all_rows = [row for rows in self.results.values() for row in rows]
+        return {
+            "mode": mode,
+            "elapsed_s": elapsed,
+            "overall": section(all_rows),
+            "methods": {method: section(rows) for method, rows in sorted(self.results.items())},
+            "error_samples": self.error_samples,
+        }
+
+    def latency_samples(self, mode: str) -> Dict[str, List[float]]:
+        """Per-method latencies for the benchmark history: from schedule in rate mode, service time otherwise"""
+        column = 0 if mode == "rate" else 1
+        return {method: [row[column] for row in rows if row[2]] for method, rows in sorted(self.results.items())}
+
+
+def print_report(report: Dict[str, Any]):
+    header = f"{'method':<24}{'reqs':>8}{'err%':>7}{'rps':>9}" + "".join(f"{'p' + format(p, 'g'):>10}" for p in PERCENTILES)
+    print(f"\n=== Load test ({report['mode']} mode, {report['elapsed_s']:.1f}s) ===")
+    for label in ("latency_corrected", "latency_uncorrected"):
+        print(f"\n{label.replace('_', ' ')} (ms)")
+        print(header)
+        rows = [("overall", report["overall"])] + list(report["methods"].items())
+        for name, section in rows:
+            latency = section[label]
+            print(f"{name:<24}{section['requests']:>8}{section['error_rate'] * 100:>6.1f}%"
+                  f"{section['throughput_rps']:>9.1f}"
+                  + "".join(f"{latency[f'p{p:g}_ms']:>10.1f}" for p in PERCENTILES))
+    if report["error_samples"]:
+        print("\nSample errors:")
+        for method, error in report["error_samples"].items():
+            print(f"- {method}: {error}")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    async with LoadGenerator(args.url, mix, seed=args.seed, prepared_tasks=args.prepared_tasks,
+                             prepared_projects=args.prepared_projects,
+                             max_connections=args.max_connections) as generator:
+        await generator.prepare()
+        if args.warmup > 0:
+            await generator.run_concurrency(min(4, args.concurrency or 4), args.warmup)
+            generator.results.clear()
+            generator.error_samples.clear()
+
+        if args.rate:
+            elapsed = await generator.run_rate(args.rate, args.duration, args.max_in_flight)
+            mode = "rate"
+        else:
+            elapsed = await generator.run_concurrency(args.concurrency, args.duration)
+            mode = "concurrency"
+        if args.save:
+            params = {key: getattr(args, key) for key in ("mix", "rate", "concurrency", "duration", "seed")}
+            path = bench_history.save_run("load", generator.latency_samples(mode), params, args.history_dir)
+            print(f"Saved run to {path}", file=sys.stderr)
+        return generator.report(elapsed, mode, args.expected_interval_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the A2A JSON-RPC endpoint")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the A2A server")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted method mix, e.g. 'task/send=3,mgx/team_info=1'")
+    parser.add_argument("--rate", type=float, default=0, help="Open-loop target rate in requests/second")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed-loop worker count (used when --rate is 0)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured run length in seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured warmup in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Cap on outstanding requests in rate mode")
+    parser.add_argument("--max-connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--expected-interval-ms", type=float, default=0,
+                        help="Expected interval for closed-loop correction (default: median latency)")
+    parser.add_argument("--prepared-tasks", type=int, default=20, help="Tasks created up front for task/message")
+    parser.add_argument("--prepared-projects", type=int, default=2, help="Projects created up front for mgx/*")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the method mix")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--save", action="store_true", help="Store the run in the benchmark history")
+    parser.add_argument("--history-dir", default=bench_history.DEFAULT_HISTORY_DIR, help="Benchmark history directory")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
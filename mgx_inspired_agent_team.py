@@ -6,11 +6,20 @@ import asyncio
 import json
 import uuid
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 from datetime import datetime
 import openai
 from config import get_openai_client
+from token_budget import get_token_scheduler, estimate_request_tokens, usage_total_tokens
+from hedging import get_hedge_policy
+from circuit_breaker import CircuitOpenError
+from context_window import fit_context, fit_messages, prompt_budget
+from event_bus import get_event_bus, project_topic
+
+# Token budgets for the discussion history included in agent contributions
+DISCUSSION_CONTEXT_TOKENS = 1500
+CONTRIBUTION_CONTEXT_TOKENS = 400
 
 class AgentRole(Enum):
     TEAM_LEADER = "team_leader"
@@ -39,11 +48,23 @@ class ProjectTask:
     status: str
     created_at: datetime
     artifacts: List[Dict[str, Any]]
+    user_id: Optional[str] = None
+
+@dataclass
+class AgentPromptTemplates:
+    """Static system-prompt prefixes for one agent, built once per team"""
+    analyze: str
+    contribute: str
+    generate_code: str
 
 class MGXInspiredAgentTeam:
     def __init__(self):
         self.client = get_openai_client()
+        self.token_scheduler = get_token_scheduler()
+        self.hedge_policy = get_hedge_policy()
+        self.event_bus = get_event_bus()
         self.agents = self._initialize_agents()
+        self.prompt_templates = self._compile_prompt_templates()
         self.active_projects: Dict[str, ProjectTask] = {}
         self.conversation_history: Dict[str, List[Dict]] = {}
     
@@ -100,12 +121,54 @@ class MGXInspiredAgentTeam:
             )
         }
     
-    async def create_project(self, user_request: str, user_id: Optional[str] = None) -> str:
+    def _compile_prompt_templates(self) -> Dict[AgentRole, AgentPromptTemplates]:
+        """
+        Precompile each agent's static prompt prefix
+        
+        Per-call prompts only append project and topic sections to these, so the
+        prefix stays byte-identical across calls and provider prefix caching applies.
+        """
+        templates = {}
+        for role, agent in self.agents.items():
+            profile = f"""Role: {agent.description}
+Specialties: {', '.join(agent.specialties)}
+Personality: {agent.personality}"""
+            
+            templates[role] = AgentPromptTemplates(
+                analyze=f"""You are {agent.name}, the {agent.role.value} of an AI development team.
+
+{profile}
+
+Analyze the following user request and provide:
+1. A clear project title
+2. List of key requirements
+3. Which team members should be involved (choose from: team_leader, engineer, product_manager, data_analyst, architect, ui_designer)
+4. Initial project scope assessment
+
+Respond in JSON format.""",
+                contribute=f"""You are {agent.name}, the {agent.role.value}.
+
+{profile}
+
+Keep your response concise, focused on your expertise, and collaborative.""",
+                generate_code=f"""You are {agent.name}, the {agent.role.value}.
+
+Follow best practices and include helpful comments.
+Make it production-ready and well-structured."""
+            )
+        return templates
+    
+    async def create_project(self, user_request: str, user_id: Optional[str] = None,
+                             project_id: Optional[str] = None) -> str:
         """Create a new project based on user request - MGX style"""
-        project_id = str(uuid.uuid4())
+        project_id = project_id or str(uuid.uuid4())
         
         # Mike (Team Leader) analyzes the request first
-        analysis = await self._agent_analyze_request(user_request, AgentRole.TEAM_LEADER)
+        try:
+            analysis = await self._agent_analyze_request(user_request, AgentRole.TEAM_LEADER, user_id)
+        except CircuitOpenError:
+            # No LLM available right now; start from a basic plan without waiting on it
+            analysis = self._basic_analysis(user_request)
         
         project = ProjectTask(
             id=project_id,
@@ -115,35 +178,50 @@ class MGXInspiredAgentTeam:
             assigned_agents=analysis.get("assigned_agents", []),
             status="planning",
             created_at=datetime.now(),
-            artifacts=[]
+            artifacts=[],
+            user_id=user_id
         )
         
         self.active_projects[project_id] = project
         self.conversation_history[project_id] = []
         
+        self.event_bus.publish(project_topic(project_id), "project.created", {
+            "project_id": project_id,
+            "title": project.title,
+            "assigned_agents": project.assigned_agents
+        })
         return project_id
     
-    async def _agent_analyze_request(self, request: str, agent_role: AgentRole) -> Dict[str, Any]:
-        """Have a specific agent analyze the user request"""
-        agent = self.agents[agent_role]
+    async def _chat_completion(self, tenant: Optional[str], hedge: bool = False, **request) -> Any:
+        """Run a chat completion through the shared token budget, hedging slow calls if enabled"""
+        request["messages"] = fit_messages(request["messages"], request["model"], request.get("max_tokens"))
         
-        system_prompt = f"""You are {agent.name}, the {agent.role.value} of an AI development team.
+        async def call(create):
+            estimate = estimate_request_tokens(request["messages"], request.get("max_tokens"), request["model"])
+            async with self.token_scheduler.reserve(tenant, estimate) as reservation:
+                response = await asyncio.to_thread(create, **request)
+                reservation.record(usage_total_tokens(response))
+            return response
         
-Role: {agent.description}
-Specialties: {', '.join(agent.specialties)}
-Personality: {agent.personality}
-
-Analyze the following user request and provide:
-1. A clear project title
-2. List of key requirements
-3. Which team members should be involved (choose from: team_leader, engineer, product_manager, data_analyst, architect, ui_designer)
-4. Initial project scope assessment
-
-Respond in JSON format."""
+        if not (hedge and self.hedge_policy):
+            return await call(self.client.chat.completions.create)
+        
+        # A router can aim the hedge at a different provider
+        hedge_create = getattr(self.client, "hedge_complete", self.client.chat.completions.create)
+        return await self.hedge_policy.run(
+            request["model"],
+            lambda: call(self.client.chat.completions.create),
+            lambda: call(hedge_create)
+        )
+    
+    async def _agent_analyze_request(self, request: str, agent_role: AgentRole,
+                                     user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Have a specific agent analyze the user request"""
+        system_prompt = self.prompt_templates[agent_role].analyze
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            response = await self._chat_completion(
+                user_id,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -167,14 +245,21 @@ Respond in JSON format."""
                     "scope": "To be determined"
                 }
                 
+        except CircuitOpenError:
+            # Let the caller switch to its fallback plan right away
+            raise
         except Exception as e:
             print(f"Error in agent analysis: {e}")
-            return {
-                "title": "New Project", 
-                "requirements": [request],
-                "assigned_agents": [AgentRole.ENGINEER.value],
-                "scope": "Basic implementation"
-            }
+            return self._basic_analysis(request)
+    
+    def _basic_analysis(self, request: str) -> Dict[str, Any]:
+        """Analysis used when no agent could look at the request"""
+        return {
+            "title": "New Project", 
+            "requirements": [request],
+            "assigned_agents": [AgentRole.ENGINEER.value],
+            "scope": "Basic implementation"
+        }
     
     async def team_discussion(self, project_id: str, topic: str) -> List[Dict[str, Any]]:
         """Simulate team discussion MGX-style"""
@@ -189,13 +274,16 @@ Respond in JSON format."""
             try:
                 agent_role = AgentRole(agent_role_str)
                 response = await self._agent_contribute(project, topic, agent_role)
-                responses.append({
+                contribution = {
                     "agent": self.agents[agent_role].name,
                     "role": agent_role.value,
                     "avatar": self.agents[agent_role].avatar,
                     "contribution": response,
                     "timestamp": datetime.now().isoformat()
-                })
+                }
+                responses.append(contribution)
+                self.event_bus.publish(project_topic(project_id), "agent.contributed",
+                                       dict(contribution, project_id=project_id, topic=topic))
             except ValueError:
                 continue
         
@@ -207,15 +295,16 @@ Respond in JSON format."""
         """Get contribution from a specific agent"""
         agent = self.agents[agent_role]
         
-        # Get relevant conversation context
+        # Get relevant conversation context, newest first within the token budget
         recent_context = self.conversation_history.get(project.id, [])[-5:]  # Last 5 messages
-        context_str = "\n".join([f"{msg['agent']}: {msg['contribution']}" for msg in recent_context])
-        
-        system_prompt = f"""You are {agent.name}, the {agent.role.value}.
+        context_str = fit_context(
+            [f"{msg['agent']}: {msg['contribution']}" for msg in recent_context],
+            min(DISCUSSION_CONTEXT_TOKENS, prompt_budget("gpt-4", 300) // 2),
+            model="gpt-4",
+            item_max_tokens=CONTRIBUTION_CONTEXT_TOKENS
+        )
         
-Role: {agent.description}
-Specialties: {', '.join(agent.specialties)}
-Personality: {agent.personality}
+        system_prompt = f"""{self.prompt_templates[agent_role].contribute}
 
 Project: {project.title}
 Description: {project.description}
@@ -223,13 +312,12 @@ Description: {project.description}
 Recent team discussion:
 {context_str}
 
-Provide your professional input on: {topic}
-
-Keep your response concise, focused on your expertise, and collaborative."""
+Provide your professional input on: {topic}"""
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            response = await self._chat_completion(
+                project.user_id,
+                hedge=True,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -241,6 +329,9 @@ Keep your response concise, focused on your expertise, and collaborative."""
             
             return response.choices[0].message.content.strip()
             
+        except CircuitOpenError:
+            # Let the caller switch to its fallback discussion right away
+            raise
         except Exception as e:
             return f"[{agent.name} is temporarily unavailable: {str(e)}]"
     
@@ -265,24 +356,23 @@ Keep your response concise, focused on your expertise, and collaborative."""
         }
         
         project.artifacts.append(artifact)
+        self.event_bus.publish(project_topic(project_id), "artifact.added",
+                               dict(artifact, project_id=project_id))
         return artifact
     
     async def _agent_generate_code(self, project: ProjectTask, component_type: str) -> str:
         """Alex generates code based on project requirements"""
-        alex = self.agents[AgentRole.ENGINEER]
-        
-        system_prompt = f"""You are {alex.name}, the {alex.role.value}.
-        
+        system_prompt = f"""{self.prompt_templates[AgentRole.ENGINEER].generate_code}
+
 Project: {project.title}
 Requirements: {', '.join(project.requirements)}
 
-Generate clean, modern {component_type} code for this project.
-Follow best practices and include helpful comments.
-Make it production-ready and well-structured."""
+Generate clean, modern {component_type} code for this project."""
         
         try:
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            response = await self._chat_completion(
+                project.user_id,
+                hedge=True,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -294,6 +384,9 @@ Make it production-ready and well-structured."""
             
             return response.choices[0].message.content.strip()
             
+        except CircuitOpenError:
+            # Let the caller switch to its fallback artifact right away
+            raise
         except Exception as e:
             return f"// Error generating code: {str(e)}"
     
@@ -334,6 +427,42 @@ Make it production-ready and well-structured."""
             "conversation_messages": len(self.conversation_history.get(project_id, [])),
             "latest_activity": self.conversation_history.get(project_id, [{}])[-1].get("timestamp") if self.conversation_history.get(project_id) else None
         }
+    
+    def export_state(self, project_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """JSON-serializable snapshot of projects (all, or just project_ids) and conversation history"""
+        if project_ids is None:
+            project_ids = list(self.active_projects)
+        
+        projects = {}
+        for project_id in project_ids:
+            project = self.active_projects[project_id]
+            data = asdict(project)
+            data["created_at"] = project.created_at.isoformat()
+            data["assigned_agents"] = [
+                role.value if isinstance(role, AgentRole) else role for role in project.assigned_agents
+            ]
+            projects[project_id] = data
+        
+        return {
+            "projects": projects,
+            "conversation_history": {
+                project_id: self.conversation_history.get(project_id, []) for project_id in project_ids
+            }
+        }
+    
+    def import_state(self, state: Dict[str, Any]):
+        """Restore projects and conversation history from export_state() output"""
+        for project_id, data in state.get("projects", {}).items():
+            data = dict(data, created_at=datetime.fromisoformat(data["created_at"]))
+            self.active_projects[project_id] = ProjectTask(**data)
+        
+        for project_id, messages in state.get("conversation_history", {}).items():
+            self.conversation_history[project_id] = messages
+    
+    def remove_project(self, project_id: str):
+        """Forget a project, e.g. after handing it to another cluster node"""
+        self.active_projects.pop(project_id, None)
+        self.conversation_history.pop(project_id, None)
 
 # Usage example
 async def demo_mgx_inspired_team():
@@ -0,0 +1,194 @@
+"""
+Near-duplicate prompt cache using MinHash locality-sensitive hashing
+
+Prompts are normalized (case, Unicode form, punctuation, whitespace) and
+fingerprinted with a MinHash signature over character shingles. Signatures
+are split into LSH bands, so a lookup only compares against prompts that
+share at least one band, and a hit requires the estimated Jaccard similarity
+to reach the configured threshold. Everything is computed locally.
+
+A word or two barely moves the similarity, yet "a 5 line poem" and "a 50
+line poem", or "I do like" and "I do not like", ask for different things.
+So numbers and negations are pulled out as the prompt's key terms, and two
+prompts only count as duplicates when those terms match exactly and in order.
+
+Fingerprinting is pure Python and costs time proportional to prompt length,
+so prompts over max_chars are not cached at all, and async callers should
+run get() and put() off the event loop (asyncio.to_thread).
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import Config
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Words that flip or quantify a prompt's meaning; "t" is what normalization
+# leaves of the "n't" in don't, can't, won't...
+_NEGATIONS = {"no", "not", "never", "none", "nor", "nothing", "neither", "without", "cannot", "t"}
+_NUMBER_WORDS = {
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen",
+    "nineteen", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety",
+    "hundred", "thousand", "million", "billion", "half", "double", "twice",
+}
+
+
+def normalize_prompt(text: str) -> str:
+    """Canonical form used for fingerprinting"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def key_terms(text: str) -> Tuple[str, ...]:
+    """Numbers and negations of a normalized prompt, in order; these must match exactly for a hit"""
+    return tuple(word for word in text.split()
+                 if word in _NEGATIONS or word in _NUMBER_WORDS or any(c.isdigit() for c in word))
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Character shingles of a normalized prompt"""
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from seeded universal hash permutations"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+    def signature(self, features: Set[str]) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+                  for f in features]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self.params
+        )
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class NearDuplicateCache:
+    """
+    Bounded, TTL-limited cache keyed by near-duplicate prompts
+
+    Entries live in a namespace (e.g. skill name plus its other parameters);
+    lookups never cross namespaces, nor prompts with different key_terms().
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 1000, ttl_seconds: float = 3600.0,
+                 num_perm: int = 64, bands: int = 16, max_chars: int = 8000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_chars = max_chars
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        # entry id -> (scope, signature, expires_at, value); scope is (namespace, key terms)
+        self._entries: "OrderedDict[int, Tuple[Any, Tuple[int, ...], float, Any]]" = OrderedDict()
+        # (scope, band index, band values) -> entry ids
+        self._buckets: Dict[Tuple[Any, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _band_keys(self, scope: Tuple[str, Tuple[str, ...]],
+                   signature: Tuple[int, ...]) -> List[Tuple[Any, int, Tuple[int, ...]]]:
+        return [(scope, i, signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def _fingerprint(self, namespace: str, prompt: str) -> Tuple[Tuple[str, Tuple[str, ...]], Tuple[int, ...]]:
+        """(scope, signature) of a prompt; only entries in the same scope can match"""
+        text = normalize_prompt(prompt)
+        return (namespace, key_terms(text)), self.hasher.signature(shingles(text))
+
+    def get(self, namespace: str, prompt: str) -> Optional[Any]:
+        """Value cached for the most similar prompt above the threshold, if any"""
+        if len(prompt) > self.max_chars:
+            return None
+        scope, signature = self._fingerprint(namespace, prompt)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            candidates: Set[int] = set()
+            for key in self._band_keys(scope, signature):
+                candidates |= self._buckets.get(key, set())
+
+            best_value, best_score = None, self.threshold
+            for entry_id in candidates:
+                _, entry_signature, _, value = self._entries[entry_id]
+                score = MinHasher.similarity(signature, entry_signature)
+                if score >= best_score:
+                    best_value, best_score = value, score
+
+            self.stats["hits" if best_value is not None else "misses"] += 1
+            return best_value
+
+    def put(self, namespace: str, prompt: str, value: Any):
+        if len(prompt) > self.max_chars:
+            return
+        scope, signature = self._fingerprint(namespace, prompt)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, signature, time.monotonic() + self.ttl_seconds, value)
+            for key in self._band_keys(scope, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _evict_expired(self, now: float):
+        # Insertion order is expiry order because the TTL is fixed
+        while self._entries:
+            entry_id, (_, _, expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int):
+        scope, signature, _, _ = self._entries.pop(entry_id)
+        for key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+
+def cache_namespace(skill_name: str, parameters: Dict[str, Any], prompt_field: str,
+                    tenant: Optional[str] = None) -> str:
+    """Namespace for a skill call: skill, tenant and every parameter except the prompt itself"""
+    other_params = {k: v for k, v in parameters.items() if k != prompt_field}
+    return json.dumps([skill_name, tenant, other_params], sort_keys=True, default=str)
+
+
+def get_prompt_cache() -> Optional[NearDuplicateCache]:
+    """Cache configured from Config, or None when the prompt cache is disabled"""
+    if not Config.PROMPT_CACHE_ENABLED:
+        return None
+    return NearDuplicateCache(
+        threshold=Config.PROMPT_CACHE_THRESHOLD,
+        max_entries=Config.PROMPT_CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.PROMPT_CACHE_TTL_SECONDS,
+        max_chars=Config.PROMPT_CACHE_MAX_CHARS
+    )
@@ -0,0 +1,353 @@
+"""
+Webhook push notifications for task and project events
+
+Clients register a webhook URL for a task or MGX project. Matching events from
+the event bus are written to a durable SQLite queue, then delivered in
+batches: everything due for the same endpoint is coalesced into one POST
+({"notifications": [...]}) sent over a pooled aiohttp session. Failed
+deliveries are retried with jittered exponential backoff and survive restarts;
+ones that keep failing (or are rejected with a 4xx) are kept as dead letters.
+Redirects are never followed: a redirect target would skip the address checks
+(aiohttp does not resolve IP literals), so a 3xx reply is a permanent failure.
+
+Webhook bearer tokens never reach the database in plain text: with a token
+key they are stored Fernet-encrypted (pip install cryptography), otherwise a
+registration carrying a token lives in memory only and is lost on restart.
+Queued deliveries reference their registration, so removing a webhook also
+stops its pending deliveries.
+"""
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from config import Config
+from event_bus import Event, EventBus
+from url_guard import PublicOnlyResolver, parse_hosts
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # optional: only needed to persist webhook tokens
+    Fernet = None
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    url TEXT NOT NULL,
+    token TEXT,
+    events TEXT,
+    created_at REAL NOT NULL,
+    UNIQUE (topic, url)
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (dead, next_attempt);
+"""
+
+# Rows fetched per delivery pass
+_FETCH_LIMIT = 1000
+
+
+class PushNotifier:
+    def __init__(self, queue_path: str, batch_size: int = 50, batch_window: float = 0.5,
+                 max_attempts: int = 8, backoff_base: float = 1.0, backoff_max: float = 300.0,
+                 timeout: float = 10.0, max_connections: int = 20, token_key: str = "",
+                 allowed_hosts: str = ""):
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.allowed_hosts = parse_hosts(allowed_hosts)
+        if token_key and Fernet is None:
+            raise ImportError("Encrypting webhook tokens needs cryptography: pip install cryptography")
+        self._fernet = Fernet(token_key.encode("utf-8")) if token_key else None
+
+        # WAL with synchronous=NORMAL keeps enqueueing cheap on the event loop
+        # while still surviving a process crash
+        self.db = sqlite3.connect(queue_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+        # topic -> registrations, mirrored from the database for fast matching
+        self.registrations: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        for row in self.db.execute("SELECT id, topic, url, token, events, created_at FROM registrations"):
+            registration_id, topic, url, stored_token, events, created_at = row
+            token = self._decrypt(stored_token) if stored_token else None
+            if stored_token and token is None:
+                logger.warning(f"Dropping webhook {registration_id}: its token cannot be decrypted")
+                continue
+            self._add(self._registration(registration_id, topic, url, token, events, created_at))
+
+        self.bus: Optional[EventBus] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {"enqueued": 0, "delivered": 0, "batches": 0, "failed_attempts": 0, "dead": 0}
+
+    @staticmethod
+    def _registration(registration_id: str, topic: str, url: str, token: Optional[str],
+                      events: Optional[str], created_at: float) -> Dict[str, Any]:
+        return {
+            "id": registration_id,
+            "topic": topic,
+            "url": url,
+            "token": token,
+            "events": json.loads(events) if events else None,
+            "created_at": created_at,
+        }
+
+    def _decrypt(self, stored_token: str) -> Optional[str]:
+        if not self._fernet:
+            return None
+        try:
+            return self._fernet.decrypt(stored_token.encode("utf-8")).decode("utf-8")
+        except InvalidToken:
+            return None
+
+    def _add(self, registration: Dict[str, Any]):
+        topic_registrations = self.registrations[registration["topic"]]
+        self.registrations[registration["topic"]] = (
+            [r for r in topic_registrations if r["url"] != registration["url"]] + [registration]
+        )
+        self._by_id[registration["id"]] = registration
+
+    def register(self, topic: str, url: str, token: Optional[str] = None,
+                 events: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Register (or replace) the webhook for url on topic; events limits the event types sent
+
+        The caller checks url (see url_guard.check_outbound_url); the delivery
+        session additionally refuses names that resolve to non-public addresses.
+        """
+        existing = next((r for r in self.registrations[topic] if r["url"] == url), None)
+        registration = self._registration(existing["id"] if existing else str(uuid.uuid4()), topic, url,
+                                           token, json.dumps(events) if events else None, time.time())
+        with self.db:
+            if token and not self._fernet:
+                # Nowhere safe to keep the token: this registration is memory-only
+                self.db.execute("DELETE FROM registrations WHERE id = ?", (registration["id"],))
+            else:
+                stored_token = self._fernet.encrypt(token.encode("utf-8")).decode("utf-8") if token else None
+                self.db.execute(
+                    "INSERT OR REPLACE INTO registrations (id, topic, url, token, events, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (registration["id"], topic, url, stored_token, json.dumps(events) if events else None,
+                     registration["created_at"])
+                )
+        if existing:
+            self._by_id.pop(existing["id"], None)
+        self._add(registration)
+        return registration
+
+    def unregister(self, topic: str, registration_id: Optional[str] = None) -> int:
+        """Remove one registration (or all of them) for topic; returns how many were removed"""
+        removed = [r for r in self.registrations.get(topic, [])
+                   if registration_id is None or r["id"] == registration_id]
+        with self.db:
+            self.db.executemany("DELETE FROM registrations WHERE id = ?", [(r["id"],) for r in removed])
+        self.registrations[topic] = [r for r in self.registrations.get(topic, []) if r not in removed]
+        for registration in removed:
+            self._by_id.pop(registration["id"], None)
+        return len(removed)
+
+    def get_registrations(self, topic: str) -> List[Dict[str, Any]]:
+        # Tokens are write-only
+        return [{k: v for k, v in r.items() if k != "token"} for r in self.registrations.get(topic, [])]
+
+    def on_event(self, event: Event):
+        """Event bus listener: queue a delivery for every matching registration"""
+        matches = [r for r in self.registrations.get(event.topic, [])
+                   if r["events"] is None or event.type in r["events"]]
+        if not matches:
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO deliveries (url, payload, next_attempt) VALUES (?, ?, ?)",
+                [(r["url"], json.dumps({"registration_id": r["id"], "event": event.to_dict()}), now)
+                 for r in matches]
+            )
+        self.stats["enqueued"] += len(matches)
+        if self._wake:
+            self._wake.set()
+
+    def listen(self, bus: EventBus):
+        """Queue deliveries for bus's events until stop()"""
+        self.bus = bus
+        bus.add_listener(self.on_event)
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=4,
+                                           resolver=PublicOnlyResolver(self.allowed_hosts)),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._wake = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop delivering; anything still queued is sent after the next start"""
+        if self.bus:
+            self.bus.remove_listener(self.on_event)
+            self.bus = None
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self.session:
+            await self.session.close()
+        self.db.close()
+
+    def pending_count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM deliveries WHERE dead = 0").fetchone()[0]
+
+    def _next_due_delay(self) -> Optional[float]:
+        row = self.db.execute("SELECT MIN(next_attempt) FROM deliveries WHERE dead = 0").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    async def _run(self):
+        while True:
+            try:
+                delay = self._next_due_delay()
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), delay)
+                        # New work: give related events a moment to join the batch
+                        await asyncio.sleep(self.batch_window)
+                    except asyncio.TimeoutError:
+                        pass
+                self._wake.clear()
+                await self._deliver_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Push notification worker error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _deliver_due(self):
+        rows = self.db.execute(
+            "SELECT id, url, payload, attempts FROM deliveries "
+            "WHERE dead = 0 AND next_attempt <= ? ORDER BY id LIMIT ?",
+            (time.time(), _FETCH_LIMIT)
+        ).fetchall()
+        if not rows:
+            return
+
+        by_endpoint: Dict[Tuple[str, Optional[str]], List[tuple]] = defaultdict(list)
+        orphaned = []
+        for row in rows:
+            registration = self._by_id.get(json.loads(row[2])["registration_id"])
+            if registration is None:
+                orphaned.append(row)
+            else:
+                by_endpoint[(row[1], registration["token"])].append(row)
+        if orphaned:
+            # The webhook was removed (or lost its token on restart) since these were queued
+            with self.db:
+                self.db.executemany("UPDATE deliveries SET dead = 1, last_error = ? WHERE id = ?",
+                                    [("registration removed", row[0]) for row in orphaned])
+            self.stats["dead"] += len(orphaned)
+
+        # Endpoints are served concurrently, each one batch at a time and in order
+        await asyncio.gather(*(self._deliver_endpoint(url, token, endpoint_rows)
+                               for (url, token), endpoint_rows in by_endpoint.items()))
+
+    async def _deliver_endpoint(self, url: str, token: Optional[str], rows: List[tuple]):
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            error, permanent = await self._post_batch(url, token, [json.loads(row[2]) for row in batch])
+            self.stats["batches"] += 1
+            if error is None:
+                with self.db:
+                    self.db.executemany("DELETE FROM deliveries WHERE id = ?", [(row[0],) for row in batch])
+                self.stats["delivered"] += len(batch)
+                continue
+            retry_at = self._schedule_retry(batch, error, permanent)
+            # Later batches for an endpoint that just failed would fail too; keep
+            # them behind the failed one so the endpoint still sees events in order
+            deferred = rows[start + self.batch_size:]
+            if deferred:
+                with self.db:
+                    self.db.executemany("UPDATE deliveries SET next_attempt = ? WHERE id = ?",
+                                        [(retry_at, row[0]) for row in deferred])
+            return
+
+    async def _post_batch(self, url: str, token: Optional[str],
+                          notifications: List[Dict[str, Any]]) -> Tuple[Optional[str], bool]:
+        """POST one batch; returns (error or None, whether the error is permanent)"""
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        try:
+            async with self.session.post(url, json={"notifications": notifications}, headers=headers,
+                                         allow_redirects=False) as response:
+                if 200 <= response.status < 300:
+                    return None, False
+                if 300 <= response.status < 400:
+                    return f"HTTP {response.status} (redirects are not followed)", True
+                # Other 4xx responses will not change on retry
+                permanent = 400 <= response.status < 500 and response.status not in (408, 429)
+                return f"HTTP {response.status}", permanent
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return f"{type(e).__name__}: {e}", False
+
+    def _schedule_retry(self, rows: List[tuple], error: str, permanent: bool) -> float:
+        """Record a failed attempt for a batch; returns when it will be retried"""
+        # A batch is retried as a unit, so its oldest row sets the backoff
+        attempts = max(row[3] for row in rows) + 1
+        dead = permanent or attempts >= self.max_attempts
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        retry_at = time.time() + random.uniform(backoff / 2, backoff)
+        with self.db:
+            self.db.executemany(
+                "UPDATE deliveries SET attempts = ?, next_attempt = ?, last_error = ?, dead = ? WHERE id = ?",
+                [(attempts, retry_at, error, int(dead), row[0]) for row in rows]
+            )
+        self.stats["failed_attempts"] += len(rows)
+        if dead:
+            self.stats["dead"] += len(rows)
+            logger.error(f"Giving up on {len(rows)} push notification(s) to endpoint ({error})")
+        else:
+            logger.warning(f"Push delivery of {len(rows)} notification(s) failed ({error}); "
+                           f"retrying in {retry_at - time.time():.1f}s")
+        return retry_at
+
+
+def get_push_notifier() -> Optional[PushNotifier]:
+    """Notifier configured from Config, or None when push notifications are disabled"""
+    if not Config.PUSH_QUEUE_PATH:
+        return None
+    return PushNotifier(
+        Config.PUSH_QUEUE_PATH,
+        batch_size=Config.PUSH_BATCH_SIZE,
+        batch_window=Config.PUSH_BATCH_WINDOW_SECONDS,
+        max_attempts=Config.PUSH_MAX_ATTEMPTS,
+        backoff_base=Config.PUSH_BACKOFF_BASE_SECONDS,
+        backoff_max=Config.PUSH_BACKOFF_MAX_SECONDS,
+        timeout=Config.PUSH_TIMEOUT_SECONDS,
+        max_connections=Config.PUSH_MAX_CONNECTIONS,
+        token_key=Config.PUSH_TOKEN_KEY,
+        allowed_hosts=Config.OUTBOUND_ALLOWED_HOSTS
+    )
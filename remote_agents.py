@@ -0,0 +1,246 @@
+"""
+Registry of remote A2A agents this server can delegate to
+
+Remote agents are registered by name and base URL. Their Agent Cards are
+fetched on demand and cached for a TTL (concurrent lookups share one fetch),
+and every call goes over one pooled keep-alive aiohttp session. Tasks and
+skill calls can be delegated to a single agent, or fanned out to several at
+once with a timeout per agent, so one slow agent never holds up the rest.
+
+Agent URLs may only resolve to public addresses, unless their host is
+allowlisted (A2A_OUTBOUND_ALLOWED_HOSTS) or configured in A2A_REMOTE_AGENTS.
+Redirects are not followed, since their targets would skip that check.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from cluster import parse_members
+from config import Config
+from url_guard import PublicOnlyResolver, parse_hosts
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteAgentError(Exception):
+    """A remote agent could not be reached or answered with a JSON-RPC error"""
+
+    def __init__(self, agent: str, message: str):
+        super().__init__(f"Remote agent {agent}: {message}")
+        self.agent = agent
+
+
+@dataclass
+class RemoteAgent:
+    name: str
+    url: str
+    api_key: Optional[str] = None
+    card: Optional[Dict[str, Any]] = None
+    card_fetched_at: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def info(self) -> Dict[str, Any]:
+        # API keys are write-only
+        card = self.card or {}
+        return {
+            "name": self.name,
+            "url": self.url,
+            "agent_name": card.get("identity", {}).get("name"),
+            "skills": [skill.get("name") for skill in card.get("skills", [])],
+            "card_age_seconds": round(time.time() - self.card_fetched_at, 1) if self.card else None,
+        }
+
+
+def _reject_redirect(name: str, response: aiohttp.ClientResponse):
+    if 300 <= response.status < 400:
+        raise RemoteAgentError(name, f"redirected with HTTP {response.status}; redirects are not followed")
+
+
+def text_message(text: str) -> Dict[str, Any]:
+    """A2A user message with a single text part"""
+    return {"role": "user", "parts": [{"type": "text", "content": text}]}
+
+
+class RemoteAgentRegistry:
+    def __init__(self, card_ttl: float = 300.0, timeout: float = 60.0,
+                 max_connections: int = 100, max_connections_per_host: int = 20,
+                 allowed_hosts: Iterable[str] = ()):
+        self.card_ttl = card_ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.allowed_hosts = set(allowed_hosts)
+        self.agents: Dict[str, RemoteAgent] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.stats = {"calls": 0, "errors": 0, "timeouts": 0, "card_fetches": 0}
+
+    def register(self, name: str, url: str, api_key: Optional[str] = None) -> Dict[str, Any]:
+        """Add (or re-point) a remote agent; its card is fetched on first use"""
+        url = url.rstrip("/")
+        existing = self.agents.get(name)
+        if existing and existing.url == url and existing.api_key == api_key:
+            return existing.info()
+        self.agents[name] = RemoteAgent(name, url, api_key)
+        return self.agents[name].info()
+
+    def unregister(self, name: str) -> bool:
+        return self.agents.pop(name, None) is not None
+
+    def list_agents(self) -> List[Dict[str, Any]]:
+        return [agent.info() for agent in self.agents.values()]
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections,
+                                           limit_per_host=self.max_connections_per_host,
+                                           ttl_dns_cache=300,
+                                           resolver=PublicOnlyResolver(self.allowed_hosts)),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def stop(self):
+        if self.session:
+            await self.session.close()
+
+    def _agent(self, name: str) -> RemoteAgent:
+        if name not in self.agents:
+            raise ValueError(f"Unknown remote agent: {name}")
+        return self.agents[name]
+
+    async def get_card(self, name: str, refresh: bool = False) -> Dict[str, Any]:
+        """The agent's card, from cache unless it is older than the TTL"""
+        agent = self._agent(name)
+        if not refresh and agent.card and time.time() - agent.card_fetched_at < self.card_ttl:
+            return agent.card
+        async with agent.lock:
+            # Another caller may have refreshed it while we waited
+            if not refresh and agent.card and time.time() - agent.card_fetched_at < self.card_ttl:
+                return agent.card
+            try:
+                async with self.session.get(f"{agent.url}/agent-card", headers=agent.headers(),
+                                            allow_redirects=False) as response:
+                    _reject_redirect(name, response)
+                    response.raise_for_status()
+                    agent.card = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if agent.card:
+                    # A stale card is still better than failing the call
+                    logger.warning(f"Could not refresh card for remote agent {name}, using cached one: {e}")
+                    return agent.card
+                raise RemoteAgentError(name, f"failed to fetch agent card: {e}")
+            agent.card_fetched_at = time.time()
+            self.stats["card_fetches"] += 1
+            return agent.card
+
+    async def find_agents(self, skill_name: str) -> List[str]:
+        """Names of registered agents whose card lists skill_name"""
+        names = list(self.agents)
+        cards = await asyncio.gather(*(self.get_card(name) for name in names), return_exceptions=True)
+        return [
+            name for name, card in zip(names, cards)
+            if isinstance(card, dict) and any(s.get("name") == skill_name for s in card.get("skills", []))
+        ]
+
+    async def call(self, name: str, method: str, params: Optional[Dict[str, Any]] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send one JSON-RPC request to a remote agent and return its result"""
+        agent = self._agent(name)
+        payload = {"jsonrpc": "2.0", "method": method, "id": str(uuid.uuid4())}
+        if params:
+            payload["params"] = params
+        self.stats["calls"] += 1
+        try:
+            async with self.session.post(
+                f"{agent.url}/a2a", json=payload, headers=agent.headers(), allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)
+            ) as response:
+                _reject_redirect(name, response)
+                response.raise_for_status()
+                result = await response.json()
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise RemoteAgentError(name, f"{method} timed out")
+        except aiohttp.ClientError as e:
+            self.stats["errors"] += 1
+            raise RemoteAgentError(name, f"{method} failed: {e}")
+        if result.get("error"):
+            self.stats["errors"] += 1
+            raise RemoteAgentError(name, f"{method} returned error {result['error']}")
+        return result.get("result", {})
+
+    async def delegate_task(self, name: str, message: Union[str, Dict[str, Any]],
+                            context_id: Optional[str] = None, user_id: Optional[str] = None,
+                            timeout: Optional[float] = None,
+                            idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send a message to a remote agent as task/send; pass context_id back to continue the task
+
+        Pass the same idempotency_key when retrying so the remote agent
+        answers the retry from its cache instead of handling the message twice.
+        """
+        params = {"message": text_message(message) if isinstance(message, str) else message}
+        if idempotency_key:
+            params["idempotency_key"] = idempotency_key
+        if context_id:
+            params["context_id"] = context_id
+        if user_id:
+            params["user_id"] = user_id
+        return await self.call(name, "task/send", params, timeout)
+
+    async def delegate_skill(self, name: str, skill_name: str, parameters: Dict[str, Any],
+                             timeout: Optional[float] = None,
+                             idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        params = {"skill_name": skill_name, "parameters": parameters}
+        if idempotency_key:
+            params["idempotency_key"] = idempotency_key
+        return await self.call(name, "skill/execute", params, timeout)
+
+    async def fan_out(self, names: Iterable[str], method: str, params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Send the same request to several agents concurrently
+
+        Returns {name: {"result": ...}} or {name: {"error": ...}} per agent;
+        each agent gets its own timeout, so the whole call takes at most about
+        that long however many agents are asked.
+        """
+        names = list(dict.fromkeys(names))
+
+        async def one(name: str) -> Dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                result = await self.call(name, method, params, timeout)
+                outcome = {"result": result}
+            except (RemoteAgentError, ValueError) as e:
+                outcome = {"error": str(e)}
+            outcome["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return outcome
+
+        outcomes = await asyncio.gather(*(one(name) for name in names))
+        return dict(zip(names, outcomes))
+
+
+def get_remote_agents() -> RemoteAgentRegistry:
+    """Registry configured from Config, preloaded with A2A_REMOTE_AGENTS"""
+    configured = parse_members(Config.REMOTE_AGENTS)
+    registry = RemoteAgentRegistry(
+        card_ttl=Config.REMOTE_AGENT_CARD_TTL_SECONDS,
+        timeout=Config.REMOTE_AGENT_TIMEOUT_SECONDS,
+        max_connections=Config.REMOTE_AGENT_MAX_CONNECTIONS,
+        max_connections_per_host=Config.REMOTE_AGENT_MAX_CONNECTIONS_PER_HOST,
+        # Agents the operator configured are trusted wherever they live
+        allowed_hosts=parse_hosts(Config.OUTBOUND_ALLOWED_HOSTS)
+        | {urlsplit(url).hostname.lower() for url in configured.values() if urlsplit(url).hostname}
+    )
+    for name, url in configured.items():
+        registry.register(name, url)
+    return registry
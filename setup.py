@@ -50,6 +50,10 @@ setup(
         'docs': [
             'mkdocs>=1.4.0',
             'mkdocs-material>=8.0'
+        ],
+        'http2': [
+            'httpx[http2]>=0.25.0',
+            'hypercorn>=0.15.0'
         ]
     },
     
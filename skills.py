@@ -1,19 +1,53 @@
 """
 Skills for the A2A Agent System
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
 import json
+import asyncio
 import requests
-import openai
-from config import Config
+from config import Config, get_openai_client
+from token_budget import get_token_scheduler, estimate_request_tokens, usage_total_tokens
+from prompt_cache import get_prompt_cache, cache_namespace
+from context_window import count_tokens, fit_messages, prompt_budget, truncate_to_tokens
+from llm_streaming import CompletionStream
+
+# Skills whose results may be served from the near-duplicate prompt cache,
+# mapped to the parameter holding the prompt text
+CACHEABLE_SKILLS = {"text_generation": "prompt", "text_analysis": "text"}
+
+# LLM skills that can stream their output, mapped to the result field holding the text
+STREAMING_SKILLS = {"text_generation": "generated_text", "text_analysis": "analysis"}
+
+
+class SkillStream:
+    """
+    One streaming skill run: iterate it for text deltas
+    
+    Once iteration finishes, result holds the same dict execute_skill would
+    have returned. Skills that cannot stream yield no deltas and only set result.
+    """
+    
+    def __init__(self, skills: "AgentSkills", skill_name: str, parameters: Dict[str, Any],
+                 tenant: Optional[str] = None):
+        self.skills = skills
+        self.skill_name = skill_name
+        self.parameters = parameters
+        self.tenant = tenant
+        self.result: Optional[Dict[str, Any]] = None
+    
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self.skills._stream_deltas(self)
 
 class AgentSkills:
     def __init__(self):
         # Initialize AI clients
-        if Config.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        if Config.llm_available():
+            self.openai_client = get_openai_client()
         else:
             self.openai_client = None
+        
+        self.token_scheduler = get_token_scheduler()
+        self.prompt_cache = get_prompt_cache()
     
     def get_available_skills(self) -> List[Dict[str, Any]]:
         """Return list of available skills for the Agent Card"""
@@ -100,7 +134,7 @@ class AgentSkills:
         # Filter skills based on available API keys
         available_skills = []
         for skill in skills:
-            if skill["name"] in ["text_generation", "text_analysis"] and not Config.OPENAI_API_KEY:
+            if skill["name"] in ["text_generation", "text_analysis"] and not Config.llm_available():
                 continue
             if skill["name"] == "weather_info" and not Config.WEATHER_API_KEY:
                 continue
@@ -108,80 +142,200 @@ class AgentSkills:
         
         return available_skills
     
-    async def execute_skill(self, skill_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a specific skill with given parameters"""
+    async def execute_skill(self, skill_name: str, parameters: Dict[str, Any],
+                            tenant: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute a specific skill with given parameters
+        
+        Args:
+            skill_name: Name of the skill to run
+            parameters: Skill parameters
+            tenant: Optional tenant (user) id whose token budget LLM skills draw from
+        """
+        cache_key = self._cache_key(skill_name, parameters, tenant)
+        if cache_key:
+            cached = await asyncio.to_thread(self.prompt_cache.get, *cache_key)
+            if cached is not None:
+                return dict(cached, cached=True)
+        
+        # LLM skills are guarded by their provider's circuit breaker (see
+        # get_openai_client); an open circuit fails them here without waiting
+        try:
+            result = await self._dispatch_skill(skill_name, parameters, tenant)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error executing {skill_name}: {str(e)}"
+            }
+        
+        if cache_key and result.get("success"):
+            await asyncio.to_thread(self.prompt_cache.put, *cache_key, result)
+        return result
+    
+    def stream_skill(self, skill_name: str, parameters: Dict[str, Any],
+                     tenant: Optional[str] = None) -> SkillStream:
+        """
+        Execute a skill, streaming text deltas as the provider produces them
+        
+        Only STREAMING_SKILLS stream; any other skill runs normally and its
+        result is available on the returned stream once iteration ends.
+        """
+        return SkillStream(self, skill_name, parameters, tenant)
+    
+    async def _stream_deltas(self, stream: SkillStream) -> AsyncIterator[str]:
+        skill_name, parameters, tenant = stream.skill_name, stream.parameters, stream.tenant
+        if skill_name not in STREAMING_SKILLS or not self.openai_client:
+            stream.result = await self.execute_skill(skill_name, parameters, tenant)
+            return
+        
+        cache_key = self._cache_key(skill_name, parameters, tenant)
+        if cache_key:
+            cached = await asyncio.to_thread(self.prompt_cache.get, *cache_key)
+            if cached is not None:
+                yield cached["result"][STREAMING_SKILLS[skill_name]]
+                stream.result = dict(cached, cached=True)
+                return
+        
         try:
             if skill_name == "text_generation":
-                return await self._text_generation(parameters)
-            elif skill_name == "text_analysis":
-                return await self._text_analysis(parameters)
-            elif skill_name == "web_search":
-                return await self._web_search(parameters)
-            elif skill_name == "weather_info":
-                return await self._weather_info(parameters)
+                request = self._text_generation_request(parameters)
             else:
-                return {
-                    "success": False,
-                    "error": f"Unknown skill: {skill_name}"
-                }
+                request, truncated = self._text_analysis_request(parameters)
+            
+            completion = CompletionStream(self.openai_client, **request)
+            estimate = estimate_request_tokens(request["messages"], request["max_tokens"], request["model"])
+            async with self.token_scheduler.reserve(tenant, estimate) as reservation:
+                async for delta in completion:
+                    yield delta
+                reservation.record(completion.total_tokens)
         except Exception as e:
-            return {
+            stream.result = {
                 "success": False,
                 "error": f"Error executing {skill_name}: {str(e)}"
             }
+            return
+        
+        if skill_name == "text_generation":
+            stream.result = self._text_generation_result(request, completion.text, reservation.actual_tokens)
+        else:
+            stream.result = self._text_analysis_result(parameters, truncated, completion.text,
+                                                       reservation.actual_tokens)
+        if cache_key:
+            await asyncio.to_thread(self.prompt_cache.put, *cache_key, stream.result)
+    
+    def _cache_key(self, skill_name: str, parameters: Dict[str, Any],
+                   tenant: Optional[str]) -> Optional[Tuple[str, str]]:
+        """Prompt cache (namespace, prompt) for a call, or None if it is not cacheable"""
+        if not self.prompt_cache or skill_name not in CACHEABLE_SKILLS:
+            return None
+        prompt_field = CACHEABLE_SKILLS[skill_name]
+        return (cache_namespace(skill_name, parameters, prompt_field, tenant),
+                str(parameters.get(prompt_field, "")))
+    
+    async def _dispatch_skill(self, skill_name: str, parameters: Dict[str, Any],
+                              tenant: Optional[str]) -> Dict[str, Any]:
+        """Route a skill name to its implementation"""
+        if skill_name == "text_generation":
+            return await self._text_generation(parameters, tenant)
+        elif skill_name == "text_analysis":
+            return await self._text_analysis(parameters, tenant)
+        elif skill_name == "web_search":
+            return await self._web_search(parameters)
+        elif skill_name == "weather_info":
+            return await self._weather_info(parameters)
+        else:
+            return {
+                "success": False,
+                "error": f"Unknown skill: {skill_name}"
+            }
     
-    async def _text_generation(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    async def _text_generation(self, parameters: Dict[str, Any], tenant: Optional[str] = None) -> Dict[str, Any]:
         """Generate text using OpenAI"""
         if not self.openai_client:
             return {"success": False, "error": "OpenAI API key not configured"}
         
+        request = self._text_generation_request(parameters)
+        estimate = estimate_request_tokens(request["messages"], request["max_tokens"], request["model"])
+        async with self.token_scheduler.reserve(tenant, estimate) as reservation:
+            response = await asyncio.to_thread(self.openai_client.chat.completions.create, **request)
+            reservation.record(usage_total_tokens(response))
+        
+        return self._text_generation_result(request, response.choices[0].message.content,
+                                            reservation.actual_tokens)
+    
+    def _text_generation_request(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completion request for text_generation"""
         prompt = parameters.get("prompt")
         model = parameters.get("model", "gpt-3.5-turbo")
         max_tokens = parameters.get("max_tokens", 1000)
         
-        response = self.openai_client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=max_tokens
-        )
-        
+        return {
+            "model": model,
+            "messages": fit_messages([{"role": "user", "content": prompt}], model, max_tokens),
+            "max_tokens": max_tokens
+        }
+    
+    def _text_generation_result(self, request: Dict[str, Any], text: str,
+                                tokens_used: Optional[int]) -> Dict[str, Any]:
         return {
             "success": True,
             "result": {
-                "generated_text": response.choices[0].message.content,
-                "model_used": model,
-                "tokens_used": response.usage.total_tokens
+                "generated_text": text,
+                "model_used": request["model"],
+                "tokens_used": tokens_used
             }
         }
     
-    async def _text_analysis(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    async def _text_analysis(self, parameters: Dict[str, Any], tenant: Optional[str] = None) -> Dict[str, Any]:
         """Analyze text using OpenAI"""
         if not self.openai_client:
             return {"success": False, "error": "OpenAI API key not configured"}
         
+        request, truncated = self._text_analysis_request(parameters)
+        estimate = estimate_request_tokens(request["messages"], request["max_tokens"], request["model"])
+        async with self.token_scheduler.reserve(tenant, estimate) as reservation:
+            response = await asyncio.to_thread(self.openai_client.chat.completions.create, **request)
+            reservation.record(usage_total_tokens(response))
+        
+        return self._text_analysis_result(parameters, truncated, response.choices[0].message.content,
+                                          reservation.actual_tokens)
+    
+    def _text_analysis_request(self, parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Chat completion request for text_analysis, and whether the input text was truncated"""
         text = parameters.get("text")
         analysis_type = parameters.get("analysis_type", "summary")
+        model = "gpt-3.5-turbo"
         
         if analysis_type == "summary":
-            prompt = f"Please provide a concise summary of the following text:\n\n{text}"
+            instruction = "Please provide a concise summary of the following text:"
         elif analysis_type == "sentiment":
-            prompt = f"Analyze the sentiment of the following text (positive, negative, neutral):\n\n{text}"
+            instruction = "Analyze the sentiment of the following text (positive, negative, neutral):"
         elif analysis_type == "keywords":
-            prompt = f"Extract the main keywords from the following text:\n\n{text}"
+            instruction = "Extract the main keywords from the following text:"
         else:  # all
-            prompt = f"Provide a summary, sentiment analysis, and keywords for the following text:\n\n{text}"
+            instruction = "Provide a summary, sentiment analysis, and keywords for the following text:"
         
-        response = self.openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500
-        )
+        # Trim the text itself so the instruction always survives
+        text_budget = prompt_budget(model, 500) - count_tokens(instruction, model) - 8
+        truncated = count_tokens(text, model) > text_budget
+        text = truncate_to_tokens(text, text_budget, model)
         
+        request = {
+            "model": model,
+            "messages": [{"role": "user", "content": f"{instruction}\n\n{text}"}],
+            "max_tokens": 500
+        }
+        return request, truncated
+    
+    def _text_analysis_result(self, parameters: Dict[str, Any], truncated: bool, text: str,
+                              tokens_used: Optional[int]) -> Dict[str, Any]:
         return {
             "success": True,
             "result": {
-                "analysis": response.choices[0].message.content,
-                "analysis_type": analysis_type
+                "analysis": text,
+                "analysis_type": parameters.get("analysis_type", "summary"),
+                "tokens_used": tokens_used,
+                "input_truncated": truncated
             }
         }
     
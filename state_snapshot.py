@@ -0,0 +1,48 @@
+"""
+State snapshots for warm restarts of the A2A server
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path: str, state: Dict[str, Any]) -> None:
+    """Atomically write a compact JSON snapshot (write to a temp file, then rename)"""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": datetime.now().isoformat(),
+        "state": state
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(",", ":"), ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+    logger.info(f"State snapshot written to {path}")
+
+
+def load_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Load a snapshot written by save_snapshot, or None if missing or unreadable"""
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable state snapshot {path}: {e}")
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring state snapshot {path} with unsupported version {snapshot.get('version')}")
+        return None
+
+    logger.info(f"Loaded state snapshot from {path} (saved at {snapshot.get('saved_at')})")
+    return snapshot.get("state")
@@ -0,0 +1,132 @@
+"""
+Test circuit breakers: failure-rate tripping, half-open recovery, streamed
+calls judged when their stream ends, and skills failing fast on an open circuit
+"""
+import asyncio
+import os
+import time
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerClient, CircuitOpenError,
+                             get_breaker, is_backend_failure)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def failing(error: Exception):
+    def call(**_):
+        raise error
+    return call
+
+
+def test_backend_failure_classification():
+    assert is_backend_failure(StatusError(503))
+    assert is_backend_failure(StatusError(429))
+    assert not is_backend_failure(StatusError(400))
+    assert is_backend_failure(TimeoutError())
+    assert is_backend_failure(ConnectionError())
+    assert not is_backend_failure(ValueError("bad request"))
+
+
+def test_opens_on_failure_rate_and_recovers_after_trials():
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, window=4, open_seconds=0.05, half_open_calls=2)
+    breaker.call(lambda: "ok")
+    breaker.call(lambda: "ok")
+    for _ in range(2):
+        try:
+            breaker.call(failing(StatusError(500)))
+        except StatusError:
+            pass
+    assert breaker.state == OPEN
+    try:
+        breaker.call(lambda: "never called")
+        raise AssertionError("an open breaker must not call through")
+    except CircuitOpenError:
+        pass
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_half_open_failure_reopens_and_client_errors_do_not_count():
+    breaker = CircuitBreaker("test", min_calls=2, window=2, open_seconds=0.05, half_open_calls=1)
+    for _ in range(5):
+        try:
+            breaker.call(failing(StatusError(400)))
+        except StatusError:
+            pass
+    # The backend answered each time; the requests were bad
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    try:
+        breaker.call(failing(TimeoutError()))
+    except TimeoutError:
+        pass
+    assert breaker.state == OPEN
+
+
+def test_stream_is_judged_when_it_ends():
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=3, window=3)
+
+    def stream(fail_after=None, **_):
+        for i in range(3):
+            if i == fail_after:
+                raise ConnectionError("dropped")
+            yield i
+
+    assert list(breaker.call(stream, stream=True)) == [0, 1, 2]
+    assert breaker.snapshot() == {"state": CLOSED, "recent_calls": 1, "recent_failures": 0}
+
+    chunks = breaker.call(stream, stream=True, fail_after=1)
+    # Opening the stream is not enough to judge it
+    assert breaker.snapshot()["recent_calls"] == 1
+    assert next(chunks) == 0
+    try:
+        list(chunks)
+    except ConnectionError:
+        pass
+    assert breaker.snapshot() == {"state": CLOSED, "recent_calls": 2, "recent_failures": 1}
+
+    # A caller that stops reading early does not count against the backend
+    chunks = breaker.call(stream, stream=True)
+    next(chunks)
+    chunks.close()
+    assert breaker.snapshot() == {"state": CLOSED, "recent_calls": 3, "recent_failures": 1}
+
+
+def test_llm_skill_fails_fast_on_open_circuit():
+    from skills import AgentSkills
+
+    skills = AgentSkills()
+    assert isinstance(skills.openai_client, CircuitBreakerClient)
+    breaker = get_breaker("llm:fake")
+    breaker._open()
+    try:
+        result = asyncio.run(skills.execute_skill("text_generation", {"prompt": "Write a haiku"}))
+    finally:
+        breaker.state = CLOSED
+    assert result["success"] is False
+    assert "Circuit for llm:fake is open" in result["error"]
+    assert asyncio.run(skills.execute_skill("text_generation", {"prompt": "Write a haiku"}))["success"]
+
+
+if __name__ == "__main__":
+    test_backend_failure_classification()
+    test_opens_on_failure_rate_and_recovers_after_trials()
+    test_half_open_failure_reopens_and_client_errors_do_not_count()
+    test_stream_is_judged_when_it_ends()
+    test_llm_skill_fails_fast_on_open_circuit()
+    print("✅ Circuit breaker tests passed")
@@ -0,0 +1,135 @@
+"""
+Test cluster mode: the hash ring, request routing, and handoff on a membership change
+
+The handoff test runs two real nodes in this process. Node "a" starts alone
+and holds every task and conversation; once "b" joins, "a" hands over what
+"b" now owns, and every conversation must go on with the same task whichever
+node the next message reaches.
+"""
+import asyncio
+import os
+import socket
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+import aiohttp
+import uvicorn
+
+from a2a_server import A2AServer
+from cluster import Cluster, HashRing
+
+SECRET = "test-secret"
+
+
+def test_hash_ring_spreads_keys_and_moves_few_on_join():
+    keys = [f"key-{i}" for i in range(3000)]
+    ring = HashRing(["a", "b", "c"])
+    owners = {key: ring.owner(key) for key in keys}
+    assert owners == {key: HashRing(["c", "a", "b"]).owner(key) for key in keys}
+    for node in ("a", "b", "c"):
+        assert 700 < sum(1 for owner in owners.values() if owner == node) < 1300
+
+    grown = HashRing(["a", "b", "c", "d"])
+    moved = [key for key in keys if grown.owner(key) != owners[key]]
+    # Only keys taken over by the new node move, about a quarter of them
+    assert all(grown.owner(key) == "d" for key in moved)
+    assert 500 < len(moved) < 1000
+
+
+def test_routing_keys():
+    server = A2AServer()
+    assert server._routing_key("task/artifacts", {"task_id": "t1"}) == "t1"
+    assert server._routing_key("mgx/team_discussion", {"project_id": "p1", "task_id": "t1"}) == "p1"
+    assert server._routing_key("task/send", {"context_id": "c1"}) == "c1"
+    assert server._routing_key("task/send", {"context_id": "c1", "task_id": "t1"}) == "t1"
+    assert server._routing_key("task/create", {"idempotency_key": "k1"}) == "k1"
+    assert server._routing_key("task/create", {}) is None
+    # The remote agent registry is on every node; those ids belong to the remote agent
+    assert server._routing_key("agent/remote/delegate", {"task_id": "t1", "idempotency_key": "k1"}) is None
+
+
+class Node:
+    """An A2AServer with its own cluster view, served over HTTP on a free port"""
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.server = A2AServer()
+        self.http = None
+        self.serving = None
+
+    async def start(self, members):
+        self.server.cluster = Cluster(self.node_id, members, secret=SECRET)
+        self.http = uvicorn.Server(uvicorn.Config(self.server.app, log_level="warning"))
+        self.serving = asyncio.create_task(self.http.serve(sockets=[self.sock]))
+        while not self.http.started:
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        self.http.should_exit = True
+        await self.serving
+
+
+async def call(session, node, method, params):
+    async with session.post(f"{node.url}/a2a", json={"jsonrpc": "2.0", "method": method,
+                                                     "params": params, "id": "1"}) as response:
+        body = await response.json()
+    assert body.get("error") is None, body
+    return body["result"]
+
+
+async def run_handoff():
+    a, b = Node("a"), Node("b")
+    both = {"a": a.url, "b": b.url}
+    await a.start({"a": a.url})
+    await b.start(both)
+    ring = HashRing(["a", "b"])
+
+    async with aiohttp.ClientSession() as session:
+        # Conversations for every combination of context owner and task owner once "b" joins
+        conversations = {}
+        for i in range(200):
+            context_id = f"conversation-{i}"
+            result = await call(session, a, "task/send", {"context_id": context_id, "message": {"content": "hi"}})
+            combination = (ring.owner(context_id), ring.owner(result["task_id"]))
+            conversations.setdefault(combination, (context_id, result["task_id"]))
+            if len(conversations) == 4:
+                break
+        assert len(conversations) == 4
+
+        a.server.cluster.set_members(both)
+        await a.server.rebalance()
+
+        for (context_owner, task_owner), (context_id, task_id) in conversations.items():
+            owner_node = {"a": a, "b": b}[task_owner]
+            assert task_id in owner_node.server.tasks
+            assert {"a": a, "b": b}[context_owner].server.context_tasks[context_id] == task_id
+            for node in (a, b):
+                result = await call(session, node, "task/send",
+                                    {"context_id": context_id, "message": {"content": f"via {node.node_id}"}})
+                assert result["task_id"] == task_id, (context_owner, task_owner, node.node_id)
+            assert len(owner_node.server.tasks[task_id]["messages"]) == 6
+
+        # A cancelled task ends the conversation; the next message starts a new task that sticks
+        context_id, task_id = conversations[("b", "a")]
+        await call(session, b, "task/cancel", {"task_id": task_id})
+        first = await call(session, a, "task/send", {"context_id": context_id, "message": {"content": "again"}})
+        second = await call(session, b, "task/send", {"context_id": context_id, "message": {"content": "more"}})
+        assert first["task_id"] != task_id
+        assert second["task_id"] == first["task_id"]
+
+    await a.stop()
+    await b.stop()
+
+
+def test_handoff_keeps_conversations_together():
+    asyncio.run(run_handoff())
+
+
+if __name__ == "__main__":
+    test_hash_ring_spreads_keys_and_moves_few_on_join()
+    test_routing_keys()
+    test_handoff_keeps_conversations_together()
+    print("✅ Cluster tests passed")
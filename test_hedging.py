@@ -0,0 +1,61 @@
+"""
+Test hedged requests: the latency history tracks the primary call even when a
+hedge wins, and hedges stay within their per-minute cap
+"""
+import asyncio
+
+from hedging import HedgePolicy
+
+
+def slow_then_fast(slow: float, fast: float):
+    """Primary factory whose calls take `slow` seconds, plus a hedge taking `fast`"""
+    async def primary():
+        await asyncio.sleep(slow)
+        return "primary"
+
+    async def hedge():
+        await asyncio.sleep(fast)
+        return "hedge"
+
+    return primary, hedge
+
+
+async def run_losing_primary_is_recorded():
+    policy = HedgePolicy(min_delay=0.01, max_fraction=1.0, min_samples=3)
+    for _ in range(3):
+        policy.record("model", 0.02)
+    primary, hedge = slow_then_fast(0.2, 0.01)
+    assert await policy.run("model", primary, hedge) == "hedge"
+    assert policy.stats["hedge_wins"] == 1
+    # Nothing recorded yet: the winner's time would understate the primary's latency
+    assert len(policy.latencies["model"]) == 3
+    await asyncio.sleep(0.25)
+    assert len(policy.latencies["model"]) == 4
+    assert policy.latencies["model"][-1] >= 0.2
+
+
+async def run_hedges_are_capped_per_minute():
+    policy = HedgePolicy(min_delay=0.01, max_fraction=1.0, min_samples=3, max_per_minute=2)
+    # Enough fast history that the slow primaries below do not move the hedge delay
+    for _ in range(100):
+        policy.record("model", 0.01)
+    primary, hedge = slow_then_fast(0.05, 0.0)
+    results = [await policy.run("model", primary, hedge) for _ in range(5)]
+    assert results == ["hedge", "hedge", "primary", "primary", "primary"]
+    assert policy.stats["hedges"] == 2
+    assert policy.hedge_delay("model") == 0.01 and policy.credits >= 1.0
+    await asyncio.sleep(0.1)
+
+
+def test_losing_primary_is_recorded():
+    asyncio.run(run_losing_primary_is_recorded())
+
+
+def test_hedges_are_capped_per_minute():
+    asyncio.run(run_hedges_are_capped_per_minute())
+
+
+if __name__ == "__main__":
+    test_losing_primary_is_recorded()
+    test_hedges_are_capped_per_minute()
+    print("✅ Hedging tests passed")
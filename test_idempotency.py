@@ -0,0 +1,135 @@
+"""
+Test idempotency keys: replayed results, rejected reuse with different params,
+per-tenant scoping, and the tenant taken from the caller's API key
+"""
+import asyncio
+import os
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from fastapi.testclient import TestClient
+
+from idempotency import IdempotencyCache, IdempotencyKeyReused, params_fingerprint
+
+
+def counting_call(calls, result=None, delay=0.0, error=None):
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result if result is not None else {"call": len(calls)}
+    return call
+
+
+async def run_replay_and_reuse():
+    cache = IdempotencyCache()
+    calls = []
+    params = {"message": "hi", "idempotency_key": "k1"}
+
+    first = await cache.run("task/create", "k1", counting_call(calls), fingerprint=params_fingerprint(params))
+    again = await cache.run("task/create", "k1", counting_call(calls), fingerprint=params_fingerprint(params))
+    assert first == again == {"call": 1}
+    assert len(calls) == 1
+
+    # The key itself is not part of the fingerprint; everything else is
+    assert params_fingerprint(params) == params_fingerprint({"message": "hi", "idempotency_key": "k2"})
+    try:
+        await cache.run("task/create", "k1", counting_call(calls),
+                        fingerprint=params_fingerprint({"message": "bye", "idempotency_key": "k1"}))
+        raise AssertionError("a key reused with different params must be rejected")
+    except IdempotencyKeyReused:
+        pass
+    assert len(calls) == 1
+
+    # The same key under another method or tenant is a different call
+    await cache.run("task/send", "k1", counting_call(calls), fingerprint=params_fingerprint(params))
+    await cache.run("task/create", "k1", counting_call(calls), fingerprint=params_fingerprint(params), scope="bob")
+    assert len(calls) == 3
+
+
+async def run_concurrent_retry_and_failures():
+    cache = IdempotencyCache()
+    calls = []
+
+    # A retry that arrives while the first call runs waits for it
+    results = await asyncio.gather(cache.run("task/create", "k1", counting_call(calls, delay=0.05)),
+                                   cache.run("task/create", "k1", counting_call(calls, delay=0.05)))
+    assert results[0] == results[1] and len(calls) == 1
+
+    # Failures are not stored, so a retry runs again
+    try:
+        await cache.run("task/create", "k2", counting_call(calls, error=RuntimeError("boom")))
+    except RuntimeError:
+        pass
+    assert await cache.run("task/create", "k2", counting_call(calls, result={"ok": True})) == {"ok": True}
+    assert len(calls) == 3
+
+
+async def run_ttl_and_size_limits():
+    calls = []
+    cache = IdempotencyCache(max_entries=2, ttl_seconds=0.05)
+    for key in ("k1", "k2", "k3"):
+        await cache.run("task/create", key, counting_call(calls))
+    assert len(cache) == 2
+    await cache.run("task/create", "k1", counting_call(calls))
+    assert len(calls) == 4  # k1 was evicted as the oldest entry
+
+    await asyncio.sleep(0.06)
+    await cache.run("task/create", "k3", counting_call(calls))
+    assert len(calls) == 5
+    assert len(cache) == 1
+
+
+def test_replay_and_reuse_with_different_params():
+    asyncio.run(run_replay_and_reuse())
+
+
+def test_concurrent_retry_and_failures():
+    asyncio.run(run_concurrent_retry_and_failures())
+
+
+def test_ttl_and_size_limits():
+    asyncio.run(run_ttl_and_size_limits())
+
+
+def test_tenant_comes_from_api_key():
+    from config import Config
+    from a2a_server import A2AServer
+
+    saved = Config.API_KEYS
+    Config.API_KEYS = "alice-key=alice,bob-key=bob"
+    try:
+        server = A2AServer()
+    finally:
+        Config.API_KEYS = saved
+    client = TestClient(server.app)
+
+    def create(api_key, **params):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        response = client.post("/a2a", headers=headers, json={
+            "jsonrpc": "2.0", "method": "task/create", "params": params, "id": "1"
+        })
+        return response
+
+    assert create(None, idempotency_key="k1").status_code == 401
+    assert create("wrong-key", idempotency_key="k1").status_code == 401
+
+    first = create("alice-key", idempotency_key="k1").json()["result"]
+    # Claiming to be bob does not move alice's call into bob's scope
+    spoofed = create("alice-key", idempotency_key="k1", user_id="bob").json()["result"]
+    assert spoofed == first
+    assert server.tasks[first["task_id"]]["user_id"] == "alice"
+
+    # Bob's key replays none of alice's results
+    bobs = create("bob-key", idempotency_key="k1").json()["result"]
+    assert bobs["task_id"] != first["task_id"]
+    assert server.tasks[bobs["task_id"]]["user_id"] == "bob"
+
+
+if __name__ == "__main__":
+    test_replay_and_reuse_with_different_params()
+    test_concurrent_retry_and_failures()
+    test_ttl_and_size_limits()
+    test_tenant_comes_from_api_key()
+    print("✅ Idempotency tests passed")
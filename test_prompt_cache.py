@@ -0,0 +1,67 @@
+"""
+Test the near-duplicate prompt cache
+
+Reworded prompts should share a cached answer; prompts that differ only in a
+number or a negation ask for something else and must not.
+"""
+from prompt_cache import MinHasher, NearDuplicateCache, key_terms, normalize_prompt, shingles
+
+
+def similarity(a: str, b: str) -> float:
+    hasher = MinHasher()
+    return MinHasher.similarity(hasher.signature(shingles(normalize_prompt(a))),
+                                hasher.signature(shingles(normalize_prompt(b))))
+
+
+def test_near_duplicates_hit():
+    cache = NearDuplicateCache()
+    cache.put("ns", "Write a short poem about the ocean at night.", "poem")
+    assert cache.get("ns", "write a short poem about the ocean at night") == "poem"
+    assert cache.get("ns", "Write a short poem about the  ocean at night!!") == "poem"
+    assert cache.get("other", "Write a short poem about the ocean at night.") is None
+    assert cache.stats == {"hits": 2, "misses": 1}
+
+
+def test_numbers_and_negations_must_match():
+    context = " for the landing page of our new analytics product, and keep the answer short"
+    pairs = [
+        ("Write a 5 line poem about the ocean at night", "Write a 50 line poem about the ocean at night"),
+        ("I do like this design" + context, "I do not like this design" + context),
+        ("Summarize why revenue grew 5 percent this quarter", "Summarize why revenue grew 15 percent this quarter"),
+        ("Explain why we can deploy on Fridays" + context, "Explain why we can't deploy on Fridays" + context),
+    ]
+    for first, second in pairs:
+        # Similar enough to pass the default threshold on shingles alone
+        assert similarity(first, second) >= 0.9, (first, second)
+        cache = NearDuplicateCache(threshold=0.9)
+        cache.put("ns", first, "first")
+        assert cache.get("ns", second) is None, (first, second)
+        assert cache.get("ns", first) == "first"
+
+
+def test_key_terms():
+    assert key_terms(normalize_prompt("Don't add 3 items, not 30")) == ("t", "3", "not", "30")
+    assert key_terms(normalize_prompt("Give me five ideas")) == ("five",)
+    assert key_terms(normalize_prompt("Write a poem")) == ()
+
+
+def test_ttl_and_size_limits():
+    cache = NearDuplicateCache(max_entries=2, ttl_seconds=0)
+    cache.put("ns", "first prompt", 1)
+    assert cache.get("ns", "first prompt") is None
+
+    cache = NearDuplicateCache(max_entries=2, max_chars=50)
+    for i, prompt in enumerate(["alpha prompt text", "beta prompt words", "gamma prompt lines"]):
+        cache.put("ns", prompt, i)
+    assert cache.get("ns", "alpha prompt text") is None
+    assert cache.get("ns", "gamma prompt lines") == 2
+    cache.put("ns", "x" * 51, "too long")
+    assert cache.get("ns", "x" * 51) is None
+
+
+if __name__ == "__main__":
+    test_near_duplicates_hit()
+    test_numbers_and_negations_must_match()
+    test_key_terms()
+    test_ttl_and_size_limits()
+    print("✅ Prompt cache tests passed")
@@ -0,0 +1,142 @@
+"""
+Test webhook push notifications against a local receiver
+
+Runs without the A2A server: a stand-in aiohttp webhook receiver rejects the
+first deliveries with 503, so the notifier has to retry from its on-disk
+queue, coalesce events into batches, and pick up where it left off after a
+restart. A second endpoint answers with a redirect to the first, which must
+not be followed.
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+import tempfile
+
+from aiohttp import web
+
+from event_bus import EventBus, task_topic
+from push_notifications import PushNotifier
+
+
+class StandInReceiver:
+    """Webhook endpoint that fails the first `failures` requests"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches = []
+        self.redirects = 0
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.failures > 0:
+            self.failures -= 1
+            return web.Response(status=503)
+        body = await request.json()
+        self.batches.append((request.headers.get("Authorization"), body["notifications"]))
+        return web.json_response({"ok": True})
+
+    async def redirect(self, request: web.Request) -> web.Response:
+        self.redirects += 1
+        raise web.HTTPTemporaryRedirect(self.url)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/hook", self.handle)
+        app.router.add_post("/redirect", self.redirect)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        await web.SockSite(self.runner, sock).start()
+        self.url = f"http://127.0.0.1:{sock.getsockname()[1]}/hook"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def wait_for(condition, timeout: float = 10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Timed out waiting for deliveries")
+        await asyncio.sleep(0.05)
+
+
+async def run_push_notifications():
+    """Batching, retry with backoff, and delivery after a restart"""
+    receiver = StandInReceiver(failures=2)
+    await receiver.start()
+    queue_path = os.path.join(tempfile.mkdtemp(), "push.db")
+    topic = task_topic("task-1")
+
+    print("1️⃣ Batched delivery with retries")
+    bus = EventBus()
+    notifier = PushNotifier(queue_path, batch_size=10, batch_window=0.1, backoff_base=0.1)
+    notifier.listen(bus)
+    notifier.register(topic, receiver.url, token="secret", events=["task.message", "task.status"])
+    await notifier.start()
+
+    for i in range(5):
+        bus.publish(topic, "task.message", {"n": i})
+    bus.publish(topic, "task.created", {"filtered": True})
+    bus.publish(task_topic("other"), "task.message", {"unregistered": True})
+    await wait_for(lambda: notifier.pending_count() == 0)
+
+    delivered = [n["event"]["data"]["n"] for _, batch in receiver.batches for n in batch]
+    print(f"   batches: {len(receiver.batches)}, events: {delivered}, stats: {notifier.stats}")
+    assert delivered == [0, 1, 2, 3, 4]
+    assert len(receiver.batches) == 1
+    assert receiver.batches[0][0] == "Bearer secret"
+    assert notifier.stats["failed_attempts"] == 10
+    await notifier.stop()
+    # Without a token key, a webhook with a token is never written to disk
+    with sqlite3.connect(queue_path) as db:
+        assert db.execute("SELECT COUNT(*) FROM registrations").fetchone()[0] == 0
+    # ...and a stopped notifier no longer listens
+    bus.publish(topic, "task.message", {"after_stop": True})
+
+    print("2️⃣ Queued deliveries survive a restart")
+    receiver.batches.clear()
+    receiver.failures = 0
+    offline = PushNotifier(queue_path)
+    offline.register(topic, receiver.url, events=["task.status"])
+    bus = EventBus()
+    offline.listen(bus)
+    # Not started: events are only written to disk
+    bus.publish(topic, "task.status", {"status": "completed"})
+    assert offline.pending_count() == 1
+    await offline.stop()
+
+    restarted = PushNotifier(queue_path, batch_window=0.1)
+    assert restarted.get_registrations(topic)[0]["url"] == receiver.url
+    await restarted.start()
+    await wait_for(lambda: restarted.pending_count() == 0)
+    print(f"   delivered after restart: {receiver.batches[0][1][0]['event']['data']}")
+    await restarted.stop()
+
+    print("3️⃣ Redirects are not followed")
+    receiver.batches.clear()
+    bus = EventBus()
+    notifier = PushNotifier(os.path.join(tempfile.mkdtemp(), "push.db"), batch_window=0.1)
+    notifier.listen(bus)
+    notifier.register(topic, receiver.url.replace("/hook", "/redirect"), events=["task.status"])
+    await notifier.start()
+    bus.publish(topic, "task.status", {"status": "completed"})
+    await wait_for(lambda: notifier.stats["dead"] == 1)
+    print(f"   redirects answered: {receiver.redirects}, stats: {notifier.stats}")
+    assert receiver.redirects == 1
+    assert receiver.batches == []
+    await notifier.stop()
+
+    await receiver.stop()
+    print("✅ Push notification tests passed")
+
+
+def test_push_notifications():
+    asyncio.run(run_push_notifications())
+
+
+if __name__ == "__main__":
+    test_push_notifications()
@@ -0,0 +1,101 @@
+"""
+Test the token-budget scheduler: bucket refill, FIFO waiting per tenant,
+reconciling estimates with reported usage, and dropping idle tenants
+"""
+import asyncio
+import time
+
+from token_budget import TokenBucket, TokenBudgetScheduler
+
+# 1000 tokens per second keeps the waits in these tests short
+TPM = 60000
+
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(TPM)
+    assert bucket.wait_time(TPM) == 0
+    bucket.consume(TPM)
+    assert 0.09 < bucket.wait_time(100) <= 0.1
+
+    time.sleep(0.05)
+    assert 0 < bucket.wait_time(100) < 0.06
+    time.sleep(0.06)
+    assert bucket.wait_time(100) == 0
+
+    # Refilling never goes past one minute of budget
+    bucket.tokens = bucket.capacity
+    time.sleep(0.01)
+    assert bucket.is_full() and bucket.tokens == bucket.capacity
+
+
+async def run_fifo_order():
+    scheduler = TokenBudgetScheduler(tenant_tpm=TPM)
+    await scheduler.acquire("alice", TPM)
+    served = []
+
+    async def call(name, tokens, tenant="alice"):
+        await scheduler.acquire(tenant, tokens)
+        served.append(name)
+
+    # The small second call could fit first, but waits its turn behind the first
+    waiters = [asyncio.create_task(call(name, tokens)) for name, tokens in (("first", 100), ("second", 10), ("third", 100))]
+    # Another tenant's call does not wait behind alice's
+    other = asyncio.create_task(call("bob", 100, tenant="bob"))
+    await asyncio.gather(*waiters, other)
+    assert served.index("bob") == 0
+    assert [name for name in served if name != "bob"] == ["first", "second", "third"]
+    assert scheduler.stats["queued_calls"] == 3
+
+
+async def run_reconcile():
+    scheduler = TokenBudgetScheduler(global_tpm=TPM, tenant_tpm=TPM)
+    async with scheduler.reserve("alice", 30000) as reservation:
+        reservation.record(1000)
+    # Only the reported usage stays charged
+    assert scheduler.global_bucket.tokens >= TPM - 1000 - 1
+    assert scheduler.tenant_buckets["alice"].tokens >= TPM - 1000 - 1
+
+    async with scheduler.reserve("alice", 1000):
+        pass
+    # No usage reported: the estimate stays charged
+    assert scheduler.tenant_buckets["alice"].tokens < TPM - 1500
+    assert scheduler.stats["used_tokens"] == 1000
+
+
+async def run_idle_eviction():
+    scheduler = TokenBudgetScheduler(tenant_tpm=TPM, max_tenants=2)
+    await scheduler.acquire("a", 1)
+    await scheduler.acquire("b", 1)
+    await asyncio.sleep(0.01)
+    await scheduler.acquire("c", 1)
+    assert set(scheduler.tenant_buckets) == {"b", "c"}
+
+    # b spends half its budget and is not idle again for 30 seconds
+    await scheduler.acquire("b", TPM // 2)
+    await asyncio.sleep(0.01)
+    await scheduler.acquire("d", 1)
+    assert set(scheduler.tenant_buckets) == {"b", "d"}
+    await scheduler.acquire("e", 1)
+    # Forgetting b would hand it a fresh budget, so it is kept past the cap
+    assert set(scheduler.tenant_buckets) == {"b", "d", "e"}
+    assert scheduler.tenant_buckets["b"].wait_time(TPM) > 25
+
+
+def test_fifo_order():
+    asyncio.run(run_fifo_order())
+
+
+def test_reconcile():
+    asyncio.run(run_reconcile())
+
+
+def test_idle_eviction():
+    asyncio.run(run_idle_eviction())
+
+
+if __name__ == "__main__":
+    test_bucket_refills_up_to_capacity()
+    test_fifo_order()
+    test_reconcile()
+    test_idle_eviction()
+    print("✅ Token budget tests passed")
@@ -0,0 +1,201 @@
+"""
+Token-budget scheduler for LLM-bound work
+
+Each call reserves an estimated token count against a global and a per-tenant
+tokens-per-minute budget before it is sent, and is reconciled with the
+provider's reported usage afterwards. Calls that would exceed a budget wait
+in FIFO order instead of being fired into the provider's rate limits.
+
+Per-tenant state is kept in least-recently-used order and capped; a tenant
+is only forgotten once it is idle (no call queued and its bucket refilled),
+so forgetting it cannot hand it extra budget.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from context_window import count_tokens, count_message_tokens
+
+# Rough completion size assumed when a call does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def estimate_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Local token estimate for text sent to model"""
+    return count_tokens(text, model)
+
+
+def estimate_request_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None,
+                            model: str = "gpt-3.5-turbo") -> int:
+    """Estimate prompt plus completion tokens for a chat completion request"""
+    return count_message_tokens(messages, model) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def usage_total_tokens(response: Any) -> Optional[int]:
+    """Read total_tokens from a chat completion response, if the provider reported it"""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+class TokenBucket:
+    """Continuously refilled token bucket sized to one minute of budget"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if available now)"""
+        self.refill()
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount: float):
+        self.refill()
+        self.tokens -= amount
+
+    def is_full(self) -> bool:
+        self.refill()
+        return self.tokens >= self.capacity
+
+
+class TokenReservation:
+    """Tokens held by one in-flight LLM call"""
+
+    def __init__(self, tenant: Optional[str], estimated_tokens: int):
+        self.tenant = tenant
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+    def record(self, actual_tokens: Optional[int]):
+        """Record the provider-reported usage for this call"""
+        if actual_tokens is not None:
+            self.actual_tokens = actual_tokens
+
+
+class TokenBudgetScheduler:
+    """
+    Queue LLM calls against global and per-tenant tokens-per-minute budgets
+
+    A budget of 0 means unlimited. Waiters for the same tenant are served in
+    FIFO order; a tenant waiting on its own budget does not hold up others.
+    State for idle tenants is dropped once more than max_tenants are tracked.
+    """
+
+    def __init__(self, global_tpm: int = 0, tenant_tpm: int = 0, max_tenants: int = 10000):
+        self.global_bucket = TokenBucket(global_tpm) if global_tpm > 0 else None
+        self.tenant_tpm = tenant_tpm
+        self.max_tenants = max_tenants
+        self.tenant_buckets: Dict[str, TokenBucket] = {}
+        self._global_lock: Optional[asyncio.Lock] = None
+        # Least recently used tenant first
+        self._tenant_locks: "OrderedDict[str, asyncio.Lock]" = OrderedDict()
+        self.stats = {"reserved_tokens": 0, "used_tokens": 0, "queued_calls": 0, "wait_seconds": 0.0}
+
+    def _tenant_bucket(self, tenant: str) -> Optional[TokenBucket]:
+        if self.tenant_tpm <= 0:
+            return None
+        if tenant not in self.tenant_buckets:
+            self.tenant_buckets[tenant] = TokenBucket(self.tenant_tpm)
+        return self.tenant_buckets[tenant]
+
+    def _tenant_lock(self, tenant: str) -> asyncio.Lock:
+        """The tenant's FIFO lock, marking the tenant as most recently used"""
+        if tenant in self._tenant_locks:
+            self._tenant_locks.move_to_end(tenant)
+        else:
+            self._tenant_locks[tenant] = asyncio.Lock()
+            self._evict_idle_tenants()
+        return self._tenant_locks[tenant]
+
+    def _evict_idle_tenants(self):
+        while len(self._tenant_locks) > self.max_tenants:
+            tenant, lock = next(iter(self._tenant_locks.items()))
+            bucket = self.tenant_buckets.get(tenant)
+            if lock.locked() or (bucket and not bucket.is_full()):
+                # Still in use; a busy least-recently-used tenant is checked again on the next new tenant
+                break
+            del self._tenant_locks[tenant]
+            self.tenant_buckets.pop(tenant, None)
+
+    async def acquire(self, tenant: Optional[str], estimated_tokens: int) -> TokenReservation:
+        """Wait until both budgets can cover estimated_tokens, then debit them"""
+        tenant_key = tenant or "anonymous"
+        tenant_lock = self._tenant_lock(tenant_key)
+        tenant_bucket = self._tenant_bucket(tenant_key)
+        if self._global_lock is None:
+            # Created lazily so it binds to the loop the server actually runs on
+            self._global_lock = asyncio.Lock()
+        started = time.monotonic()
+
+        async with tenant_lock:
+            if tenant_bucket:
+                await self._wait_for(tenant_bucket, estimated_tokens)
+            async with self._global_lock:
+                if self.global_bucket:
+                    await self._wait_for(self.global_bucket, estimated_tokens)
+                    self.global_bucket.consume(estimated_tokens)
+                if tenant_bucket:
+                    tenant_bucket.consume(estimated_tokens)
+
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.stats["queued_calls"] += 1
+            self.stats["wait_seconds"] += waited
+        self.stats["reserved_tokens"] += estimated_tokens
+        return TokenReservation(tenant_key, estimated_tokens)
+
+    def reconcile(self, reservation: TokenReservation):
+        """Correct both budgets by the difference between estimated and actual usage"""
+        if reservation.actual_tokens is None:
+            # No usage reported (e.g. the call failed); keep the estimate charged
+            return
+        delta = reservation.actual_tokens - reservation.estimated_tokens
+        if self.global_bucket:
+            self.global_bucket.consume(delta)
+        # A tenant forgotten since the call started had refilled its bucket; drop the correction with it
+        tenant_bucket = self.tenant_buckets.get(reservation.tenant)
+        if tenant_bucket:
+            tenant_bucket.consume(delta)
+        self.stats["used_tokens"] += reservation.actual_tokens
+
+    @asynccontextmanager
+    async def reserve(self, tenant: Optional[str], estimated_tokens: int):
+        """Reserve budget for one call; call record() on the yielded reservation with real usage"""
+        reservation = await self.acquire(tenant, estimated_tokens)
+        try:
+            yield reservation
+        finally:
+            self.reconcile(reservation)
+
+    @staticmethod
+    async def _wait_for(bucket: TokenBucket, amount: int):
+        delay = bucket.wait_time(amount)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = bucket.wait_time(amount)
+
+
+_scheduler: Optional[TokenBudgetScheduler] = None
+
+
+def get_token_scheduler() -> TokenBudgetScheduler:
+    """Process-wide scheduler shared by skills and the MGX team"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TokenBudgetScheduler(
+            global_tpm=Config.LLM_GLOBAL_TPM,
+            tenant_tpm=Config.LLM_TENANT_TPM,
+            max_tenants=Config.LLM_MAX_TRACKED_TENANTS
+        )
+    return _scheduler
@@ -0,0 +1,78 @@
+"""
+Guard for outbound requests to caller-supplied URLs
+
+Webhook and remote agent URLs come from API callers, so without a check the
+server could be pointed at itself, the local network or a cloud metadata
+endpoint (SSRF). check_outbound_url() rejects URLs whose host resolves to a
+loopback, private, link-local or otherwise non-public address when they are
+registered, and PublicOnlyResolver applies the same rule every time a
+session resolves a host, so a name cannot be re-pointed at an internal
+address after it was checked. Hosts listed in A2A_OUTBOUND_ALLOWED_HOSTS are
+exempt, for webhooks and agents that really do live on the internal network.
+"""
+import asyncio
+import ipaddress
+import socket
+from typing import Iterable, List, Set
+from urllib.parse import urlsplit
+
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+
+class UnsafeURLError(ValueError):
+    """A caller-supplied URL points somewhere the server must not call"""
+
+
+def parse_hosts(spec: str) -> Set[str]:
+    """Parse "host,host" into a set of lower-case host names"""
+    return {host.strip().lower() for host in spec.split(",") if host.strip()}
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_outbound_url(url: str, allowed_hosts: Iterable[str] = ()) -> None:
+    """Raise UnsafeURLError unless url is http(s) and its host resolves only to public addresses"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError("A http(s) url with a host is required")
+    host = parts.hostname.lower()
+    if host in set(allowed_hosts):
+        return
+    try:
+        addresses = [ipaddress.ip_address(host)]
+    except ValueError:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, parts.port or 0, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise UnsafeURLError(f"Cannot resolve {host}: {e}")
+        addresses = [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+    for address in addresses:
+        if not is_public_address(str(address)):
+            raise UnsafeURLError(f"{host} points to non-public address {address}")
+
+
+class PublicOnlyResolver(AbstractResolver):
+    """aiohttp resolver that refuses non-public addresses for hosts not on the allowlist"""
+
+    def __init__(self, allowed_hosts: Iterable[str] = ()):
+        self.allowed_hosts = set(allowed_hosts)
+        self._resolver = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET) -> List[ResolveResult]:
+        results = await self._resolver.resolve(host, port, family)
+        if host.lower() in self.allowed_hosts:
+            return results
+        public = [result for result in results if is_public_address(result["host"])]
+        if not public:
+            raise OSError(f"{host} resolves only to non-public addresses")
+        return public
+
+    async def close(self) -> None:
+        await self._resolver.close()